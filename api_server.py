@@ -25,39 +25,83 @@ from pathlib import Path
 from typing import Dict, List, Optional, Any
 import tempfile
 import base64
+import hmac
+import time
+from io import BytesIO
 
-from flask import Flask, request, jsonify, make_response
+from flask import Flask, Request, Response, request, jsonify, make_response, stream_with_context
 from flask_cors import CORS
+from werkzeug.formparser import FormDataParser
 from werkzeug.utils import secure_filename
 
 # Import our system components
 try:
     from ultimate_chronic_disease_system import UltimateChronicDiseaseSystem
     from enhanced_chronic_disease_predictor import EnhancedChronicDiseasePredictor
-    from report_processor import HospitalReportProcessor
-    from multi_api_dataset_fetcher import MultiAPIDatasetFetcher
+    from report_processor import HospitalReportProcessor, PROFILE_FIELDS
+    from model_registry import get_model_registry
+    from multi_disease_scorer import MultiDiseaseScorer
+    from job_queue import JobQueue, JobQueueFull, JobStore, TERMINAL_STATUSES
 except ImportError as e:
     print(f"Error importing system components: {e}")
     print("Make sure all required files are in the same directory.")
     sys.exit(1)
 
+def _in_memory_file_stream(total_content_length, content_type, filename=None, content_length=None):
+    """Form parser stream factory: every uploaded file is buffered in memory"""
+    return BytesIO()
+
+class InMemoryFormDataParser(FormDataParser):
+    """Form data parser that keeps uploaded files in memory instead of
+    spooling large ones to temp files; uploads are bounded by MAX_CONTENT_LENGTH"""
+    
+    def __init__(self, stream_factory=None, *args, **kwargs):
+        super().__init__(_in_memory_file_stream, *args, **kwargs)
+
+class InMemoryUploadRequest(Request):
+    """Request whose multipart uploads are parsed in memory"""
+    form_data_parser_class = InMemoryFormDataParser
+
 # Initialize Flask app
 app = Flask(__name__)
+app.request_class = InMemoryUploadRequest
 CORS(app)  # Enable CORS for all routes
 
 # Global system instance
 system = None
-predictor = None
+registry = None
+# (predictor, scorer), swapped as one on a hot reload; read it once per request
+models = None
 report_processor = None
+job_store = None
+job_queue = None
 
-# Configuration
-UPLOAD_FOLDER = Path('api_uploads')
-UPLOAD_FOLDER.mkdir(exist_ok=True)
+# Configuration (uploaded reports are parsed in memory, never written to disk)
 ALLOWED_EXTENSIONS = {'pdf', 'docx', 'txt', 'json'}
 
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
+# Hot model reload: seconds between model directory checks (0 disables the
+# watcher) and the token the admin reload endpoint requires (without one the
+# endpoint is disabled)
+MODEL_WATCH_INTERVAL = float(os.environ.get('MODEL_WATCH_INTERVAL', '10'))
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+# Background jobs for ?async=true report processing and full assessments
+JOB_DB_PATH = Path(os.environ.get('JOB_DB_PATH', 'api_jobs.db'))
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '2'))
+JOB_QUEUE_SIZE = int(os.environ.get('JOB_QUEUE_SIZE', '32'))
+JOB_RETRY_AFTER = 5  # seconds clients should wait when the queue is full
+JOB_POLL_INTERVAL = 0.5  # seconds between status checks in event streams
+
+# Threads each patient assessment uses to score its diseases in parallel
+# (1 scores them one after another)
+SCORER_WORKERS = int(os.environ.get('SCORER_WORKERS', '4'))
+
+# PDF reports are read page by page and reading stops once the patient profile
+# fields are found or after REPORT_PAGE_BUDGET pages (0 reads every page)
+REPORT_PAGE_BUDGET = int(os.environ.get('REPORT_PAGE_BUDGET', '100'))
+
 def allowed_file(filename):
     """Check if file extension is allowed"""
     return '.' in filename and \
@@ -65,30 +109,34 @@ def allowed_file(filename):
 
 def initialize_system():
     """Initialize the chronic disease system"""
-    global system, predictor, report_processor
+    global system, registry, models, report_processor, job_store, job_queue
     
     try:
         print("🚀 Initializing Chronic Disease Risk Assessment API...")
         
-        # Initialize main system
-        system = UltimateChronicDiseaseSystem()
-        
-        # Load existing models
-        models_loaded = system.load_existing_models()
-        if not models_loaded:
+        # One shared predictor per process; models load on first use
+        registry = get_model_registry('.')
+        predictor = registry.predictor
+        if not predictor.available_diseases():
             print("⚠️ No trained models found. Some endpoints may not work.")
         
-        # Initialize individual components
-        predictor = EnhancedChronicDiseasePredictor()
-        report_processor = HospitalReportProcessor()
+        # Initialize main system on the shared predictor
+        system = UltimateChronicDiseaseSystem(predictor=predictor, scorer_workers=SCORER_WORKERS)
+        report_processor = system.report_processor
+        report_processor.page_budget = REPORT_PAGE_BUDGET or None
+        report_processor.required_fields = PROFILE_FIELDS
+        
+        models = (predictor, MultiDiseaseScorer(predictor, _map_patient_to_all_disease_features,
+                                                max_workers=SCORER_WORKERS))
+        registry.add_swap_listener(_use_predictor)
         
-        # Load models into predictor
-        model_files = list(Path('.').glob('enhanced_chronic_disease_model_*.pkl'))
-        for model_file in model_files:
-            disease = model_file.stem.replace('enhanced_chronic_disease_model_', '')
-            predictor.load_model(str(model_file), disease)
+        # Background job workers for slow report processing
+        if job_queue is None:
+            job_store = JobStore(JOB_DB_PATH)
+            job_store.prune()
+            job_queue = JobQueue(job_store, workers=JOB_WORKERS, max_pending=JOB_QUEUE_SIZE)
         
-        print(f"✅ System initialized with {len(predictor.models)} models")
+        print(f"✅ System initialized with {len(predictor.available_diseases())} models (loaded on first use)")
         return True
         
     except Exception as e:
@@ -96,11 +144,27 @@ def initialize_system():
         print(traceback.format_exc())
         return False
 
+def _use_predictor(new_predictor):
+    """Point the API at a hot-reloaded predictor; in-flight calls finish on the old one"""
+    global models
+    
+    # One assignment, so no request sees the new predictor with the old scorer
+    models = (new_predictor, MultiDiseaseScorer(new_predictor, _map_patient_to_all_disease_features,
+                                                max_workers=SCORER_WORKERS))
+    if system is not None:
+        system.use_predictor(new_predictor)
+
+def _serving_models():
+    """The current ``(predictor, scorer)`` pair, or ``(None, None)`` before initialization"""
+    return models or (None, None)
+
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
+    predictor, _ = _serving_models()
     try:
-        available_models = list(predictor.models.keys()) if predictor else []
+        available_models = predictor.available_diseases() if predictor else []
         return jsonify({
             'status': 'healthy',
             'timestamp': datetime.now().isoformat(),
@@ -118,18 +182,18 @@ def health_check():
 @app.route('/api/models', methods=['GET'])
 def get_models_info():
     """Get information about available models"""
+    predictor, _ = _serving_models()
     try:
-        if not predictor or not predictor.models:
+        if not predictor or not predictor.available_diseases():
             return jsonify({
                 'error': 'No models available',
                 'message': 'System needs to be set up first'
             }), 503
         
         models_info = {}
-        for disease, model in predictor.models.items():
+        for disease in predictor.available_diseases():
             models_info[disease] = {
-                'name': disease,
-                'model_type': type(model).__name__,
+                **registry.model_info(disease),
                 'available': True,
                 'risk_categories': ['Low Risk', 'Moderate Risk', 'High Risk', 'Very High Risk']
             }
@@ -146,6 +210,50 @@ def get_models_info():
             'message': str(e)
         }), 500
 
+@app.route('/api/admin/reload-models', methods=['POST'])
+def reload_models():
+    """
+    Load new or retrained model files and swap them in without a restart
+    
+    Optional JSON payload:
+    {
+        "diseases": ["heart_disease"]  // Optional, defaults to all changed models
+    }
+    """
+    try:
+        if not ADMIN_TOKEN:
+            return jsonify({
+                'error': 'Forbidden',
+                'message': 'Model reload is disabled; set ADMIN_TOKEN to enable it'
+            }), 403
+        
+        if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), ADMIN_TOKEN):
+            return jsonify({
+                'error': 'Unauthorized',
+                'message': 'A valid X-Admin-Token header is required'
+            }), 401
+        
+        if registry is None:
+            return jsonify({
+                'error': 'System not initialized',
+                'message': 'Model registry is not available'
+            }), 503
+        
+        data = request.get_json(silent=True) or {}
+        reloaded = registry.reload(data.get('diseases'))
+        
+        return jsonify({
+            'reloaded': reloaded,
+            'versions': registry.versions,
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'error': 'Model reload failed',
+            'message': str(e)
+        }), 500
+
 @app.route('/api/assess', methods=['POST'])
 def assess_patient_risk():
     """
@@ -168,8 +276,9 @@ def assess_patient_risk():
         "diseases": ["diabetes", "heart_disease"]  // Optional, defaults to all
     }
     """
+    predictor, scorer = _serving_models()
     try:
-        if not predictor or not predictor.models:
+        if not predictor or not predictor.available_diseases():
             return jsonify({
                 'error': 'No models available',
                 'message': 'System needs to be set up first'
@@ -185,7 +294,7 @@ def assess_patient_risk():
         
         patient_id = data.get('patient_id', f'API_PATIENT_{datetime.now().strftime("%Y%m%d_%H%M%S")}')
         patient_data = data.get('patient_data', {})
-        requested_diseases = data.get('diseases', list(predictor.models.keys()))
+        requested_diseases = data.get('diseases', predictor.available_diseases())
         
         if not patient_data:
             return jsonify({
@@ -193,38 +302,15 @@ def assess_patient_risk():
                 'message': 'patient_data field is required'
             }), 400
         
-        # Perform risk assessments
-        risk_assessments = {}
-        available_diseases = list(predictor.models.keys())
+        response = _build_assessment(scorer, patient_id, patient_data, requested_diseases)
         
-        for disease in requested_diseases:
-            if disease not in available_diseases:
-                continue
-                
-            # Map patient data to disease-specific features
-            disease_features = _map_patient_to_disease_features(patient_data, disease)
-            
-            if disease_features:
-                risk_result = predictor.predict_risk_score(disease_features, disease)
-                if risk_result:
-                    risk_assessments[disease] = risk_result
-        
-        if not risk_assessments:
+        if not response:
             return jsonify({
                 'error': 'No risk assessments generated',
                 'message': 'Insufficient data or unsupported diseases',
-                'available_diseases': available_diseases
+                'available_diseases': predictor.available_diseases()
             }), 400
         
-        # Generate response
-        response = {
-            'patient_id': patient_id,
-            'assessment_timestamp': datetime.now().isoformat(),
-            'risk_assessments': risk_assessments,
-            'patient_data_used': patient_data,
-            'recommendations': _generate_recommendations(risk_assessments)
-        }
-        
         return jsonify(response)
         
     except Exception as e:
@@ -254,8 +340,9 @@ def assess_batch_patients():
         "diseases": ["diabetes", "heart_disease"]  // Optional
     }
     """
+    predictor, _ = _serving_models()
     try:
-        if not predictor or not predictor.models:
+        if not predictor or not predictor.available_diseases():
             return jsonify({
                 'error': 'No models available',
                 'message': 'System needs to be set up first'
@@ -268,7 +355,7 @@ def assess_batch_patients():
             }), 400
         
         patients = data.get('patients', [])
-        requested_diseases = data.get('diseases', list(predictor.models.keys()))
+        requested_diseases = data.get('diseases', predictor.available_diseases())
         
         if not patients:
             return jsonify({
@@ -280,45 +367,27 @@ def assess_batch_patients():
         successful_assessments = 0
         failed_assessments = 0
         
-        for patient in patients:
+        # Score every requested disease over the whole batch at once
+        patient_profiles = [patient.get('patient_data', {}) for patient in patients]
+        batch_assessments, mapping_errors = _assess_profiles_batch(predictor, patient_profiles, requested_diseases)
+        
+        for index, patient in enumerate(patients):
             patient_id = patient.get('patient_id', f'BATCH_PATIENT_{len(batch_results)}')
-            patient_data = patient.get('patient_data', {})
+            patient_assessments = batch_assessments[index]
             
-            try:
-                # Assess this patient
-                patient_assessments = {}
-                
-                for disease in requested_diseases:
-                    if disease not in predictor.models:
-                        continue
-                    
-                    disease_features = _map_patient_to_disease_features(patient_data, disease)
-                    if disease_features:
-                        risk_result = predictor.predict_risk_score(disease_features, disease)
-                        if risk_result:
-                            patient_assessments[disease] = risk_result
-                
-                if patient_assessments:
-                    batch_results.append({
-                        'patient_id': patient_id,
-                        'status': 'success',
-                        'risk_assessments': patient_assessments,
-                        'recommendations': _generate_recommendations(patient_assessments)
-                    })
-                    successful_assessments += 1
-                else:
-                    batch_results.append({
-                        'patient_id': patient_id,
-                        'status': 'failed',
-                        'error': 'No assessments generated - insufficient data'
-                    })
-                    failed_assessments += 1
-                    
-            except Exception as e:
+            if patient_assessments:
+                batch_results.append({
+                    'patient_id': patient_id,
+                    'status': 'success',
+                    'risk_assessments': patient_assessments,
+                    'recommendations': _generate_recommendations(patient_assessments)
+                })
+                successful_assessments += 1
+            else:
                 batch_results.append({
                     'patient_id': patient_id,
                     'status': 'failed',
-                    'error': str(e)
+                    'error': mapping_errors[index] or 'No assessments generated - insufficient data'
                 })
                 failed_assessments += 1
         
@@ -337,12 +406,150 @@ def assess_batch_patients():
             'message': str(e)
         }), 500
 
+def _build_assessment(scorer, patient_id: str, patient_data: Dict, requested_diseases: Optional[List[str]] = None):
+    """Score a patient profile and build the assessment response, or None if nothing could be scored"""
+    # Perform risk assessments for all requested diseases in one call
+    risk_assessments = scorer.score(patient_data, requested_diseases)
+    
+    if not risk_assessments:
+        return None
+    
+    return {
+        'patient_id': patient_id,
+        'assessment_timestamp': datetime.now().isoformat(),
+        'risk_assessments': risk_assessments,
+        'patient_data_used': patient_data,
+        'recommendations': _generate_recommendations(risk_assessments)
+    }
+
+def _wants_async() -> bool:
+    """True if the client asked for a background job (``?async=true``)"""
+    return request.args.get('async', '').lower() in ('1', 'true', 'yes')
+
+def _read_uploaded_files():
+    """
+    Read report files from a multipart upload or a JSON body with inline content
+    
+    Returns ``(files, error_response)`` where ``files`` is a list of
+    ``(filename, content_bytes)`` tuples. File contents are read in the
+    request so the work itself can run later on a job worker.
+    """
+    files = []
+    
+    # Handle multipart file upload
+    if 'files' in request.files:
+        for file in request.files.getlist('files'):
+            if file and file.filename and allowed_file(file.filename):
+                files.append((secure_filename(file.filename), file.read()))
+    
+    # Handle JSON with base64 files
+    elif request.is_json and 'files' in (request.get_json(silent=True) or {}):
+        for file_data in request.get_json().get('files', []):
+            filename = secure_filename(file_data.get('filename', 'uploaded_file.txt'))
+            content = file_data.get('content', '')
+            
+            # Decode base64 if provided (keeps binary PDF/DOCX content intact)
+            if file_data.get('encoding') == 'base64':
+                try:
+                    content = base64.b64decode(content)
+                except Exception as e:
+                    return None, (jsonify({
+                        'error': f'Failed to decode base64 content for {filename}',
+                        'message': str(e)
+                    }), 400)
+            else:
+                content = content.encode('utf-8')
+            
+            files.append((filename, content))
+    
+    else:
+        return None, (jsonify({
+            'error': 'No files provided',
+            'message': 'Upload files using multipart/form-data or provide JSON with file content'
+        }), 400)
+    
+    if not files:
+        return None, (jsonify({
+            'error': 'No valid files to process',
+            'message': f'Supported formats: {", ".join(ALLOWED_EXTENSIONS)}'
+        }), 400)
+    
+    return files, None
+
+def _process_report_files(files: List[tuple], patient_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Extract medical data from uploaded report files
+    
+    With a patient id the reports are added to that patient's stored history
+    and the extracted data covers all of it. Raises ValueError if no medical
+    data could be extracted.
+    """
+    # Parse the uploaded bytes in memory
+    processed_data = report_processor.process_multiple_reports(files)
+    
+    if not processed_data or 'aggregated_data' not in processed_data:
+        raise ValueError('Could not extract medical data from uploaded files')
+    
+    if patient_id and processed_data['individual_reports']:
+        processed_data['aggregated_data'] = system.patient_aggregates.add_reports(
+            patient_id, processed_data['individual_reports']
+        )
+    
+    # Generate patient profile
+    patient_profile = report_processor.generate_patient_profile(processed_data['aggregated_data'])
+    
+    return {
+        'status': 'success',
+        'files_processed': len(files),
+        'extracted_data': processed_data['aggregated_data'],
+        'patient_profile': patient_profile,
+        'processing_timestamp': datetime.now().isoformat(),
+        'message': 'Reports processed successfully. Use patient_profile data for risk assessment.'
+    }
+
+def _run_full_assessment(patient_id: Optional[str], files: Optional[List[tuple]], patient_data: Optional[Dict]) -> Dict[str, Any]:
+    """Extract a profile from reports (if any) and assess it; raises ValueError on unusable input"""
+    patient_profile = _process_report_files(files, patient_id)['patient_profile'] if files else patient_data
+    
+    if not patient_profile:
+        raise ValueError('Provide either files for processing or patient_data in JSON')
+    
+    patient_id = patient_id or f'FULL_ASSESS_{datetime.now().strftime("%Y%m%d_%H%M%S")}'
+    _, scorer = _serving_models()
+    response = _build_assessment(scorer, patient_id, patient_profile)
+    if not response:
+        raise ValueError('No risk assessments generated: insufficient data or unsupported diseases')
+    return response
+
+def _submit_job(kind: str, func, *args):
+    """Queue work on the job workers and answer 202 with the job id, or 429 when full"""
+    try:
+        job_id = job_queue.submit(kind, func, *args)
+    except JobQueueFull as e:
+        response = jsonify({
+            'error': 'Too many pending jobs',
+            'message': str(e)
+        })
+        response.headers['Retry-After'] = str(JOB_RETRY_AFTER)
+        return response, 429
+    
+    response = jsonify({
+        'job_id': job_id,
+        'status': 'queued',
+        'status_url': f'/api/jobs/{job_id}',
+        'events_url': f'/api/jobs/{job_id}/events'
+    })
+    response.headers['Location'] = f'/api/jobs/{job_id}'
+    return response, 202
+
 @app.route('/api/upload-report', methods=['POST'])
 def upload_and_process_report():
     """
     Upload hospital reports and extract medical data
     
-    Supports multipart/form-data with file upload or JSON with base64 encoded files
+    Supports multipart/form-data with file upload or JSON with base64 encoded files.
+    With ``?async=true`` the reports are processed on a background job and the
+    response is ``202`` with a job id to poll at ``/api/jobs/<job_id>``.
     """
     try:
         if not report_processor:
@@ -350,84 +557,22 @@ def upload_and_process_report():
                 'error': 'Report processor not available'
             }), 503
         
-        files_to_process = []
+        files, error_response = _read_uploaded_files()
+        if error_response:
+            return error_response
+        patient_id = request.form.get('patient_id') or (request.get_json(silent=True) or {}).get('patient_id')
         
-        # Handle multipart file upload
-        if 'files' in request.files:
-            uploaded_files = request.files.getlist('files')
-            
-            for file in uploaded_files:
-                if file and file.filename and allowed_file(file.filename):
-                    filename = secure_filename(file.filename)
-                    filepath = UPLOAD_FOLDER / filename
-                    file.save(filepath)
-                    files_to_process.append(str(filepath))
-        
-        # Handle JSON with base64 files
-        elif request.is_json:
-            data = request.get_json()
-            files_data = data.get('files', [])
-            
-            for file_data in files_data:
-                filename = secure_filename(file_data.get('filename', 'uploaded_file.txt'))
-                content = file_data.get('content', '')
-                
-                # Decode base64 if provided
-                if file_data.get('encoding') == 'base64':
-                    try:
-                        content = base64.b64decode(content).decode('utf-8')
-                    except Exception as e:
-                        return jsonify({
-                            'error': f'Failed to decode base64 content for {filename}',
-                            'message': str(e)
-                        }), 400
-                
-                # Save to temporary file
-                filepath = UPLOAD_FOLDER / filename
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(content)
-                files_to_process.append(str(filepath))
-        
-        else:
-            return jsonify({
-                'error': 'No files provided',
-                'message': 'Upload files using multipart/form-data or provide JSON with file content'
-            }), 400
+        if _wants_async():
+            return _submit_job('upload-report', _process_report_files, files, patient_id)
         
-        if not files_to_process:
-            return jsonify({
-                'error': 'No valid files to process',
-                'message': f'Supported formats: {", ".join(ALLOWED_EXTENSIONS)}'
-            }), 400
-        
-        # Process the reports
-        processed_data = report_processor.process_multiple_reports(files_to_process)
-        
-        if not processed_data or 'aggregated_data' not in processed_data:
+        try:
+            return jsonify(_process_report_files(files, patient_id))
+        except ValueError as e:
             return jsonify({
                 'error': 'Failed to process reports',
-                'message': 'Could not extract medical data from uploaded files'
+                'message': str(e)
             }), 400
         
-        # Generate patient profile
-        patient_profile = report_processor.generate_patient_profile(processed_data['aggregated_data'])
-        
-        # Clean up uploaded files
-        for filepath in files_to_process:
-            try:
-                os.remove(filepath)
-            except:
-                pass
-        
-        return jsonify({
-            'status': 'success',
-            'files_processed': len(files_to_process),
-            'extracted_data': processed_data['aggregated_data'],
-            'patient_profile': patient_profile,
-            'processing_timestamp': datetime.now().isoformat(),
-            'message': 'Reports processed successfully. Use patient_profile data for risk assessment.'
-        })
-        
     except Exception as e:
         return jsonify({
             'error': 'Report processing failed',
@@ -440,51 +585,37 @@ def full_assessment():
     """
     Complete workflow: upload reports, extract data, and assess risk
     
-    Can accept either file uploads or JSON data with patient information
+    Can accept either file uploads or JSON data with patient information.
+    With ``?async=true`` the workflow runs on a background job and the
+    response is ``202`` with a job id to poll at ``/api/jobs/<job_id>``.
     """
     try:
-        patient_id = request.form.get('patient_id') or request.json.get('patient_id') if request.is_json else None
-        
-        # First, try to process reports if files are provided
-        patient_profile = None
+        data = request.get_json(silent=True) if request.is_json else None
+        patient_id = request.form.get('patient_id') or (data or {}).get('patient_id')
         
-        if 'files' in request.files or (request.is_json and 'files' in request.get_json()):
-            # Process reports first
-            report_response = upload_and_process_report()
-            if report_response[1] != 200:  # If report processing failed
-                return report_response
-            
-            report_data = json.loads(report_response[0].data)
-            patient_profile = report_data['patient_profile']
-        
-        # If no files, try to get patient data directly from JSON
-        elif request.is_json:
-            data = request.get_json()
-            patient_profile = data.get('patient_data', {})
+        files = None
+        if 'files' in request.files or (data and 'files' in data):
+            files, error_response = _read_uploaded_files()
+            if error_response:
+                return error_response
         
-        if not patient_profile:
+        patient_data = (data or {}).get('patient_data', {})
+        if not files and not patient_data:
             return jsonify({
                 'error': 'No patient data available',
                 'message': 'Provide either files for processing or patient_data in JSON'
             }), 400
         
-        # Now assess risk using the patient profile
-        assessment_data = {
-            'patient_id': patient_id or f'FULL_ASSESS_{datetime.now().strftime("%Y%m%d_%H%M%S")}',
-            'patient_data': patient_profile
-        }
-        
-        # Temporarily set request data for assessment
-        original_json = request.get_json
-        request.get_json = lambda: assessment_data
+        if _wants_async():
+            return _submit_job('full-assessment', _run_full_assessment, patient_id, files, patient_data)
         
-        # Call risk assessment
-        assessment_response = assess_patient_risk()
-        
-        # Restore original method
-        request.get_json = original_json
-        
-        return assessment_response
+        try:
+            return jsonify(_run_full_assessment(patient_id, files, patient_data))
+        except ValueError as e:
+            return jsonify({
+                'error': 'Full assessment failed',
+                'message': str(e)
+            }), 400
         
     except Exception as e:
         return jsonify({
@@ -492,28 +623,70 @@ def full_assessment():
             'message': str(e)
         }), 500
 
-def _map_patient_to_disease_features(patient_profile: Dict, disease: str) -> Dict:
-    """Map patient profile to disease-specific features"""
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status of a background job, with its result once it has succeeded"""
+    job = job_store.get(job_id) if job_store else None
+    if not job:
+        return jsonify({
+            'error': 'Job not found',
+            'message': f'No job with id {job_id}'
+        }), 404
+    
+    return jsonify(job)
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def stream_job_events(job_id):
+    """Server-sent events stream of a job's status until it finishes"""
+    if not job_store or not job_store.get(job_id):
+        return jsonify({
+            'error': 'Job not found',
+            'message': f'No job with id {job_id}'
+        }), 404
+    
+    def events():
+        last_status = None
+        while True:
+            job = job_store.get(job_id)
+            if job is None:
+                break
+            if job['status'] != last_status:
+                last_status = job['status']
+                yield f"event: {last_status}\ndata: {json.dumps(job, default=str)}\n\n"
+            if last_status in TERMINAL_STATUSES:
+                break
+            time.sleep(JOB_POLL_INTERVAL)
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream')
+
+def _map_patient_to_all_disease_features(patient_profile: Dict, diseases: List[str]) -> Dict[str, Dict]:
+    """Map patient profile to the features of several diseases in one pass"""
+    
+    # Lookups shared across disease feature sets
+    age = patient_profile.get('age', 30)
+    systolic = patient_profile.get('blood_pressure_systolic', patient_profile.get('systolic', 120))
+    glucose = patient_profile.get('glucose', 100)
+    bmi = patient_profile.get('bmi', 25)
     
     # Common feature mappings for different diseases
     feature_maps = {
         'diabetes': {
             'pregnancies': patient_profile.get('pregnancies', 0),
             'glucose': patient_profile.get('glucose', patient_profile.get('fasting_glucose', 100)),
-            'blood_pressure': patient_profile.get('blood_pressure_systolic', patient_profile.get('systolic', 120)),
+            'blood_pressure': systolic,
             'skin_thickness': patient_profile.get('skin_thickness', 20),
             'insulin': patient_profile.get('insulin', 100),
-            'bmi': patient_profile.get('bmi', 25),
+            'bmi': bmi,
             'diabetes_pedigree': patient_profile.get('diabetes_pedigree', 0.5),
-            'age': patient_profile.get('age', 30)
+            'age': age
         },
         'heart_disease': {
-            'age': patient_profile.get('age', 30),
-            'sex': 1 if patient_profile.get('gender', '').lower() in ['male', 'm', '1'] else 0,
+            'age': age,
+            'sex': 1 if str(patient_profile.get('gender', '')).lower() in ['male', 'm', '1'] else 0,
             'cp': patient_profile.get('chest_pain_type', patient_profile.get('cp', 0)),
-            'trestbps': patient_profile.get('blood_pressure_systolic', patient_profile.get('systolic', 120)),
+            'trestbps': systolic,
             'chol': patient_profile.get('cholesterol', 200),
-            'fbs': 1 if patient_profile.get('glucose', 100) > 120 else 0,
+            'fbs': 1 if glucose > 120 else 0,
             'restecg': patient_profile.get('rest_ecg', 0),
             'thalach': patient_profile.get('max_heart_rate', 150),
             'exang': patient_profile.get('exercise_angina', 0),
@@ -523,16 +696,47 @@ def _map_patient_to_disease_features(patient_profile: Dict, disease: str) -> Dic
             'thal': patient_profile.get('thal', 2)
         },
         'stroke': {
-            'age': patient_profile.get('age', 30),
+            'age': age,
             'hypertension': 1 if patient_profile.get('blood_pressure_systolic', 120) > 140 else 0,
             'heart_disease': patient_profile.get('heart_disease', 0),
-            'avg_glucose_level': patient_profile.get('glucose', 100),
-            'bmi': patient_profile.get('bmi', 25),
+            'avg_glucose_level': glucose,
+            'bmi': bmi,
             'smoking_status': patient_profile.get('smoking_status', 0)
         }
     }
     
-    return feature_maps.get(disease, patient_profile)
+    return {disease: feature_maps.get(disease, patient_profile) for disease in diseases}
+
+def _assess_profiles_batch(predictor, patient_profiles: List[Dict], diseases: List[str]):
+    """
+    Assess many patient profiles with one vectorized predict per disease
+    
+    Returns a list of per-patient risk assessment dicts and a parallel list of
+    error messages (None where the patient's data could be mapped).
+    """
+    assessments = [{} for _ in patient_profiles]
+    errors = [None] * len(patient_profiles)
+    
+    available = predictor.available_diseases()
+    diseases = [disease for disease in diseases if disease in available]
+    
+    # Map each patient once for every requested disease
+    mapped_profiles = []
+    for index, patient_profile in enumerate(patient_profiles):
+        try:
+            mapped_profiles.append(_map_patient_to_all_disease_features(patient_profile, diseases))
+        except Exception as e:
+            errors[index] = str(e)
+            mapped_profiles.append({})
+    
+    for disease in diseases:
+        disease_records = [mapped.get(disease, {}) for mapped in mapped_profiles]
+        risk_results = predictor.predict_risk_scores_records(disease_records, disease)
+        for index, risk_result in enumerate(risk_results):
+            if risk_result:
+                assessments[index][disease] = risk_result
+    
+    return assessments, errors
 
 def _generate_recommendations(risk_assessments: Dict) -> Dict:
     """Generate recommendations based on risk assessments"""
@@ -618,6 +822,12 @@ if __name__ == '__main__':
         print("  POST /api/assess-batch     - Assess multiple patients")
         print("  POST /api/upload-report    - Upload and process reports")
         print("  POST /api/full-assessment  - Complete workflow")
+        print("  POST /api/admin/reload-models - Hot-reload changed models")
+        print("  GET  /api/jobs/<job_id>    - Background job status (?async=true uploads)")
+        print("  GET  /api/jobs/<job_id>/events - Job status event stream")
+        
+        if MODEL_WATCH_INTERVAL > 0:
+            registry.start_watching(MODEL_WATCH_INTERVAL)
         print("\n🌐 Starting API server...")
         print("   Local:    http://localhost:5000")
         print("   Network:  http://0.0.0.0:5000")
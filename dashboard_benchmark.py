@@ -0,0 +1,351 @@
+"""
+Dashboard Query Benchmark
+=========================
+
+Measures dashboard query latency on a database with millions of synthetic
+health logs, before and after the indexes and rollup tables from
+``dashboard_migrations``.
+
+- Users, health logs (a year of readings spread over the log types the
+  dashboard knows), risk assessments and nudge history are bulk loaded into
+  a scratch database at schema version 1, the tables only.
+- "before" times the dashboard's original queries on that schema; after
+  migrating to the latest version, "after" times
+  ``HealthDashboard.load_user_dashboard_data`` and "cached" the same users
+  again through the payload cache. The result has the p50/p95/mean latency
+  of each, the speedup, the migration time and the query plans of the
+  health log queries both ways.
+- ``long_range_trends`` compares trend summaries over 90 and 365 days
+  computed from the (indexed) raw logs and from the rollups.
+
+With ``--ingest`` it measures ``/api/log-health/bulk`` instead: readings per
+second for NDJSON batches of new readings, and for the same batches re-sent
+(all duplicates).
+
+Results are JSON:
+
+    python dashboard_benchmark.py --rows 2000000 --output dashboard.json
+    python dashboard_benchmark.py --ingest --rows 200000 --batch-size 10000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from sqlite_pool import ConnectionPool
+from dashboard_migrations import current_version, migrate
+from health_rollups import TREND_SUMMARY, trend_summary
+
+LOG_TYPES = [
+    # log type, unit, mean, spread
+    ('glucose', 'mg/dl', 110.0, 20.0),
+    ('blood_pressure_systolic', 'mmHg', 128.0, 14.0),
+    ('blood_pressure_diastolic', 'mmHg', 82.0, 9.0),
+    ('weight', 'kg', 78.0, 12.0),
+    ('steps', 'count', 7000.0, 2500.0),
+    ('sleep_hours', 'hours', 7.2, 1.0),
+    ('stress_level', 'scale_1_10', 5.0, 2.0),
+    ('sodium_intake', 'mg', 2500.0, 500.0),
+    ('water_intake', 'liters', 2.1, 0.5),
+    ('exercise_minutes', 'minutes', 35.0, 20.0),
+    ('heart_rate', 'bpm', 74.0, 9.0),
+    ('calories_burned', 'kcal', 320.0, 100.0),
+]
+DISEASES = ['diabetes', 'heart_disease', 'hypertension', 'stroke']
+CHUNK_ROWS = 100000
+
+# The dashboard's queries before the migrations, timed as the baseline
+BASELINE_QUERIES = {
+    'user': "SELECT * FROM users WHERE user_id = :user_id",
+    'recent_logs': """
+        SELECT log_type, value, unit, log_date, notes
+        FROM health_logs
+        WHERE user_id = :user_id AND log_date >= date('now', '-7 days')
+        ORDER BY log_date DESC, log_type
+    """,
+    'risk_assessments': """
+        SELECT disease, risk_score, risk_percentage, risk_category, assessment_date
+        FROM risk_assessments
+        WHERE user_id = :user_id
+        ORDER BY assessment_date DESC
+    """,
+    'health_trends': """
+        SELECT log_type, AVG(value), MIN(value), MAX(value), COUNT(*)
+        FROM health_logs
+        WHERE user_id = :user_id AND log_date >= date('now', :window)
+        GROUP BY log_type
+    """,
+}
+# The dashboard's health log queries after the migrations
+MIGRATED_QUERIES = {
+    'recent_logs': BASELINE_QUERIES['recent_logs'],
+    'health_trends': TREND_SUMMARY,
+}
+LONG_RANGE_DAYS = (90, 365)
+
+def _progress(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+def _user_id(number):
+    return f'user_{number:06d}'
+
+
+def load_synthetic_data(pool, rows, users, days=365, seed=0):
+    """Bulk load users, ``rows`` health logs over the last ``days`` days, assessments and nudges"""
+    rng = np.random.default_rng(seed)
+    today = date.today()
+    dates = [(today - timedelta(days=offset)).isoformat() for offset in range(days)]
+    user_ids = [_user_id(number) for number in range(users)]
+
+    pool.executemany(
+        "INSERT INTO users (user_id, name, age, gender) VALUES (?, ?, ?, ?)",
+        [(user_id, f'Patient {number}', int(age), gender) for number, (user_id, age, gender) in enumerate(
+            zip(user_ids, rng.integers(25, 80, users), rng.choice(['male', 'female'], users)))]
+    )
+
+    means = np.array([mean for _, _, mean, _ in LOG_TYPES])
+    spreads = np.array([spread for _, _, _, spread in LOG_TYPES])
+    loaded = 0
+    while loaded < rows:
+        count = min(CHUNK_ROWS, rows - loaded)
+        owners = rng.integers(0, users, count)
+        offsets = rng.integers(0, days, count)
+        types = rng.integers(0, len(LOG_TYPES), count)
+        values = np.maximum(0, rng.normal(means[types], spreads[types])).round(1)
+        pool.executemany(
+            """INSERT INTO health_logs (user_id, log_date, log_type, value, unit, notes)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            [(user_ids[owner], dates[offset], LOG_TYPES[kind][0], float(value), LOG_TYPES[kind][1], '')
+             for owner, offset, kind, value in zip(owners.tolist(), offsets.tolist(), types.tolist(), values.tolist())]
+        )
+        loaded += count
+        _progress(f"📥 {loaded:,}/{rows:,} health logs")
+
+    scores = rng.uniform(0.05, 0.95, (users, len(DISEASES)))
+    pool.executemany(
+        """INSERT INTO risk_assessments (user_id, disease, risk_score, risk_percentage, risk_category)
+           VALUES (?, ?, ?, ?, ?)""",
+        [(user_ids[number], disease, float(score), float(score) * 100,
+          'Low Risk' if score < 0.3 else 'Moderate Risk' if score < 0.6 else 'High Risk' if score < 0.8 else 'Very High Risk')
+         for number in range(users) for disease, score in zip(DISEASES, scores[number])]
+    )
+    pool.executemany(
+        "INSERT INTO nudge_history (user_id, nudge_type, message, clicked) VALUES (?, ?, ?, ?)",
+        [(user_ids[number], 'high_stress', 'Try a quick breathing exercise', bool(number % 3 == 0))
+         for number in range(users) for _ in range(5)]
+    )
+    return user_ids
+
+
+def _import_dashboard(workdir):
+    """dashboard_server, imported with its module-level dashboard on a scratch database"""
+    if 'dashboard_server' in sys.modules:
+        return sys.modules['dashboard_server']
+    previous = os.environ.get('DASHBOARD_DB_PATH')
+    os.environ['DASHBOARD_DB_PATH'] = str(Path(workdir) / 'dashboard_server.db')
+    try:
+        import dashboard_server
+    finally:
+        if previous is None:
+            del os.environ['DASHBOARD_DB_PATH']
+        else:
+            os.environ['DASHBOARD_DB_PATH'] = previous
+    return dashboard_server
+
+
+def query_plans(pool, queries, user_id):
+    """EXPLAIN QUERY PLAN details of the health log queries"""
+    return {
+        name: [row[3] for row in pool.query(f'EXPLAIN QUERY PLAN {sql}', {'user_id': user_id, 'window': '-30 days'})]
+        for name, sql in queries.items()
+    }
+
+
+def time_calls(function, user_ids):
+    """Latency of ``function(user_id)`` over ``user_ids``, in milliseconds"""
+    latencies = []
+    for user_id in user_ids:
+        start = time.perf_counter()
+        if function(user_id) is None:
+            raise RuntimeError(f'No result for {user_id}')
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies = np.array(latencies)
+    return {
+        'queries': len(latencies),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 3),
+        'mean_ms': round(float(latencies.mean()), 3),
+    }
+
+
+def baseline_dashboard_queries(pool, user_id):
+    """Run the dashboard's pre-migration queries for one user"""
+    params = {'user_id': user_id, 'window': '-30 days'}
+    return [pool.query(sql, params) for sql in BASELINE_QUERIES.values()]
+
+
+def raw_trends(pool, user_id, days):
+    """The 30-day trend query over raw logs, for any window"""
+    return pool.query(BASELINE_QUERIES['health_trends'], {'user_id': user_id, 'window': f'-{days} days'})
+
+
+def run_benchmark(rows=2000000, users=1000, queries=50, days=365, seed=0, workdir=None):
+    """Load the synthetic database and time the dashboard before and after the migrations"""
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        dashboard_server = _import_dashboard(tmp)
+        pool = ConnectionPool(Path(tmp) / 'benchmark.db')
+        conn = pool.connection()
+        migrate(conn, target=1)
+
+        start = time.perf_counter()
+        user_ids = load_synthetic_data(pool, rows, users, days, seed)
+        load_seconds = time.perf_counter() - start
+        _progress(f"✅ Loaded {rows:,} health logs in {load_seconds:.1f}s")
+
+        sample = list(np.random.default_rng(seed + 1).choice(user_ids, min(queries, users), replace=False))
+        plans_before = query_plans(pool, BASELINE_QUERIES, sample[0])
+        _progress(f"⏱️ Timing {len(sample)} dashboards without indexes or rollups")
+        before = time_calls(lambda user_id: baseline_dashboard_queries(pool, user_id), sample)
+
+        start = time.perf_counter()
+        migrate(pool.connection())
+        migration_seconds = time.perf_counter() - start
+        _progress(f"✅ Indexes and rollups built in {migration_seconds:.1f}s")
+
+        dashboard = dashboard_server.HealthDashboard(pool=pool)
+        plans_after = query_plans(pool, MIGRATED_QUERIES, sample[0])
+        _progress(f"⏱️ Timing {len(sample)} dashboards with indexes and rollups")
+        after = time_calls(dashboard.load_user_dashboard_data, sample)
+
+        # Repeat visits served from the payload cache
+        for user_id in sample:
+            dashboard.get_user_dashboard_data(user_id)
+        cached = time_calls(dashboard.get_user_dashboard_data, sample)
+
+        # Trend windows for long-range charts: indexed raw logs vs rollups
+        long_range = {}
+        for window in LONG_RANGE_DAYS:
+            cursor = pool.connection().cursor()
+            long_range[f'{window}_days'] = {
+                'raw_logs': time_calls(lambda user_id: raw_trends(pool, user_id, window), sample),
+                'rollups': time_calls(lambda user_id: trend_summary(cursor, user_id, window), sample),
+            }
+
+        page_count = pool.query_one('PRAGMA page_count')[0]
+        page_size = pool.query_one('PRAGMA page_size')[0]
+        results = {
+            'rows': rows,
+            'users': users,
+            'days': days,
+            'seed': seed,
+            'schema_version': current_version(pool.connection()),
+            'load_seconds': round(load_seconds, 3),
+            'load_rows_per_sec': round(rows / load_seconds, 1) if load_seconds else None,
+            'migration_seconds': round(migration_seconds, 3),
+            'database_mb': round(page_count * page_size / 1e6, 1),
+            'before': dict(before, plans=plans_before),
+            'after': dict(after, plans=plans_after),
+            'speedup_p50': round(before['p50_ms'] / after['p50_ms'], 1) if after['p50_ms'] else None,
+            'cached': dict(cached, cache=dashboard.cache.stats()),
+            'long_range_trends': long_range,
+        }
+
+        dashboard.writer.close()
+        pool.close_all()
+    return results
+
+
+def synthetic_readings(count, users, seed=0):
+    """``count`` minute-level device readings as NDJSON lines, spread over ``users`` users"""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64(date.today() - timedelta(days=7), 's')
+    numbers = np.arange(count)
+    types = numbers // users % len(LOG_TYPES)
+    means = np.array([mean for _, _, mean, _ in LOG_TYPES])
+    spreads = np.array([spread for _, _, _, spread in LOG_TYPES])
+    values = np.maximum(0, rng.normal(means[types], spreads[types])).round(1)
+    # One reading per user and type per minute, so only re-sent readings are duplicates
+    minutes = numbers // (users * len(LOG_TYPES))
+    timestamps = np.datetime_as_string(start + minutes * 60 + rng.integers(0, 60, count), unit='s')
+    return [
+        json.dumps({'user_id': _user_id(number % users), 'log_type': LOG_TYPES[kind][0], 'value': value,
+                    'timestamp': timestamp + 'Z', 'unit': LOG_TYPES[kind][1]})
+        for number, kind, value, timestamp in zip(numbers.tolist(), types.tolist(), values.tolist(), timestamps.tolist())
+    ]
+
+
+def run_ingest_benchmark(readings=200000, batch_size=10000, users=100, seed=0, workdir=None):
+    """Throughput of ``/api/log-health/bulk`` for new readings and for the same readings re-sent"""
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        dashboard_server = _import_dashboard(tmp)
+        pool = ConnectionPool(Path(tmp) / 'ingest.db')
+        migrate(pool.connection())
+        load_synthetic_data(pool, 0, users, seed=seed)
+        dashboard = dashboard_server.HealthDashboard(pool=pool)
+        lines = synthetic_readings(readings, users, seed)
+        bodies = ['\n'.join(lines[start:start + batch_size]) for start in range(0, readings, batch_size)]
+
+        # The route serves the module-level dashboard; point it at the benchmark database
+        previous, dashboard_server.dashboard = dashboard_server.dashboard, dashboard
+        client = dashboard_server.app.test_client()
+        results = {'readings': readings, 'batch_size': batch_size, 'users': users, 'seed': seed}
+        try:
+            for phase in ('new', 'resent'):
+                totals = {'inserted': 0, 'duplicates': 0, 'rejected': 0}
+                start = time.perf_counter()
+                for body in bodies:
+                    response = client.post('/api/log-health/bulk', data=body, content_type='application/x-ndjson')
+                    if response.status_code != 200:
+                        raise RuntimeError(f'Bulk ingest failed: {response.get_json()}')
+                    for key in totals:
+                        totals[key] += response.get_json()[key]
+                seconds = time.perf_counter() - start
+                results[phase] = dict(totals, seconds=round(seconds, 3),
+                                      readings_per_sec=round(readings / seconds, 1) if seconds else None)
+                _progress(f"📥 {phase}: {readings / seconds:,.0f} readings/sec")
+        finally:
+            dashboard_server.dashboard = previous
+
+        dashboard.writer.close()
+        pool.close_all()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dashboard queries before and after the schema migrations')
+    parser.add_argument('--rows', type=int, default=2000000, help='Synthetic health logs to load')
+    parser.add_argument('--users', type=int, default=1000, help='Users the logs are spread over')
+    parser.add_argument('--queries', type=int, default=50, help='Dashboards timed before and after')
+    parser.add_argument('--days', type=int, default=365, help='Days of history the logs are spread over')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the synthetic data')
+    parser.add_argument('--workdir', help='Directory for the scratch database (default: system temp)')
+    parser.add_argument('--ingest', action='store_true',
+                        help='Benchmark the bulk ingest endpoint instead (--rows readings in --batch-size requests)')
+    parser.add_argument('--batch-size', type=int, default=10000, help='Readings per bulk ingest request')
+    parser.add_argument('--output', help='Write the JSON results to this file (default: stdout)')
+    args = parser.parse_args()
+
+    if args.ingest:
+        results = run_ingest_benchmark(args.rows, args.batch_size, args.users, args.seed, args.workdir)
+    else:
+        results = run_benchmark(args.rows, args.users, args.queries, args.days, args.seed, args.workdir)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+        print(f"💾 Results saved to: {args.output}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Dashboard Payload Cache
+=======================
+
+In-memory cache of per-user dashboard payloads, so a dashboard polled every
+minute is rebuilt only when something changed.
+
+- Entries expire after ``ttl`` seconds and the cache holds at most
+  ``max_entries`` users, evicting the least recently used.
+- Writes invalidate the affected users once they are committed (health
+  logs, bulk ingests, risk assessments, nudge clicks), so the next request
+  rebuilds the payload from the database.
+- A payload loaded while an invalidation happened is returned but not
+  stored, so a slow load cannot put back data from before a write.
+
+The cache is per process; with several server processes a write made in one
+is seen by the others within ``ttl`` seconds. Cached payloads are shared
+between requests and must not be modified.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class DashboardCache:
+    """Thread-safe TTL + LRU cache of dashboard payloads keyed by user_id"""
+
+    def __init__(self, max_entries=1024, ttl=300, clock=time.monotonic):
+        """
+        Args:
+            max_entries: Users kept before the least recently used is evicted
+            ttl: Seconds a payload is served before it is rebuilt
+            clock: Time source in seconds (for tests)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every invalidation; loads that straddle one are not stored
+        self._writes = 0
+
+    def get(self, user_id):
+        """The cached payload for a user, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > self.clock():
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+
+    def put(self, user_id, payload):
+        """Cache a payload, evicting the least recently used users over ``max_entries``"""
+        with self._lock:
+            self._store(user_id, payload)
+
+    def _store(self, user_id, payload):
+        self._entries[user_id] = (self.clock() + self.ttl, payload)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_load(self, user_id, loader):
+        """The cached payload, or ``loader(user_id)`` stored for next time (None is not cached)"""
+        payload = self.get(user_id)
+        if payload is not None:
+            return payload
+
+        with self._lock:
+            writes = self._writes
+        payload = loader(user_id)
+        if payload is not None:
+            with self._lock:
+                if self._writes == writes:
+                    self._store(user_id, payload)
+        return payload
+
+    def invalidate(self, *user_ids):
+        """Drop the given users' payloads after a write; returns how many were cached"""
+        with self._lock:
+            self._writes += 1
+            dropped = sum(self._entries.pop(user_id, None) is not None for user_id in user_ids)
+            self.invalidations += dropped
+            return dropped
+
+    def clear(self):
+        """Drop every cached payload"""
+        with self._lock:
+            self._writes += 1
+            self._entries.clear()
+
+    def stats(self):
+        """Entry count, limits and hit/miss/eviction/invalidation counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
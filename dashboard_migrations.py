@@ -0,0 +1,269 @@
+"""
+Dashboard Schema Migrations
+===========================
+
+Versioned, ordered changes to the dashboard database. Each migration has a
+version, a name, the statements that apply it and (where it can be undone)
+the statements that revert it. Applied versions are recorded in
+``schema_migrations``; ``migrate`` runs whatever is pending, each migration
+in its own explicit transaction (DDL included, so a migration that fails
+halfway leaves nothing behind and is simply retried), so an existing
+``health_dashboard.db`` is brought up to date in place the next time the
+dashboard starts.
+
+To change the schema, append a migration - never edit one that has shipped.
+"""
+
+import sqlite3
+from typing import List, Optional
+
+MIGRATIONS = [
+    {
+        'version': 1,
+        'name': 'initial schema',
+        # IF NOT EXISTS, so databases created before migrations adopt it as is
+        'up': [
+            '''
+            CREATE TABLE IF NOT EXISTS users (
+                user_id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                age INTEGER,
+                gender TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS health_logs (
+                log_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT,
+                log_date DATE,
+                log_type TEXT,
+                value REAL,
+                unit TEXT,
+                notes TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (user_id)
+            )
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS risk_assessments (
+                assessment_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT,
+                disease TEXT,
+                risk_score REAL,
+                risk_percentage REAL,
+                risk_category TEXT,
+                assessment_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (user_id)
+            )
+            ''',
+            '''
+            CREATE TABLE IF NOT EXISTS nudge_history (
+                nudge_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT,
+                nudge_type TEXT,
+                message TEXT,
+                context TEXT,
+                shown_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                clicked BOOLEAN DEFAULT FALSE,
+                FOREIGN KEY (user_id) REFERENCES users (user_id)
+            )
+            ''',
+        ],
+        'down': None,
+    },
+    {
+        'version': 2,
+        'name': 'dashboard query indexes',
+        'up': [
+            # Recent logs and 30-day trends: one range of the index per user and
+            # window; with value included the trends never touch the table
+            'CREATE INDEX IF NOT EXISTS idx_health_logs_user_date_type '
+            'ON health_logs (user_id, log_date, log_type, value)',
+            # Latest assessments per user, newest first
+            'CREATE INDEX IF NOT EXISTS idx_risk_assessments_user_date '
+            'ON risk_assessments (user_id, assessment_date)',
+            'CREATE INDEX IF NOT EXISTS idx_nudge_history_user_shown '
+            'ON nudge_history (user_id, shown_at)',
+            # Planner statistics for the new indexes
+            'ANALYZE',
+        ],
+        'down': [
+            'DROP INDEX IF EXISTS idx_health_logs_user_date_type',
+            'DROP INDEX IF EXISTS idx_risk_assessments_user_date',
+            'DROP INDEX IF EXISTS idx_nudge_history_user_shown',
+        ],
+    },
+    {
+        'version': 3,
+        'name': 'health log reading timestamps',
+        'up': [
+            # When a device took the reading (bulk ingest); NULL for manual logs
+            'ALTER TABLE health_logs ADD COLUMN recorded_at TIMESTAMP',
+            # One reading per user, type and instant; re-sent readings are ignored
+            'CREATE UNIQUE INDEX IF NOT EXISTS idx_health_logs_reading '
+            'ON health_logs (user_id, log_type, recorded_at) WHERE recorded_at IS NOT NULL',
+        ],
+        'down': [
+            'DROP INDEX IF EXISTS idx_health_logs_reading',
+            'ALTER TABLE health_logs DROP COLUMN recorded_at',
+        ],
+    },
+    {
+        'version': 4,
+        'name': 'daily and weekly health log rollups',
+        'up': [
+            # Per user, day and log type; readings counts rows, value_count the
+            # non-NULL values that total, min_value and max_value cover
+            '''
+            CREATE TABLE health_log_daily (
+                user_id TEXT NOT NULL,
+                log_date DATE NOT NULL,
+                log_type TEXT NOT NULL,
+                readings INTEGER NOT NULL,
+                value_count INTEGER NOT NULL,
+                total REAL NOT NULL,
+                min_value REAL,
+                max_value REAL,
+                PRIMARY KEY (user_id, log_date, log_type)
+            ) WITHOUT ROWID
+            ''',
+            # The same per week, starting on Monday
+            '''
+            CREATE TABLE health_log_weekly (
+                user_id TEXT NOT NULL,
+                week_start DATE NOT NULL,
+                log_type TEXT NOT NULL,
+                readings INTEGER NOT NULL,
+                value_count INTEGER NOT NULL,
+                total REAL NOT NULL,
+                min_value REAL,
+                max_value REAL,
+                PRIMARY KEY (user_id, week_start, log_type)
+            ) WITHOUT ROWID
+            ''',
+            # Backfill from the logs already stored. Days are date(log_date), so
+            # '2024-03-01T10:00:00' and '2024-03-01' are the same day; logs whose
+            # date SQLite cannot read (such as '03/01/2024') stay out of the rollups
+            '''
+            INSERT INTO health_log_daily
+            SELECT user_id, date(log_date), log_type, COUNT(*), COUNT(value), COALESCE(SUM(value), 0), MIN(value), MAX(value)
+            FROM health_logs
+            WHERE user_id IS NOT NULL AND date(log_date) IS NOT NULL AND log_type IS NOT NULL
+            GROUP BY 1, 2, 3
+            ''',
+            '''
+            INSERT INTO health_log_weekly
+            SELECT user_id, date(log_date, '-6 days', 'weekday 1'), log_type,
+                   SUM(readings), SUM(value_count), SUM(total), MIN(min_value), MAX(max_value)
+            FROM health_log_daily
+            GROUP BY 1, 2, 3
+            ''',
+            # Kept current on insert. Device readings (recorded_at set) come in
+            # through the bulk ingest, which rolls up each batch in one statement
+            '''
+            CREATE TRIGGER health_logs_rollup AFTER INSERT ON health_logs
+            WHEN NEW.recorded_at IS NULL
+             AND NEW.user_id IS NOT NULL AND date(NEW.log_date) IS NOT NULL AND NEW.log_type IS NOT NULL
+            BEGIN
+                INSERT INTO health_log_daily
+                VALUES (NEW.user_id, date(NEW.log_date), NEW.log_type, 1, NEW.value IS NOT NULL,
+                        COALESCE(NEW.value, 0), NEW.value, NEW.value)
+                ON CONFLICT DO UPDATE SET
+                    readings = readings + 1,
+                    value_count = value_count + excluded.value_count,
+                    total = total + excluded.total,
+                    min_value = COALESCE(MIN(min_value, excluded.min_value), min_value, excluded.min_value),
+                    max_value = COALESCE(MAX(max_value, excluded.max_value), max_value, excluded.max_value);
+                INSERT INTO health_log_weekly
+                VALUES (NEW.user_id, date(NEW.log_date, '-6 days', 'weekday 1'), NEW.log_type, 1,
+                        NEW.value IS NOT NULL, COALESCE(NEW.value, 0), NEW.value, NEW.value)
+                ON CONFLICT DO UPDATE SET
+                    readings = readings + 1,
+                    value_count = value_count + excluded.value_count,
+                    total = total + excluded.total,
+                    min_value = COALESCE(MIN(min_value, excluded.min_value), min_value, excluded.min_value),
+                    max_value = COALESCE(MAX(max_value, excluded.max_value), max_value, excluded.max_value);
+            END
+            ''',
+        ],
+        'down': [
+            'DROP TRIGGER IF EXISTS health_logs_rollup',
+            'DROP TABLE IF EXISTS health_log_weekly',
+            'DROP TABLE IF EXISTS health_log_daily',
+        ],
+    },
+]
+
+LATEST_VERSION = MIGRATIONS[-1]['version']
+
+
+def _ensure_version_table(conn: sqlite3.Connection):
+    with conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    """Highest applied migration version (0 for a new database)"""
+    _ensure_version_table(conn)
+    return conn.execute('SELECT COALESCE(MAX(version), 0) FROM schema_migrations').fetchone()[0]
+
+
+def _run_in_transaction(conn: sqlite3.Connection, statements: list):
+    """Run statements (SQL or ``(sql, params)``) in one transaction, rolled back on any error"""
+    # sqlite3 commits DDL on its own unless the transaction is begun explicitly
+    conn.commit()
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None
+    try:
+        conn.execute('BEGIN')
+        try:
+            for statement in statements:
+                sql, params = statement if isinstance(statement, tuple) else (statement, ())
+                conn.execute(sql, params)
+            conn.execute('COMMIT')
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+    finally:
+        conn.isolation_level = isolation_level
+
+
+def migrate(conn: sqlite3.Connection, target: Optional[int] = None) -> List[str]:
+    """
+    Bring the database to migration ``target`` (default: the latest)
+
+    Migrations newer than the database are applied in order; going back to an
+    older ``target`` reverts the newer ones, newest first. Returns a line per
+    migration applied or reverted. Raises ValueError for a target that cannot
+    be reached (a migration without down statements). A migration that fails
+    is rolled back whole and its error raised; the migrations before it stay
+    applied, and the next ``migrate`` retries from there.
+    """
+    target = LATEST_VERSION if target is None else target
+    version = current_version(conn)
+    changes = []
+
+    for migration in MIGRATIONS:
+        if version < migration['version'] <= target:
+            _run_in_transaction(conn, migration['up'] + [
+                ('INSERT INTO schema_migrations (version, name) VALUES (?, ?)',
+                 (migration['version'], migration['name']))])
+            changes.append(f"applied {migration['version']}: {migration['name']}")
+
+    for migration in reversed(MIGRATIONS):
+        if target < migration['version'] <= version:
+            if migration['down'] is None:
+                raise ValueError(f"Migration {migration['version']} ({migration['name']}) cannot be reverted")
+            _run_in_transaction(conn, migration['down'] + [
+                ('DELETE FROM schema_migrations WHERE version = ?', (migration['version'],))])
+            changes.append(f"reverted {migration['version']}: {migration['name']}")
+
+    return changes
@@ -16,7 +16,6 @@ Features:
 
 import os
 import json
-import sqlite3
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Any
@@ -26,95 +25,54 @@ from flask import Flask, render_template, jsonify, request, redirect, url_for
 from flask_cors import CORS
 import requests
 
+from sqlite_pool import BatchWriter, ConnectionPool
+from dashboard_migrations import migrate
+from health_log_ingest import DEDUPE_KEY, MAX_READINGS, IngestError, parse_readings, validate_readings
+from health_rollups import GRANULARITIES, roll_up_logs, trend_series, trend_summary
+from dashboard_cache import DashboardCache
+
 # Initialize Flask app
 app = Flask(__name__, template_folder='templates', static_folder='static')
 CORS(app)
 
 # Configuration
-DATABASE_PATH = Path('health_dashboard.db')
+DATABASE_PATH = Path(os.environ.get('DASHBOARD_DB_PATH', 'health_dashboard.db'))
+CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', 300))  # Seconds; the page polls every 60
+CACHE_SIZE = int(os.environ.get('DASHBOARD_CACHE_SIZE', 1024))  # Users
 API_BASE_URL = "http://localhost:5000/api"
 
 class HealthDashboard:
     """Smart Health Dashboard with Context-Aware Nudges"""
     
-    def __init__(self):
+    def __init__(self, pool: Optional[ConnectionPool] = None, cache: Optional[DashboardCache] = None):
+        # Pooled per-thread connections; writes from request threads are
+        # committed in batches by one writer thread
+        self.db = pool or ConnectionPool(DATABASE_PATH)
+        self.writer = BatchWriter(self.db)
+        # Dashboard payloads per user, dropped whenever that user's data changes
+        self.cache = cache or DashboardCache(CACHE_SIZE, CACHE_TTL)
         self.init_database()
         self.nudge_engine = NudgeEngine()
+        # Request threads take over the connection from here
+        self.db.release()
         
     def init_database(self):
         """Initialize SQLite database for health logs and user data"""
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        
-        # Users table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                user_id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                age INTEGER,
-                gender TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Health logs table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS health_logs (
-                log_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT,
-                log_date DATE,
-                log_type TEXT,
-                value REAL,
-                unit TEXT,
-                notes TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (user_id)
-            )
-        ''')
-        
-        # Risk assessments table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS risk_assessments (
-                assessment_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT,
-                disease TEXT,
-                risk_score REAL,
-                risk_percentage REAL,
-                risk_category TEXT,
-                assessment_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (user_id)
-            )
-        ''')
-        
-        # Nudges history table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS nudge_history (
-                nudge_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT,
-                nudge_type TEXT,
-                message TEXT,
-                context TEXT,
-                shown_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                clicked BOOLEAN DEFAULT FALSE,
-                FOREIGN KEY (user_id) REFERENCES users (user_id)
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        # Create or upgrade the schema (see dashboard_migrations.py)
+        migrate(self.db.connection())
         
         # Insert sample data if database is empty
         self.insert_sample_data()
     
     def insert_sample_data(self):
         """Insert sample users and health data for demonstration"""
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        
+        with self.db.transaction() as conn:
+            self._insert_sample_rows(conn.cursor())
+    
+    def _insert_sample_rows(self, cursor):
         # Check if data exists
         cursor.execute("SELECT COUNT(*) FROM users")
         if cursor.fetchone()[0] > 0:
-            conn.close()
             return
         
         # Sample users
@@ -163,15 +121,7 @@ class HealthDashboard:
             for disease in random.sample(diseases, 3):  # 3 random diseases per user
                 risk_score = random.uniform(0.1, 0.8)
                 risk_percentage = risk_score * 100
-                
-                if risk_percentage < 30:
-                    risk_category = "Low Risk"
-                elif risk_percentage < 60:
-                    risk_category = "Moderate Risk"
-                elif risk_percentage < 80:
-                    risk_category = "High Risk"
-                else:
-                    risk_category = "Very High Risk"
+                risk_category = self.risk_category(risk_percentage)
                 
                 cursor.execute(
                     """INSERT INTO risk_assessments 
@@ -179,9 +129,17 @@ class HealthDashboard:
                        VALUES (?, ?, ?, ?, ?)""",
                     (user_id, disease, risk_score, risk_percentage, risk_category)
                 )
-        
-        conn.commit()
-        conn.close()
+    
+    @staticmethod
+    def risk_category(risk_percentage: float) -> str:
+        """Risk category label for a risk percentage"""
+        if risk_percentage < 30:
+            return "Low Risk"
+        elif risk_percentage < 60:
+            return "Moderate Risk"
+        elif risk_percentage < 80:
+            return "High Risk"
+        return "Very High Risk"
     
     def generate_realistic_value(self, log_type: str, age: int, gender: str, days_ago: int) -> float:
         """Generate realistic health values based on user profile"""
@@ -209,16 +167,18 @@ class HealthDashboard:
         return max(0, base + trend + variation)
     
     def get_user_dashboard_data(self, user_id: str) -> Dict[str, Any]:
-        """Get comprehensive dashboard data for a user"""
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
+        """Get comprehensive dashboard data for a user, from the cache when unchanged"""
+        return self.cache.get_or_load(user_id, self.load_user_dashboard_data)
+    
+    def load_user_dashboard_data(self, user_id: str) -> Dict[str, Any]:
+        """Build a user's dashboard data from the database"""
+        cursor = self.db.connection().cursor()
         
         # User info
         cursor.execute("SELECT * FROM users WHERE user_id = ?", (user_id,))
         user = cursor.fetchone()
         
         if not user:
-            conn.close()
             return None
         
         # Recent health logs (last 7 days)
@@ -239,17 +199,8 @@ class HealthDashboard:
         """, (user_id,))
         risk_assessments = cursor.fetchall()
         
-        # Health trends (last 30 days)
-        cursor.execute("""
-            SELECT log_type, AVG(value) as avg_value, MIN(value) as min_value, 
-                   MAX(value) as max_value, COUNT(*) as count
-            FROM health_logs 
-            WHERE user_id = ? AND log_date >= date('now', '-30 days')
-            GROUP BY log_type
-        """, (user_id,))
-        trends = cursor.fetchall()
-        
-        conn.close()
+        # Health trends (last 30 days), from the daily/weekly rollups
+        trends = trend_summary(cursor, user_id, days=30)
         
         # Process data
         user_data = {
@@ -306,16 +257,88 @@ class HealthDashboard:
     
     def log_nudge_interaction(self, user_id: str, nudge_type: str, message: str, clicked: bool = False):
         """Log nudge interactions for analytics"""
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
+        self.writer.execute("""
             INSERT INTO nudge_history (user_id, nudge_type, message, clicked)
             VALUES (?, ?, ?, ?)
         """, (user_id, nudge_type, message, clicked))
+        # Fresh nudges on the next load
+        self.cache.invalidate(user_id)
+    
+    def log_health(self, user_id: str, log_date, log_type: str, value, unit: str, notes: str = '') -> int:
+        """Record one health reading; returns its log_id once committed"""
+        log_id = self.writer.execute("""
+            INSERT INTO health_logs (user_id, log_date, log_type, value, unit, notes)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (user_id, log_date, log_type, value, unit, notes))
+        self.cache.invalidate(user_id)
+        return log_id
+    
+    def log_risk_assessment(self, user_id: str, disease: str, risk_percentage: float) -> int:
+        """Record a new risk assessment; returns its assessment_id once committed"""
+        assessment_id = self.writer.execute("""
+            INSERT INTO risk_assessments (user_id, disease, risk_score, risk_percentage, risk_category)
+            VALUES (?, ?, ?, ?, ?)
+        """, (user_id, disease, risk_percentage / 100, risk_percentage, self.risk_category(risk_percentage)))
+        self.cache.invalidate(user_id)
+        return assessment_id
+    
+    def existing_users(self, user_ids: List[str]) -> List[str]:
+        """The given user_ids that have an account"""
+        rows = self.db.query(
+            "SELECT user_id FROM users WHERE user_id IN (SELECT value FROM json_each(?))",
+            (json.dumps(user_ids),)
+        )
+        return [user_id for user_id, in rows]
+    
+    def ingest_health_logs(self, readings: List) -> Dict[str, Any]:
+        """
+        Validate and store a batch of device readings in one transaction
+        
+        Readings already stored (same user, log type and timestamp) or repeated
+        within the batch are counted as duplicates and skipped. Returns the
+        counts and the per-row errors of rejected readings.
+        """
+        rows, errors = validate_readings(readings, self.existing_users)
+        # Inserting in key order keeps the index updates close together
+        unique_rows = rows.drop_duplicates(DEDUPE_KEY).sort_values(DEDUPE_KEY)
+        
+        inserted = 0
+        if len(unique_rows):
+            with self.db.transaction() as conn:
+                # Take the write lock first, so only this batch follows last_id
+                conn.execute("BEGIN IMMEDIATE")
+                last_id = conn.execute("SELECT COALESCE(MAX(log_id), 0) FROM health_logs").fetchone()[0]
+                inserted = conn.executemany("""
+                    INSERT OR IGNORE INTO health_logs
+                    (user_id, log_date, log_type, value, unit, notes, recorded_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, unique_rows.itertuples(index=False, name=None)).rowcount
+                # One grouped update of the daily/weekly rollups for the batch
+                roll_up_logs(conn, last_id)
+            if inserted:
+                self.cache.invalidate(*unique_rows['user_id'].unique())
         
-        conn.commit()
-        conn.close()
+        return {
+            'received': len(readings) - readings.count(None),
+            'inserted': inserted,
+            'duplicates': len(rows) - inserted,
+            'rejected': len(errors),
+            'errors': errors
+        }
+
+    def get_health_trend_series(self, user_id: str, days: int = 90, granularity: str = 'week') -> Dict[str, List]:
+        """Per-day or per-week averages, ranges and reading counts for charts, by log type"""
+        series = {}
+        for log_type, period, avg_val, min_val, max_val, count in trend_series(
+                self.db.connection().cursor(), user_id, days, granularity):
+            series.setdefault(log_type, []).append({
+                'period': period,
+                'average': avg_val,
+                'min': min_val,
+                'max': max_val,
+                'readings': count
+            })
+        return series
 
 class NudgeEngine:
     """AI-powered nudge generation engine"""
@@ -505,6 +528,11 @@ class NudgeEngine:
 # Initialize dashboard
 dashboard = HealthDashboard()
 
+@app.teardown_appcontext
+def release_db_connection(exception=None):
+    """Hand the request thread's database connection back to the pool"""
+    dashboard.db.release()
+
 # Routes
 @app.route('/')
 def index():
@@ -519,6 +547,36 @@ def get_dashboard_data(user_id: str):
         return jsonify({'error': 'User not found'}), 404
     return jsonify(data)
 
+@app.route('/api/trends/<user_id>')
+def get_trend_series(user_id: str):
+    """API endpoint for long-range trend charts (?days=365&granularity=week)"""
+    days = request.args.get('days', 90, type=int)
+    granularity = request.args.get('granularity', 'week')
+    if granularity not in GRANULARITIES or not 0 < days <= 3660:
+        return jsonify({'error': f"days must be 1-3660 and granularity one of {', '.join(GRANULARITIES)}"}), 400
+    return jsonify({
+        'user_id': user_id,
+        'days': days,
+        'granularity': granularity,
+        'series': dashboard.get_health_trend_series(user_id, days, granularity)
+    })
+
+@app.route('/api/risk-assessment', methods=['POST'])
+def log_risk_assessment():
+    """Endpoint to record a new risk assessment (risk_percentage 0-100)"""
+    data = request.get_json()
+    risk_percentage = data.get('risk_percentage')
+    if not data.get('user_id') or not data.get('disease') or not isinstance(risk_percentage, (int, float)):
+        return jsonify({'error': 'user_id, disease and a numeric risk_percentage are required'}), 400
+    
+    dashboard.log_risk_assessment(data['user_id'], data['disease'], float(risk_percentage))
+    return jsonify({'status': 'logged'})
+
+@app.route('/api/cache-stats')
+def get_cache_stats():
+    """Dashboard cache hit/miss counters"""
+    return jsonify(dashboard.cache.stats())
+
 @app.route('/api/nudge-click', methods=['POST'])
 def log_nudge_click():
     """Log nudge click interactions"""
@@ -533,11 +591,7 @@ def log_nudge_click():
 @app.route('/api/users')
 def get_users():
     """Get list of users for demo purposes"""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT user_id, name FROM users")
-    users = [{'user_id': uid, 'name': name} for uid, name in cursor.fetchall()]
-    conn.close()
+    users = [{'user_id': uid, 'name': name} for uid, name in dashboard.db.query("SELECT user_id, name FROM users")]
     return jsonify(users)
 
 @app.route('/api/log-health', methods=['POST'])
@@ -545,26 +599,36 @@ def log_health_data():
     """Endpoint to log new health data"""
     data = request.get_json()
     
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        INSERT INTO health_logs (user_id, log_date, log_type, value, unit, notes)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (
+    dashboard.log_health(
         data.get('user_id'),
         data.get('log_date', datetime.now().date()),
         data.get('log_type'),
         data.get('value'),
         data.get('unit'),
         data.get('notes', '')
-    ))
-    
-    conn.commit()
-    conn.close()
+    )
     
     return jsonify({'status': 'logged', 'message': 'Health data logged successfully'})
 
+@app.route('/api/log-health/bulk', methods=['POST'])
+def log_health_bulk():
+    """Endpoint to log a batch of readings sent as a JSON array or NDJSON"""
+    try:
+        readings, parse_errors = parse_readings(request.get_data())
+    except IngestError as e:
+        return jsonify({'error': str(e)}), 400
+    if not isinstance(readings, list):
+        return jsonify({'error': 'Expected a JSON array or NDJSON of readings'}), 400
+    if len(readings) > MAX_READINGS:
+        return jsonify({'error': f'At most {MAX_READINGS} readings per request'}), 413
+    
+    result = dashboard.ingest_health_logs(readings)
+    result['received'] += len(parse_errors)
+    result['rejected'] += len(parse_errors)
+    result['errors'] = sorted(parse_errors + result['errors'], key=lambda error: error['row'])
+    
+    return jsonify(dict(result, status='logged'))
+
 if __name__ == '__main__':
     print("🏥 Smart Health Dashboard with Context-Aware Nudges")
     print("=" * 60)
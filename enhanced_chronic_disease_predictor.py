@@ -4,11 +4,15 @@ import json
 from datetime import datetime
 from pathlib import Path
 import pickle
+import threading
+import time
 import warnings
 warnings.filterwarnings('ignore')
 
 # Machine Learning imports
 from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import HalvingGridSearchCV
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, VotingClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.svm import SVC
@@ -17,17 +21,125 @@ from sklearn.preprocessing import StandardScaler, LabelEncoder, MinMaxScaler
 from sklearn.metrics import accuracy_score, classification_report, roc_auc_score, confusion_matrix
 from sklearn.feature_selection import SelectKBest, f_classif
 from sklearn.impute import SimpleImputer
+from sklearn.utils import Bunch
 
-# Visualization imports
-import matplotlib.pyplot as plt
-import seaborn as sns
+from model_artifact import ARTIFACT_SUFFIX, is_artifact, load_artifact, save_artifact
 
-# Import our multi-API fetcher
-from multi_api_dataset_fetcher import MultiAPIDatasetFetcher
+class CompiledInferencePlan:
+    """
+    Precomputed single-row preprocessing for one disease model
+
+    Mirrors the imputer -> label encoder -> scaler -> SelectKBest pipeline with
+    plain dicts and NumPy arrays, so a patient dict is written straight into a
+    preallocated float64 vector without building a DataFrame.
+    """
+
+    def __init__(self, columns, numeric_fill, categorical_fill, label_maps, selected_indices, mean, scale):
+        self.columns = list(columns)
+        self.column_set = frozenset(self.columns)
+        self.numeric_fill = numeric_fill
+        self.categorical_fill = categorical_fill
+        self.label_maps = label_maps
+        self.selected_indices = selected_indices
+        self.mean = mean
+        self.scale = scale
+        self._buffers = threading.local()
+
+    @classmethod
+    def from_pipeline(cls, imputers, label_encoders, scaler, selector):
+        """Build a plan from fitted preprocessing objects, or None if unsupported"""
+        columns = getattr(scaler, 'feature_names_in_', None)
+        if columns is None:
+            return None
+        columns = list(columns)
+
+        imputers = imputers or {}
+        label_encoders = label_encoders or {}
+
+        numeric_fill = {}
+        numeric_imputer = imputers.get('numeric')
+        if numeric_imputer is not None:
+            numeric_fill = dict(zip(numeric_imputer.feature_names_in_, numeric_imputer.statistics_.astype(float)))
+
+        categorical_fill = {}
+        categorical_imputer = imputers.get('categorical')
+        if categorical_imputer is not None:
+            categorical_fill = dict(zip(categorical_imputer.feature_names_in_, categorical_imputer.statistics_))
+
+        label_maps = {
+            col: {label: code for code, label in enumerate(le.classes_)}
+            for col, le in label_encoders.items()
+        }
+
+        # Every column must be either numeric or label encoded
+        if any(col not in numeric_fill and col not in label_maps for col in columns):
+            return None
+
+        if selector is not None:
+            selected_indices = selector.get_support(indices=True)
+        else:
+            selected_indices = np.arange(len(columns))
+
+        # Fuse StandardScaler into the selected columns only
+        mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(len(columns))
+        scale = scaler.scale_ if scaler.scale_ is not None else np.ones(len(columns))
+
+        return cls(columns, numeric_fill, categorical_fill, label_maps,
+                   selected_indices, mean[selected_indices].astype(float), scale[selected_indices].astype(float))
+
+    def _buffer(self, name, size):
+        """Per-thread preallocated float64 vector"""
+        buffer = getattr(self._buffers, name, None)
+        if buffer is None:
+            buffer = np.empty(size, dtype=np.float64)
+            setattr(self._buffers, name, buffer)
+        return buffer
+
+    def transform(self, patient_data):
+        """
+        Write ``patient_data`` into the selected, scaled feature row
+
+        Returns a 1 x k view of the thread's buffer, or None when the dict falls
+        outside what the plan handles (unexpected columns, unseen labels, wrong
+        value types) so the caller can use the DataFrame pipeline instead.
+        """
+        if patient_data.keys() != self.column_set:
+            return None
+
+        raw = self._buffer('raw', len(self.columns))
+        for i, col in enumerate(self.columns):
+            value = patient_data[col]
+            label_map = self.label_maps.get(col)
+
+            if label_map is None:
+                if value is None or (isinstance(value, float) and value != value):
+                    value = self.numeric_fill[col]
+                elif not isinstance(value, (int, float, np.number)):
+                    return None
+                raw[i] = value
+            else:
+                if value is None or (isinstance(value, float) and value != value):
+                    if col not in self.categorical_fill:
+                        return None
+                    value = self.categorical_fill[col]
+                elif not isinstance(value, str):
+                    return None
+                code = label_map.get(str(value))
+                if code is None:
+                    return None
+                raw[i] = code
+
+        out = self._buffer('out', len(self.selected_indices))
+        np.take(raw, self.selected_indices, out=out)
+        out -= self.mean
+        out /= self.scale
+        return out.reshape(1, -1)
 
 class EnhancedChronicDiseasePredictor:
     def __init__(self):
-        self.fetcher = MultiAPIDatasetFetcher()
+        # The dataset fetcher (and its Kaggle authentication) is only created
+        # when training needs it, so inference never touches network code
+        self._fetcher = None
         self.models = {}
         self.scalers = {}
         self.imputers = {}
@@ -35,6 +147,11 @@ class EnhancedChronicDiseasePredictor:
         self.label_encoders = {}
         self.feature_names = {}
         self.model_metadata = {}
+        self.inference_plans = {}
+        
+        # Saved models registered for lazy loading on first use
+        self.model_files = {}
+        self._load_lock = threading.Lock()
         
         # Risk thresholds for different diseases
         self.risk_thresholds = {
@@ -66,6 +183,27 @@ class EnhancedChronicDiseasePredictor:
             }
         }
     
+    @classmethod
+    def for_inference(cls, model_dir='.'):
+        """Create a predictor for serving: no dataset fetcher, and every saved
+        model in ``model_dir`` is registered but only loaded when first used"""
+        predictor = cls()
+        predictor.register_model_dir(model_dir)
+        return predictor
+    
+    @property
+    def fetcher(self):
+        """Multi-API dataset fetcher, created on first use"""
+        if self._fetcher is None:
+            # Imported here: importing the fetcher authenticates with Kaggle
+            from multi_api_dataset_fetcher import MultiAPIDatasetFetcher
+            self._fetcher = MultiAPIDatasetFetcher()
+        return self._fetcher
+    
+    @fetcher.setter
+    def fetcher(self, fetcher):
+        self._fetcher = fetcher
+    
     def fetch_and_prepare_dataset(self, disease, source_preference='kaggle', test_size=0.2):
         """Fetch dataset using multi-API fetcher and prepare for training"""
         print(f"🔍 Fetching {disease} dataset...")
@@ -377,13 +515,33 @@ class EnhancedChronicDiseasePredictor:
         print(f"✅ Features preprocessed. Selected {len(selected_features)} features: {selected_features}")
         return X_train_selected, X_test_selected
     
-    def train_advanced_model(self, X_train, X_test, y_train, y_test, disease):
-        """Train advanced ensemble model with hyperparameter tuning"""
-        print(f"🤖 Training advanced model for {disease}...")
+    def train_advanced_model(self, X_train, X_test, y_train, y_test, disease, search='grid'):
+        """Train advanced ensemble model with hyperparameter tuning
+        
+        ``search`` selects the tuning strategy: ``'grid'`` for the exhaustive
+        GridSearchCV or ``'halving'`` for successive halving, which scores all
+        configurations on small samples and only gives the full training set
+        to the most promising ones.
+        """
+        print(f"🤖 Training advanced model for {disease} ({search} search)...")
         
         # Preprocess features
         X_train_processed, X_test_processed = self.preprocess_features(X_train, X_test, y_train, disease)
         
+        # Train and tune each model
+        model_scores = {}
+        for name in self.candidate_model_names():
+            model_scores[name] = self.fit_candidate_model(
+                name, X_train_processed, X_test_processed, y_train, y_test, search=search
+            )
+        
+        return self._finalize_trained_model(
+            model_scores, X_train_processed, X_test_processed, y_train, y_test, disease
+        )
+    
+    @staticmethod
+    def _candidate_models():
+        """Candidate estimators and their hyperparameter grids"""
         # Define models
         models = {
             'RandomForest': RandomForestClassifier(random_state=42),
@@ -411,63 +569,115 @@ class EnhancedChronicDiseasePredictor:
             }
         }
         
-        best_models = {}
-        model_scores = {}
-        
-        # Train and tune each model
-        for name, model in models.items():
-            print(f"  Training {name}...")
-            
-            if name in param_grids:
+        return models, param_grids
+    
+    @staticmethod
+    def candidate_model_names():
+        """Names of the candidate models tried for every disease"""
+        return list(EnhancedChronicDiseasePredictor._candidate_models()[0])
+    
+    SEARCH_STRATEGIES = ('grid', 'halving')
+    
+    @staticmethod
+    def fit_candidate_model(name, X_train_processed, X_test_processed, y_train, y_test, n_jobs=-1, search='grid'):
+        """Tune, fit and evaluate one candidate model on preprocessed features
+        
+        Self-contained so it can run in a worker process; ``n_jobs`` bounds the
+        search parallelism and ``search`` is ``'grid'`` or ``'halving'``.
+        """
+        if search not in EnhancedChronicDiseasePredictor.SEARCH_STRATEGIES:
+            raise ValueError(f"Unknown search strategy: {search}")
+        
+        models, param_grids = EnhancedChronicDiseasePredictor._candidate_models()
+        model = models[name]
+        print(f"  Training {name}...")
+        
+        start_time = time.perf_counter()
+        if name in param_grids:
+            cv = 5
+            if search == 'halving':
+                # Successive halving: every configuration starts on a small
+                # budget and only the best third moves on to 3x more. Tree
+                # ensembles are budgeted by n_estimators, others by rows.
+                param_grid = dict(param_grids[name])
+                if 'n_estimators' in param_grid:
+                    resource = 'n_estimators'
+                    max_resources = max(param_grid.pop('n_estimators'))
+                else:
+                    resource = 'n_samples'
+                    max_resources = 'auto'
+                searcher = HalvingGridSearchCV(
+                    model, param_grid,
+                    cv=cv, scoring='roc_auc', factor=3,
+                    resource=resource, max_resources=max_resources,
+                    min_resources='exhaust', random_state=42,
+                    n_jobs=n_jobs, verbose=0
+                )
+            else:
                 # Grid search for hyperparameter tuning
-                grid_search = GridSearchCV(
+                searcher = GridSearchCV(
                     model, param_grids[name], 
-                    cv=5, scoring='roc_auc', 
-                    n_jobs=-1, verbose=0
+                    cv=cv, scoring='roc_auc', 
+                    n_jobs=n_jobs, verbose=0
                 )
-                grid_search.fit(X_train_processed, y_train)
-                best_model = grid_search.best_estimator_
-                best_params = grid_search.best_params_
-                print(f"    Best params: {best_params}")
-            else:
-                # Use default parameters
-                best_model = model
-                best_model.fit(X_train_processed, y_train)
-            
-            # Evaluate model
-            y_pred = best_model.predict(X_test_processed)
-            y_pred_proba = best_model.predict_proba(X_test_processed)[:, 1]
-            
-            accuracy = accuracy_score(y_test, y_pred)
-            auc_score = roc_auc_score(y_test, y_pred_proba)
-            
-            model_scores[name] = {
-                'accuracy': accuracy,
-                'auc_score': auc_score,
-                'model': best_model
-            }
-            
-            print(f"    Accuracy: {accuracy:.4f}, AUC: {auc_score:.4f}")
-        
+            searcher.fit(X_train_processed, y_train)
+            best_model = searcher.best_estimator_
+            best_params = searcher.best_params_
+            # Every candidate is fitted once per fold, plus the final refit
+            n_fits = len(searcher.cv_results_['params']) * cv + 1
+            print(f"    Best params: {best_params}")
+        else:
+            # Use default parameters
+            best_model = model
+            best_model.fit(X_train_processed, y_train)
+            n_fits = 1
+        fit_time = time.perf_counter() - start_time
+        
+        # Evaluate model; the test probabilities are kept for the ensemble stage
+        y_pred = best_model.predict(X_test_processed)
+        test_proba = best_model.predict_proba(X_test_processed)
+        y_pred_proba = test_proba[:, 1]
+        
+        accuracy = accuracy_score(y_test, y_pred)
+        auc_score = roc_auc_score(y_test, y_pred_proba)
+        
+        print(f"    Accuracy: {accuracy:.4f}, AUC: {auc_score:.4f} ({n_fits} fits in {fit_time:.1f}s)")
+        
+        return {
+            'accuracy': accuracy,
+            'auc_score': auc_score,
+            'model': best_model,
+            'search': search,
+            'fit_time': fit_time,
+            'n_fits': n_fits,
+            'test_pred': y_pred,
+            'test_proba': test_proba
+        }
+    
+    def _finalize_trained_model(self, model_scores, X_train_processed, X_test_processed, y_train, y_test, disease):
+        """Pick the best candidate or a top-3 soft-voting ensemble and store it"""
         # Select best performing model
         best_model_name = max(model_scores.keys(), key=lambda x: model_scores[x]['auc_score'])
         best_model = model_scores[best_model_name]['model']
         
         print(f"🏆 Best model: {best_model_name} (AUC: {model_scores[best_model_name]['auc_score']:.4f})")
         
-        # Create ensemble model with top 3 models
+        # Candidates restored from older checkpoints carry no test predictions
+        for scores in model_scores.values():
+            if scores.get('test_proba') is None:
+                scores['test_pred'] = scores['model'].predict(X_test_processed)
+                scores['test_proba'] = scores['model'].predict_proba(X_test_processed)
+        
+        # Create ensemble model with top 3 models; they are already fitted on
+        # the training set, so the ensemble reuses them instead of refitting
         top_models = sorted(model_scores.items(), key=lambda x: x[1]['auc_score'], reverse=True)[:3]
         ensemble_models = [(name, scores['model']) for name, scores in top_models]
+        ensemble_model = self._build_prefit_voting_classifier(ensemble_models, y_train)
         
-        ensemble_model = VotingClassifier(
-            estimators=ensemble_models,
-            voting='soft'
-        )
-        ensemble_model.fit(X_train_processed, y_train)
-        
-        # Evaluate ensemble
-        ensemble_pred = ensemble_model.predict(X_test_processed)
-        ensemble_pred_proba = ensemble_model.predict_proba(X_test_processed)[:, 1]
+        # Evaluate ensemble by soft-voting the stored test probabilities
+        ensemble_proba = np.mean([scores['test_proba'] for _, scores in top_models], axis=0)
+        ensemble_pred = ensemble_model.classes_[np.argmax(ensemble_proba, axis=1)]
+        ensemble_pred_proba = ensemble_proba[:, 1]
         ensemble_accuracy = accuracy_score(y_test, ensemble_pred)
         ensemble_auc = roc_auc_score(y_test, ensemble_pred_proba)
         
@@ -485,29 +695,48 @@ class EnhancedChronicDiseasePredictor:
         
         # Store model and metadata
         self.models[disease] = final_model
+        self.compile_inference_plan(disease)
         self.model_metadata[disease] = {
             'model_type': 'ensemble' if ensemble_auc > model_scores[best_model_name]['auc_score'] else best_model_name,
             'accuracy': ensemble_accuracy if ensemble_auc > model_scores[best_model_name]['auc_score'] else model_scores[best_model_name]['accuracy'],
             'auc_score': final_score,
             'training_date': datetime.now().isoformat(),
             'feature_count': X_train_processed.shape[1],
-            'training_samples': X_train_processed.shape[0]
+            'training_samples': X_train_processed.shape[0],
+            'search_strategy': next(iter(model_scores.values())).get('search', 'grid'),
+            'search_time': sum(scores.get('fit_time', 0.0) for scores in model_scores.values()),
+            'n_fits': sum(scores.get('n_fits', 0) for scores in model_scores.values()),
+            'candidate_scores': {
+                name: {key: scores.get(key) for key in ('auc_score', 'accuracy', 'fit_time', 'n_fits')}
+                for name, scores in model_scores.items()
+            }
         }
         
-        # Generate detailed report
-        self._generate_model_report(y_test, ensemble_pred, ensemble_pred_proba, disease)
+        # Generate detailed report from the final model's stored test predictions
+        if final_model is ensemble_model:
+            self._generate_model_report(y_test, ensemble_pred, disease, ensemble_accuracy, ensemble_auc)
+        else:
+            best_scores = model_scores[best_model_name]
+            self._generate_model_report(y_test, best_scores['test_pred'], disease,
+                                        best_scores['accuracy'], best_scores['auc_score'])
         
         return final_model
     
-    def _generate_model_report(self, y_true, y_pred, y_pred_proba, disease):
-        """Generate detailed model performance report"""
+    @staticmethod
+    def _build_prefit_voting_classifier(estimators, y_train):
+        """Wrap already fitted estimators in a soft VotingClassifier without refitting them"""
+        ensemble_model = VotingClassifier(estimators=estimators, voting='soft')
+        ensemble_model.estimators_ = [model for _, model in estimators]
+        ensemble_model.named_estimators_ = Bunch(**dict(estimators))
+        ensemble_model.le_ = LabelEncoder().fit(y_train)
+        ensemble_model.classes_ = ensemble_model.le_.classes_
+        return ensemble_model
+    
+    def _generate_model_report(self, y_true, y_pred, disease, accuracy, auc_score):
+        """Generate detailed model performance report from precomputed test metrics"""
         print(f"\n📊 DETAILED MODEL REPORT - {disease.upper()}")
         print("="*60)
         
-        # Basic metrics
-        accuracy = accuracy_score(y_true, y_pred)
-        auc_score = roc_auc_score(y_true, y_pred_proba)
-        
         print(f"Accuracy: {accuracy:.4f}")
         print(f"AUC-ROC: {auc_score:.4f}")
         
@@ -558,7 +787,10 @@ class EnhancedChronicDiseasePredictor:
             'importance': importance
         }).sort_values('importance', ascending=False)
         
-        # Plot
+        # Plot (plotting libraries are only needed at training time)
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        
         plt.figure(figsize=(10, 6))
         sns.barplot(data=importance_df.head(10), x='importance', y='feature')
         plt.title(f'Top 10 Feature Importance - {disease.replace("_", " ").title()}')
@@ -575,11 +807,26 @@ class EnhancedChronicDiseasePredictor:
     
     def predict_risk_score(self, patient_data, disease):
         """Predict risk score with enhanced preprocessing"""
-        if disease not in self.models:
+        if not self.ensure_loaded(disease):
             print(f"❌ Model for {disease} not available")
             return None
         
         try:
+            # Fast path: score the dict directly through the compiled plan
+            plan = self.inference_plans.get(disease)
+            if plan is not None and isinstance(patient_data, dict):
+                # A different feature set can never pass the fitted pipeline
+                if patient_data.keys() != plan.column_set:
+                    missing = sorted(plan.column_set - patient_data.keys())
+                    unexpected = sorted(patient_data.keys() - plan.column_set)
+                    print(f"❌ Error predicting risk for {disease}: feature mismatch "
+                          f"(missing: {missing}, unexpected: {unexpected})")
+                    return None
+
+                patient_processed = plan.transform(patient_data)
+                if patient_processed is not None:
+                    return self._score_processed_row(patient_processed, disease)
+            
             # Convert patient data to DataFrame
             if isinstance(patient_data, dict):
                 patient_df = pd.DataFrame([patient_data])
@@ -619,60 +866,265 @@ class EnhancedChronicDiseasePredictor:
             else:
                 patient_processed = patient_scaled
             
-            # Get prediction
-            model = self.models[disease]
-            risk_prob = model.predict_proba(patient_processed)[0][1]
-            
-            # Determine risk category based on disease-specific thresholds
-            thresholds = self.risk_thresholds.get(disease, {'low': 0.3, 'moderate': 0.6, 'high': 0.8})
-            
-            if risk_prob < thresholds['low']:
-                risk_category = 'Low Risk'
-            elif risk_prob < thresholds['moderate']:
-                risk_category = 'Moderate Risk'
-            elif risk_prob < thresholds['high']:
-                risk_category = 'High Risk'
-            else:
-                risk_category = 'Very High Risk'
-            
-            return {
-                'risk_score': risk_prob,
-                'risk_category': risk_category,
-                'risk_percentage': risk_prob * 100,
-                'confidence': self._calculate_prediction_confidence(patient_processed, disease)
-            }
+            # Get prediction, reusing ensemble member probabilities for confidence
+            return self._score_processed_row(patient_processed, disease)
             
         except Exception as e:
             print(f"❌ Error predicting risk for {disease}: {e}")
             return None
+
+    def _score_processed_row(self, patient_processed, disease):
+        """Score an already preprocessed 1 x k feature row"""
+        proba, member_probas = self._predict_proba_with_members(self.models[disease], patient_processed)
+        risk_prob = float(proba[0])
+        
+        return {
+            'risk_score': risk_prob,
+            'risk_category': self._categorize_risk_batch(proba, disease)[0],
+            'risk_percentage': risk_prob * 100,
+            'confidence': float(self._calculate_prediction_confidence(patient_processed, member_probas, disease)[0])
+        }
     
-    def _calculate_prediction_confidence(self, patient_data, disease):
-        """Calculate prediction confidence based on ensemble agreement"""
-        model = self.models[disease]
+    def compile_inference_plan(self, disease):
+        """Precompute the single-row fast path for a loaded or trained model"""
+        try:
+            plan = CompiledInferencePlan.from_pipeline(
+                self.imputers.get(disease),
+                self.label_encoders.get(disease),
+                self.scalers.get(disease),
+                self.feature_selectors.get(disease)
+            )
+        except Exception as e:
+            print(f"⚠️ Could not compile inference plan for {disease}: {e}")
+            plan = None
         
-        if hasattr(model, 'named_estimators_'):
-            # For ensemble models, calculate agreement between estimators
-            predictions = []
-            for name, estimator in model.named_estimators_.items():
-                pred_proba = estimator.predict_proba(patient_data)[0][1]
-                predictions.append(pred_proba)
-            
-            # Calculate standard deviation as confidence measure
-            std_dev = np.std(predictions)
-            confidence = 1.0 - min(std_dev * 2, 1.0)  # Inverse of uncertainty
-            return confidence
+        if plan is not None:
+            self.inference_plans[disease] = plan
         else:
-            # For single models, use distance from decision boundary
-            if hasattr(model, 'decision_function'):
-                decision_score = abs(model.decision_function(patient_data)[0])
-                confidence = min(decision_score / 2.0, 1.0)
-                return confidence
-            else:
-                # Default confidence for models without decision function
-                return 0.8
+            self.inference_plans.pop(disease, None)
+        return plan
     
-    def train_all_diseases(self, source_preference='kaggle'):
-        """Train models for all available diseases"""
+    def predict_risk_scores_batch(self, patients_df, disease):
+        """Predict risk scores for an N-row frame of patients in one pass
+
+        Runs the stored preprocessing pipeline once over the whole frame and
+        scores every row with a single ``predict_proba`` per ensemble member.
+
+        Returns a dict of arrays aligned with the rows of ``patients_df``:
+        ``risk_score``, ``risk_percentage``, ``risk_category``, ``confidence``
+        and ``valid``. Rows that could not be preprocessed (e.g. unseen
+        categorical labels) have ``valid == False`` and NaN scores.
+        """
+        if not self.ensure_loaded(disease):
+            print(f"❌ Model for {disease} not available")
+            return None
+
+        try:
+            if not isinstance(patients_df, pd.DataFrame):
+                patients_df = pd.DataFrame(list(patients_df))
+
+            n_rows = len(patients_df)
+            risk_scores = np.full(n_rows, np.nan)
+            confidences = np.full(n_rows, np.nan)
+            risk_categories = np.full(n_rows, None, dtype=object)
+
+            patient_processed, valid = self._preprocess_batch(patients_df, disease)
+
+            if valid.any():
+                proba, member_probas = self._predict_proba_with_members(
+                    self.models[disease], patient_processed[valid]
+                )
+                risk_scores[valid] = proba
+                confidences[valid] = self._calculate_prediction_confidence(
+                    patient_processed[valid], member_probas, disease
+                )
+                risk_categories[valid] = self._categorize_risk_batch(proba, disease)
+
+            return {
+                'risk_score': risk_scores,
+                'risk_category': risk_categories,
+                'risk_percentage': risk_scores * 100,
+                'confidence': confidences,
+                'valid': valid
+            }
+
+        except Exception as e:
+            print(f"❌ Error predicting batch risk for {disease}: {e}")
+            return None
+
+    def split_batch_results(self, batch_result):
+        """Turn the arrays from ``predict_risk_scores_batch`` into per-row dicts
+
+        Each entry has the same shape as a ``predict_risk_score`` result, or is
+        None for rows that could not be scored.
+        """
+        if batch_result is None:
+            return []
+
+        records = []
+        for i, is_valid in enumerate(batch_result['valid']):
+            if not is_valid:
+                records.append(None)
+                continue
+            records.append({
+                'risk_score': float(batch_result['risk_score'][i]),
+                'risk_category': batch_result['risk_category'][i],
+                'risk_percentage': float(batch_result['risk_percentage'][i]),
+                'confidence': float(batch_result['confidence'][i])
+            })
+        return records
+
+    def predict_risk_scores_records(self, records, disease):
+        """Batch-score a list of feature dicts, returning one result (or None) per dict
+
+        Records are grouped by their feature set so that each group forms a
+        rectangular frame for ``predict_risk_scores_batch``.
+        """
+        results = [None] * len(records)
+
+        feature_groups = {}
+        for index, record in enumerate(records):
+            if record:
+                feature_groups.setdefault(tuple(record), []).append(index)
+
+        for indices in feature_groups.values():
+            batch_result = self.predict_risk_scores_batch(
+                pd.DataFrame([records[index] for index in indices]), disease
+            )
+            for index, risk_result in zip(indices, self.split_batch_results(batch_result)):
+                results[index] = risk_result
+
+        return results
+
+    def _preprocess_batch(self, patients_df, disease):
+        """Apply the stored imputer/encoder/scaler/selector pipeline to a frame
+
+        Returns the processed feature matrix and a boolean mask of rows that
+        went through the pipeline cleanly.
+        """
+        patient_df = patients_df.copy()
+        valid = np.ones(len(patient_df), dtype=bool)
+
+        scaler = self.scalers.get(disease)
+        expected_columns = getattr(scaler, 'feature_names_in_', None)
+        if expected_columns is not None:
+            missing = [col for col in expected_columns if col not in patient_df.columns]
+            if missing:
+                raise ValueError(f"missing features for {disease}: {missing}")
+            patient_df = patient_df[list(expected_columns)]
+
+        # 1. Imputation, using the columns each imputer was fitted on
+        imputers = self.imputers.get(disease) or {}
+        numeric_imputer = imputers.get('numeric')
+        categorical_imputer = imputers.get('categorical')
+
+        if numeric_imputer is not None:
+            numeric_columns = list(getattr(numeric_imputer, 'feature_names_in_',
+                                           patient_df.select_dtypes(include=[np.number]).columns))
+            if numeric_columns:
+                numeric_values = patient_df[numeric_columns].apply(pd.to_numeric, errors='coerce')
+                patient_df[numeric_columns] = numeric_imputer.transform(numeric_values)
+
+        if categorical_imputer is not None:
+            categorical_columns = list(getattr(categorical_imputer, 'feature_names_in_',
+                                               patient_df.select_dtypes(include=['object', 'category']).columns))
+            if categorical_columns:
+                categorical_values = patient_df[categorical_columns].astype(object)
+                categorical_values = categorical_values.where(categorical_values.notna(), np.nan)
+                patient_df[categorical_columns] = categorical_imputer.transform(categorical_values)
+
+        # 2. Label encoding via a lookup table; unseen labels invalidate the row
+        for col, le in (self.label_encoders.get(disease) or {}).items():
+            if col in patient_df.columns:
+                class_codes = {label: code for code, label in enumerate(le.classes_)}
+                encoded = patient_df[col].astype(str).map(class_codes)
+                valid &= encoded.notna().to_numpy()
+                patient_df[col] = encoded.fillna(0).astype(int)
+
+        # 3. Scaling
+        if scaler is not None:
+            patient_scaled = scaler.transform(patient_df)
+        else:
+            patient_scaled = patient_df.values
+
+        # 4. Feature selection
+        if disease in self.feature_selectors and self.feature_selectors[disease] is not None:
+            patient_processed = self.feature_selectors[disease].transform(patient_scaled)
+        else:
+            patient_processed = patient_scaled
+
+        valid &= np.isfinite(patient_processed).all(axis=1)
+        return patient_processed, valid
+
+    def _predict_proba_with_members(self, model, X):
+        """Positive-class probabilities plus per-member probabilities for ensembles
+
+        For soft-voting ensembles the member probabilities are computed once and
+        averaged here, so confidence scoring can reuse them.
+        """
+        if hasattr(model, 'named_estimators_') and getattr(model, 'voting', None) == 'soft':
+            member_probas = np.array([
+                estimator.predict_proba(X)[:, 1]
+                for estimator in model.named_estimators_.values()
+            ])
+            proba = np.average(member_probas, axis=0, weights=model.weights)
+            return proba, member_probas
+
+        return model.predict_proba(X)[:, 1], None
+
+    def _calculate_prediction_confidence(self, X, member_probas, disease):
+        """Calculate prediction confidence per row based on ensemble agreement
+        
+        Ensembles use the spread of member probabilities, single models the
+        distance from the decision boundary.
+        """
+        model = self.models[disease]
+
+        if member_probas is not None:
+            std_dev = member_probas.std(axis=0)
+            return 1.0 - np.minimum(std_dev * 2, 1.0)
+        elif hasattr(model, 'named_estimators_'):
+            member_probas = np.array([
+                estimator.predict_proba(X)[:, 1]
+                for estimator in model.named_estimators_.values()
+            ])
+            return 1.0 - np.minimum(member_probas.std(axis=0) * 2, 1.0)
+        elif hasattr(model, 'decision_function'):
+            decision_scores = np.abs(np.ravel(model.decision_function(X)))
+            return np.minimum(decision_scores / 2.0, 1.0)
+        else:
+            return np.full(X.shape[0], 0.8)
+
+    def _categorize_risk_batch(self, risk_probs, disease):
+        """Map an array of probabilities to risk categories"""
+        thresholds = self.risk_thresholds.get(disease, {'low': 0.3, 'moderate': 0.6, 'high': 0.8})
+
+        return np.select(
+            [risk_probs < thresholds['low'],
+             risk_probs < thresholds['moderate'],
+             risk_probs < thresholds['high']],
+            ['Low Risk', 'Moderate Risk', 'High Risk'],
+            default='Very High Risk'
+        ).astype(object)
+
+    def train_all_diseases(self, source_preference='kaggle', parallel=False, max_cores=None,
+                           cores_per_job=1, checkpoint_dir='training_checkpoints', resume=True, search='grid'):
+        """Train models for all available diseases
+        
+        With ``parallel=True`` the (disease, candidate model) jobs run on a
+        process pool bounded by ``max_cores`` and every finished job is
+        checkpointed under ``checkpoint_dir`` so an interrupted run can resume;
+        the checkpoints are removed once every disease has trained.
+        ``search`` picks the hyperparameter search strategy ('grid' or 'halving').
+        """
+        if parallel:
+            from training_scheduler import TrainingScheduler
+            scheduler = TrainingScheduler(
+                self, max_cores=max_cores, cores_per_job=cores_per_job,
+                checkpoint_dir=checkpoint_dir, resume=resume, search=search
+            )
+            return scheduler.run(source_preference=source_preference)
+        
         diseases = self.fetcher.list_available_diseases()
         trained_models = {}
         
@@ -689,7 +1141,7 @@ class EnhancedChronicDiseasePredictor:
                 
                 if X_train is not None:
                     # Train model
-                    model = self.train_advanced_model(X_train, X_test, y_train, y_test, disease)
+                    model = self.train_advanced_model(X_train, X_test, y_train, y_test, disease, search=search)
                     trained_models[disease] = model
                     
                     # Save model
@@ -706,24 +1158,29 @@ class EnhancedChronicDiseasePredictor:
         return trained_models
     
     def save_model(self, disease, filename=None):
-        """Save trained model with all preprocessing components"""
+        """Save trained model with all preprocessing components
+        
+        Writes a versioned, memory-mappable model artifact by default; a
+        filename ending in ``.pkl`` writes the legacy single pickle file.
+        """
         if filename is None:
-            filename = f'enhanced_chronic_disease_model_{disease}.pkl'
+            filename = f'enhanced_chronic_disease_model_{disease}{ARTIFACT_SUFFIX}'
         
-        model_data = {
-            'model': self.models.get(disease),
-            'scaler': self.scalers.get(disease),
-            'imputer': self.imputers.get(disease),
-            'feature_selector': self.feature_selectors.get(disease),
-            'label_encoders': self.label_encoders.get(disease),
-            'feature_names': self.feature_names.get(disease),
-            'metadata': self.model_metadata.get(disease),
-            'risk_thresholds': self.risk_thresholds.get(disease)
-        }
+        model_data = self._model_data(disease)
         
         try:
-            with open(filename, 'wb') as f:
-                pickle.dump(model_data, f)
+            if str(filename).endswith('.pkl'):
+                with open(filename, 'wb') as f:
+                    pickle.dump(model_data, f)
+            else:
+                metadata = self.model_metadata.get(disease) or {}
+                save_artifact(model_data, filename, metadata={
+                    'disease': disease,
+                    'estimator': type(self.models.get(disease)).__name__,
+                    'model_type': metadata.get('model_type'),
+                    'auc_score': metadata.get('auc_score'),
+                    'training_date': metadata.get('training_date')
+                })
             print(f"💾 Model saved: {filename}")
             return True
         except Exception as e:
@@ -731,21 +1188,18 @@ class EnhancedChronicDiseasePredictor:
             return False
     
     def load_model(self, filename, disease):
-        """Load trained model with all preprocessing components"""
+        """Load trained model with all preprocessing components
+        
+        Accepts a model artifact directory or a legacy ``.pkl`` file.
+        """
         try:
-            with open(filename, 'rb') as f:
-                model_data = pickle.load(f)
-            
-            self.models[disease] = model_data.get('model')
-            self.scalers[disease] = model_data.get('scaler')
-            self.imputers[disease] = model_data.get('imputer')
-            self.feature_selectors[disease] = model_data.get('feature_selector')
-            self.label_encoders[disease] = model_data.get('label_encoders', {})
-            self.feature_names[disease] = model_data.get('feature_names', [])
-            self.model_metadata[disease] = model_data.get('metadata', {})
+            if is_artifact(filename):
+                model_data = load_artifact(filename)
+            else:
+                with open(filename, 'rb') as f:
+                    model_data = pickle.load(f)
             
-            if disease in model_data.get('risk_thresholds', {}):
-                self.risk_thresholds[disease] = model_data['risk_thresholds']
+            self._apply_model_data(model_data, disease)
             
             print(f"✅ Model loaded: {filename}")
             return True
@@ -753,6 +1207,73 @@ class EnhancedChronicDiseasePredictor:
             print(f"❌ Error loading model: {e}")
             return False
     
+    def _model_data(self, disease):
+        """Collect a disease's model and preprocessing components for saving"""
+        return {
+            'model': self.models.get(disease),
+            'scaler': self.scalers.get(disease),
+            'imputer': self.imputers.get(disease),
+            'feature_selector': self.feature_selectors.get(disease),
+            'label_encoders': self.label_encoders.get(disease),
+            'feature_names': self.feature_names.get(disease),
+            'metadata': self.model_metadata.get(disease),
+            'risk_thresholds': self.risk_thresholds.get(disease)
+        }
+    
+    def _apply_model_data(self, model_data, disease):
+        """Install loaded model and preprocessing components for a disease"""
+        self.scalers[disease] = model_data.get('scaler')
+        self.imputers[disease] = model_data.get('imputer')
+        self.feature_selectors[disease] = model_data.get('feature_selector')
+        self.label_encoders[disease] = model_data.get('label_encoders', {})
+        self.feature_names[disease] = model_data.get('feature_names', [])
+        self.model_metadata[disease] = model_data.get('metadata', {})
+        
+        if disease in model_data.get('risk_thresholds', {}):
+            self.risk_thresholds[disease] = model_data['risk_thresholds']
+        
+        self.compile_inference_plan(disease)
+        
+        # Published last: readers that find the model also find its pipeline
+        self.models[disease] = model_data.get('model')
+    
+    def register_model_dir(self, directory='.'):
+        """Register the saved models in ``directory`` for lazy loading"""
+        self.model_files.update(self.discover_model_files(directory))
+        return len(self.model_files)
+    
+    def available_diseases(self):
+        """Diseases that are loaded or can be loaded on demand"""
+        return list(dict.fromkeys(list(self.models) + list(self.model_files)))
+    
+    def ensure_loaded(self, disease):
+        """Load a registered model on first use; True if the disease can be scored"""
+        if disease in self.models:
+            return True
+        if disease not in self.model_files:
+            return False
+        
+        with self._load_lock:
+            if disease not in self.models:
+                self.load_model(str(self.model_files[disease]), disease)
+        return disease in self.models
+    
+    @staticmethod
+    def discover_model_files(directory='.'):
+        """Map each disease to its saved model in ``directory``
+        
+        Model artifacts are preferred over legacy ``.pkl`` files for the same
+        disease.
+        """
+        prefix = 'enhanced_chronic_disease_model_'
+        model_files = {}
+        for pattern in (f'{prefix}*.pkl', f'{prefix}*{ARTIFACT_SUFFIX}'):
+            for model_file in sorted(Path(directory).glob(pattern)):
+                if model_file.suffix == ARTIFACT_SUFFIX and not is_artifact(model_file):
+                    continue
+                model_files[model_file.stem.replace(prefix, '')] = model_file
+        return model_files
+    
     def get_model_summary(self):
         """Get summary of all trained models"""
         if not self.models:
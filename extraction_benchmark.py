@@ -0,0 +1,467 @@
+"""
+Report Extraction Benchmark
+===========================
+
+Measures how fast and how accurately ``HospitalReportProcessor`` extracts
+lab values, on synthetic lab reports whose true values are known.
+
+- The generator writes TXT, DOCX and PDF reports of any length (1 to 500
+  pages by default): a header with demographics, vitals and a lab panel, an
+  interim panel repeating the same results every few pages, and clinical
+  note pages in between. Each field is left out of some reports, so both
+  missed values and values found where there are none are counted, and
+  some reports give their labs in SI units (glucose in mmol/L), scored
+  against the value in the models' units.
+- Every (format, size) case runs in a fresh process, so its peak RSS is not
+  inflated by earlier cases.
+- For each case the result has docs/sec, MB/sec, per-document latency, peak
+  RSS, and per-field precision/recall for ``extract_medical_data`` and
+  ``extract_blood_pressure``.
+
+Results are JSON, so runs before and after a change to the extractor can be
+compared with ``--compare``:
+
+    python extraction_benchmark.py --output before.json
+    python extraction_benchmark.py --output after.json --compare before.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import subprocess
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import docx
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from report_processor import EXTRACTOR_VERSION, HospitalReportProcessor
+
+DEFAULT_SIZES = [1, 10, 100, 500]
+DEFAULT_FORMATS = ['txt', 'docx', 'pdf']
+
+# Lines per page; the PDF writer fits this many on a letter page
+LINES_PER_PAGE = 40
+# An interim lab panel repeats the results every this many pages
+INTERIM_PANEL_EVERY = 25
+# Share of reports that include each field
+FIELD_PRESENCE = 0.8
+# Extracted values within this relative error of the truth count as correct
+VALUE_TOLERANCE = 0.01
+
+# field: (report labels, unit, low, high, decimals)
+LAB_FIELDS = {
+    'glucose': (['Fasting Glucose', 'Glucose', 'Blood Sugar'], 'mg/dl', 70, 250, 0),
+    'hba1c': (['HbA1c', 'Hemoglobin A1c'], '%', 4.5, 12.0, 1),
+    'cholesterol': (['Total Cholesterol', 'Cholesterol'], 'mg/dl', 120, 320, 0),
+    'hdl': (['HDL Cholesterol', 'HDL'], 'mg/dl', 25, 90, 0),
+    'ldl': (['LDL Cholesterol', 'LDL'], 'mg/dl', 50, 220, 0),
+    'triglycerides': (['Triglycerides', 'TG'], 'mg/dl', 50, 400, 0),
+    'creatinine': (['Serum Creatinine', 'Creatinine'], 'mg/dl', 0.5, 3.0, 2),
+    'urea': (['BUN', 'Urea'], 'mg/dl', 7, 40, 0),
+    'hemoglobin': (['Hemoglobin', 'Hb'], 'g/dl', 9.0, 18.0, 1),
+}
+VITAL_FIELDS = {
+    'heart_rate': (['Heart Rate', 'Pulse'], 'bpm', 50, 120, 0),
+    'bmi': (['BMI', 'Body Mass Index'], '', 17.0, 40.0, 1),
+}
+# Fields some labs report in SI units: field -> (unit, factor to the canonical unit, decimals)
+SI_UNITS = {
+    'glucose': ('mmol/L', 18.016, 2),
+    'cholesterol': ('mmol/L', 38.67, 2),
+    'hdl': ('mmol/L', 38.67, 2),
+    'ldl': ('mmol/L', 38.67, 2),
+    'triglycerides': ('mmol/L', 88.57, 2),
+    'creatinine': ('µmol/L', 1 / 88.42, 0),
+    'hemoglobin': ('g/L', 0.1, 0),
+}
+# Share of reports whose lab uses SI units
+SI_UNIT_SHARE = 0.25
+BLOOD_PRESSURE_FIELDS = ['systolic', 'diastolic']
+DEMOGRAPHIC_FIELDS = ['age', 'gender']
+
+# Fields scored for each extractor
+SCORED_FIELDS = {
+    'extract_medical_data': list(LAB_FIELDS) + list(VITAL_FIELDS) + BLOOD_PRESSURE_FIELDS + DEMOGRAPHIC_FIELDS,
+    'extract_blood_pressure': BLOOD_PRESSURE_FIELDS,
+}
+
+NOTE_LINES = [
+    'Patient seen on the ward round this morning, comfortable at rest.',
+    'Tolerating oral diet, no nausea or vomiting overnight.',
+    'Mobilising with physiotherapy, walked the length of the corridor twice.',
+    'Wound inspected, clean and dry, dressing changed.',
+    'Discussed medication changes with the patient and family.',
+    'Sleep reported as fair, woke twice during the night.',
+    'Reviewed by the dietitian, advised a low salt meal plan.',
+    'No new complaints today, continues current management.',
+    'Follow-up appointment to be arranged in 3 months.',
+    'Chest clear on auscultation, no peripheral oedema.',
+    'Encouraged to continue the home exercise programme.',
+    'Social work referral made for support after discharge.',
+    'Pain controlled with regular paracetamol.',
+    'Patient educated on recognising warning symptoms.',
+]
+
+
+def write_pdf(path, pages):
+    """Write a minimal text-only PDF with one page per list of lines"""
+    font_id = 3 + 2 * len(pages)
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>',
+               ('<< /Type /Pages /Kids [%s] /Count %d >>' % (
+                   ' '.join(f'{3 + 2 * i} 0 R' for i in range(len(pages))), len(pages))).encode()]
+    for i, lines in enumerate(pages):
+        text = ' '.join(
+            '(%s) Tj 0 -14 Td' % line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+            for line in lines
+        )
+        stream = f'BT /F1 10 Tf 50 780 Td {text} ET'.encode()
+        objects.append(f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * i} 0 R '
+                       f'/Resources << /Font << /F1 {font_id} 0 R >> >> >>'.encode())
+        objects.append(b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream')
+    objects.append(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>')
+
+    body = b'%PDF-1.4\n'
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(body))
+        body += b'%d 0 obj\n' % number + obj + b'\nendobj\n'
+    xref = len(body)
+    body += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    body += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    body += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    with open(path, 'wb') as f:
+        f.write(body)
+
+
+class SyntheticReportGenerator:
+    """Synthetic lab reports with known values, in TXT, DOCX or PDF"""
+
+    def __init__(self, seed=0):
+        self.seed = seed
+
+    def generate(self, pages, index=0):
+        """
+        Build one report of ``pages`` pages
+
+        Returns ``(page_lines, truth)``: a list of lines per page, and the
+        value of every scored field (None where the report leaves it out).
+        """
+        rng = random.Random(f'{self.seed}:{pages}:{index}')
+        si_units = rng.random() < SI_UNIT_SHARE
+        truth = {}
+        labels = {}
+        for field, (names, unit, low, high, decimals) in {**LAB_FIELDS, **VITAL_FIELDS}.items():
+            if rng.random() < FIELD_PRESENCE:
+                truth[field] = round(rng.uniform(low, high), decimals)
+                value = f'{truth[field]:.{decimals}f}'
+                if si_units and field in SI_UNITS:
+                    unit, factor, si_decimals = SI_UNITS[field]
+                    value = f'{truth[field] / factor:.{si_decimals}f}'
+                labels[field] = (rng.choice(names), value, unit)
+            else:
+                truth[field] = None
+
+        if rng.random() < FIELD_PRESENCE:
+            truth['systolic'] = float(rng.randint(100, 180))
+            truth['diastolic'] = float(rng.randint(60, min(110, int(truth['systolic']) - 20)))
+        else:
+            truth['systolic'] = truth['diastolic'] = None
+        truth['age'] = rng.randint(25, 85)
+        truth['gender'] = rng.choice(['male', 'female'])
+        report_date = date(2024, 1, 1) + timedelta(days=rng.randint(0, 365))
+
+        header = [
+            'PATIENT MEDICAL REPORT',
+            f'Patient: Synthetic Patient {index:04d}',
+            f'Age: {truth["age"]} years',
+            f'Gender: {truth["gender"].title()}',
+            f'Report Date: {report_date.isoformat()}',
+            '',
+            'VITAL SIGNS:',
+        ]
+        if truth['systolic'] is not None:
+            header.append(f'Blood Pressure: {int(truth["systolic"])}/{int(truth["diastolic"])} mmHg')
+        header += self._panel(VITAL_FIELDS, truth, labels)
+        header += ['', 'LABORATORY RESULTS:'] + self._panel(LAB_FIELDS, truth, labels)
+
+        page_lines = []
+        for page in range(pages):
+            lines = header if page == 0 else [f'Page {page + 1} of {pages}']
+            if page and page % INTERIM_PANEL_EVERY == 0:
+                lines = lines + ['', 'INTERIM LABORATORY RESULTS:'] + self._panel(LAB_FIELDS, truth, labels)
+            lines = lines + ['', 'CLINICAL NOTES:']
+            while len(lines) < LINES_PER_PAGE:
+                lines.append(rng.choice(NOTE_LINES))
+            page_lines.append(lines)
+        return page_lines, truth
+
+    @staticmethod
+    def _panel(fields, truth, labels):
+        lines = []
+        for field in fields:
+            if truth[field] is None:
+                continue
+            name, value, unit = labels[field]
+            separator = '' if unit == '%' else ' '
+            lines.append(f'{name}: {value}{separator}{unit}'.rstrip())
+        return lines
+
+    def write(self, page_lines, path, file_format):
+        """Write a generated report as TXT, DOCX or PDF"""
+        if file_format == 'txt':
+            Path(path).write_text('\f\n'.join('\n'.join(lines) for lines in page_lines) + '\n')
+        elif file_format == 'docx':
+            # Lab results go in a table (test, result, units), as labs print them
+            document = docx.Document()
+            for number, lines in enumerate(page_lines):
+                if number:
+                    document.add_page_break()
+                table = None
+                for line in lines:
+                    if line.endswith('RESULTS:'):
+                        document.add_paragraph(line)
+                        table = document.add_table(rows=1, cols=3)
+                        for cell, header in zip(table.rows[0].cells, ('Test', 'Result', 'Units')):
+                            cell.text = header
+                    elif table is not None and line:
+                        name, result = line.split(': ', 1)
+                        value, _, unit = result.partition(' ')
+                        for cell, text in zip(table.add_row().cells, (name, value, unit)):
+                            cell.text = text
+                    else:
+                        table = None
+                        document.add_paragraph(line)
+            document.save(str(path))
+        elif file_format == 'pdf':
+            write_pdf(str(path), page_lines)
+        else:
+            raise ValueError(f"Unsupported format: {file_format}")
+
+    def generate_files(self, directory, file_format, pages, count):
+        """Write ``count`` reports to ``directory``; returns ``[(path, truth)]``"""
+        reports = []
+        for index in range(count):
+            page_lines, truth = self.generate(pages, index)
+            path = Path(directory) / f'report_{pages}p_{index:04d}.{file_format}'
+            self.write(page_lines, path, file_format)
+            reports.append((str(path), truth))
+        return reports
+
+
+def _matches(expected, extracted):
+    if isinstance(expected, str) or isinstance(extracted, str):
+        return str(expected).lower() == str(extracted).lower()
+    return abs(float(extracted) - float(expected)) <= VALUE_TOLERANCE * max(abs(float(expected)), 1.0)
+
+
+def score_fields(pairs, fields):
+    """
+    Per-field precision and recall over ``(truth, extracted)`` pairs
+
+    A value within ``VALUE_TOLERANCE`` of the truth is a true positive; a
+    wrong value counts as both a false positive and a false negative.
+    """
+    scores = {}
+    for field in fields:
+        tp = fp = fn = 0
+        for truth, extracted in pairs:
+            expected, found = truth.get(field), extracted.get(field)
+            if found is not None and expected is not None and _matches(expected, found):
+                tp += 1
+                continue
+            if found is not None:
+                fp += 1
+            if expected is not None:
+                fn += 1
+        scores[field] = {
+            'precision': tp / (tp + fp) if tp + fp else None,
+            'recall': tp / (tp + fn) if tp + fn else None,
+            'true_positives': tp,
+            'false_positives': fp,
+            'false_negatives': fn
+        }
+    return scores
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def run_case(reports, page_budget=None):
+    """Extract every report in ``[(path, truth)]`` and measure speed and accuracy"""
+    processor = HospitalReportProcessor(page_budget=page_budget)
+    rss_before = _peak_rss_mb()
+    total_bytes = sum(os.path.getsize(path) for path, _ in reports)
+
+    latencies = []
+    medical_pairs = []
+    pressure_pairs = []
+    start = time.perf_counter()
+    for path, truth in reports:
+        doc_start = time.perf_counter()
+        extracted = processor.extract_report_data(path) or {}
+        latencies.append(time.perf_counter() - doc_start)
+        medical_pairs.append((truth, extracted))
+    seconds = time.perf_counter() - start
+
+    # Blood pressure on its own, over the same text the processor read
+    for path, truth in reports:
+        text = processor.extract_text_from_file(path)
+        pressure_pairs.append((truth, processor.extract_blood_pressure(text)))
+
+    latencies.sort()
+    return {
+        'documents': len(reports),
+        'total_mb': round(total_bytes / (1024 * 1024), 3),
+        'seconds': round(seconds, 4),
+        'docs_per_sec': round(len(reports) / seconds, 3) if seconds else None,
+        'mb_per_sec': round(total_bytes / (1024 * 1024) / seconds, 3) if seconds else None,
+        'latency_ms': {
+            'mean': round(1000 * sum(latencies) / len(latencies), 2),
+            'p50': round(1000 * latencies[len(latencies) // 2], 2),
+            'max': round(1000 * latencies[-1], 2)
+        },
+        'rss_before_mb': rss_before,
+        'peak_rss_mb': _peak_rss_mb(),
+        'accuracy': {
+            'extract_medical_data': score_fields(medical_pairs, SCORED_FIELDS['extract_medical_data']),
+            'extract_blood_pressure': score_fields(pressure_pairs, SCORED_FIELDS['extract_blood_pressure'])
+        }
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=Path(__file__).parent, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def documents_for_size(pages, pages_per_case, max_documents=50):
+    """How many reports of a size to extract, for roughly the same work per case"""
+    return max(2, min(max_documents, pages_per_case // pages))
+
+
+def run_benchmark(sizes=None, formats=None, pages_per_case=1000, seed=0, page_budget=None, workdir=None):
+    """
+    Generate reports and benchmark extraction for every format and size
+
+    Returns a JSON-serialisable dict with one entry per (format, size) case.
+    Progress goes to stderr so the JSON can be piped from stdout.
+    """
+    sizes = sizes or DEFAULT_SIZES
+    formats = formats or DEFAULT_FORMATS
+    generator = SyntheticReportGenerator(seed)
+    # Spawned workers start clean, so peak RSS belongs to one case only
+    context = multiprocessing.get_context('spawn')
+
+    results = {
+        'benchmark': 'report_extraction',
+        'created_at': datetime.now().isoformat(),
+        'git_commit': _git_commit(),
+        'extractor_version': EXTRACTOR_VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': {'sizes': sizes, 'formats': formats, 'pages_per_case': pages_per_case,
+                     'seed': seed, 'page_budget': page_budget, 'value_tolerance': VALUE_TOLERANCE},
+        'cases': []
+    }
+
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        for file_format in formats:
+            for pages in sizes:
+                count = documents_for_size(pages, pages_per_case)
+                print(f"📄 {file_format.upper()} x {pages} pages: generating {count} reports...", file=sys.stderr)
+                reports = generator.generate_files(tmp, file_format, pages, count)
+
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    case = pool.submit(run_case, reports, page_budget).result()
+                case = {'format': file_format, 'pages': pages, **case}
+                results['cases'].append(case)
+                print(f"   ⚡ {case['docs_per_sec']} docs/sec, {case['mb_per_sec']} MB/sec, "
+                      f"peak RSS {case['peak_rss_mb']} MB", file=sys.stderr)
+
+                for path, _ in reports:
+                    os.remove(path)
+
+    return results
+
+
+def compare_results(baseline, current):
+    """Speed ratios and precision/recall changes for the cases both runs share"""
+    baseline_cases = {(case['format'], case['pages']): case for case in baseline['cases']}
+    comparison = []
+    for case in current['cases']:
+        before = baseline_cases.get((case['format'], case['pages']))
+        if before is None:
+            continue
+        fields = {}
+        for extractor, scores in case['accuracy'].items():
+            for field, score in scores.items():
+                old = before['accuracy'].get(extractor, {}).get(field)
+                if old is None:
+                    continue
+                delta = {
+                    metric: round(score[metric] - old[metric], 4)
+                    for metric in ('precision', 'recall')
+                    if score[metric] is not None and old[metric] is not None and score[metric] != old[metric]
+                }
+                if delta:
+                    fields[f'{extractor}.{field}'] = delta
+        comparison.append({
+            'format': case['format'],
+            'pages': case['pages'],
+            'docs_per_sec_ratio': round(case['docs_per_sec'] / before['docs_per_sec'], 3)
+            if case['docs_per_sec'] and before['docs_per_sec'] else None,
+            'peak_rss_mb_change': round(case['peak_rss_mb'] - before['peak_rss_mb'], 1)
+            if case['peak_rss_mb'] is not None and before['peak_rss_mb'] is not None else None,
+            'accuracy_changes': fields
+        })
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark report extraction on synthetic lab reports')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='Report lengths in pages')
+    parser.add_argument('--formats', nargs='+', choices=DEFAULT_FORMATS, default=DEFAULT_FORMATS)
+    parser.add_argument('--pages-per-case', type=int, default=1000,
+                        help='Approximate pages extracted per (format, size) case')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the synthetic reports')
+    parser.add_argument('--page-budget', type=int, help='Processor page budget for PDF reports')
+    parser.add_argument('--output', help='Write the JSON results to this file (default: stdout)')
+    parser.add_argument('--compare', help='Earlier JSON results to compare against')
+    args = parser.parse_args()
+
+    results = run_benchmark(args.sizes, args.formats, args.pages_per_case, args.seed, args.page_budget)
+    if args.compare:
+        with open(args.compare) as f:
+            results['comparison'] = compare_results(json.load(f), results)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+        print(f"💾 Results saved to: {args.output}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
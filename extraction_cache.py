@@ -0,0 +1,166 @@
+"""
+Report Extraction Cache
+=======================
+
+Persistent cache of report extraction results, keyed by the SHA-256 of the
+report file's content plus the extractor version and extraction settings.
+The same lab PDF uploaded again (under any name, through any endpoint or a
+batch run) is served from the cache instead of being parsed and mined again.
+
+Entries hold the raw text that was read and the ``extract_medical_data``
+result. The database is kept under ``max_bytes`` by evicting the least
+recently used entries.
+"""
+
+import json
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+from pathlib import Path
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_content_hash(source):
+    """SHA-256 of a file's bytes; ``source`` is a path, bytes or a binary file object"""
+    if isinstance(source, (bytes, bytearray)):
+        return hashlib.sha256(source).hexdigest()
+
+    digest = hashlib.sha256()
+    if hasattr(source, 'read'):
+        if source.seekable():
+            source.seek(0)
+        for chunk in iter(lambda: source.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    with open(source, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """SQLite-backed LRU cache of extracted report text and values"""
+
+    def __init__(self, db_path='report_cache.db', max_bytes=256 * 1024 * 1024):
+        """
+        Args:
+            db_path: SQLite database file (created on first use)
+            max_bytes: Total size of cached text and values to keep
+        """
+        self.db_path = Path(db_path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._initialized = False
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Worker processes get their own counters and connections
+        return {'db_path': self.db_path, 'max_bytes': self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(state['db_path'], state['max_bytes'])
+
+    def _connect(self):
+        if not self._initialized:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        if not self._initialized:
+            with self._lock:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS extractions (
+                        cache_key TEXT PRIMARY KEY,
+                        content_hash TEXT NOT NULL,
+                        file_name TEXT,
+                        text TEXT,
+                        data TEXT NOT NULL,
+                        size INTEGER NOT NULL,
+                        created_at TIMESTAMP NOT NULL,
+                        last_used TIMESTAMP NOT NULL
+                    )
+                ''')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_extractions_last_used ON extractions(last_used)')
+                conn.commit()
+                self._initialized = True
+        return conn
+
+    @staticmethod
+    def make_key(content_hash, extractor_version, settings=None):
+        """Cache key for a file hash, extractor version and extraction settings"""
+        key = f'{content_hash}:{extractor_version}'
+        if settings:
+            key += ':' + json.dumps(settings, sort_keys=True, default=str)
+        return key
+
+    def get(self, cache_key):
+        """Return ``(text, data)`` for a cached extraction, or None"""
+        conn = self._connect()
+        row = conn.execute('SELECT text, data FROM extractions WHERE cache_key = ?', (cache_key,)).fetchone()
+        if row is not None:
+            conn.execute('UPDATE extractions SET last_used = ? WHERE cache_key = ?',
+                         (datetime.now().isoformat(), cache_key))
+            conn.commit()
+        conn.close()
+
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0], json.loads(row[1])
+
+    def put(self, cache_key, content_hash, text, data, file_name=None):
+        """Store an extraction, then evict old entries if over the size limit"""
+        data_json = json.dumps(data, default=float)
+        size = len(text.encode('utf-8')) + len(data_json) if text else len(data_json)
+        now = datetime.now().isoformat()
+
+        conn = self._connect()
+        conn.execute('''
+            INSERT OR REPLACE INTO extractions
+            (cache_key, content_hash, file_name, text, data, size, created_at, last_used)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (cache_key, content_hash, file_name, text, data_json, size, now, now))
+        conn.commit()
+        conn.close()
+
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in ``max_bytes``"""
+        conn = self._connect()
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM extractions').fetchone()[0]
+        evicted = 0
+        if total > self.max_bytes:
+            for cache_key, size in conn.execute('SELECT cache_key, size FROM extractions ORDER BY last_used').fetchall():
+                conn.execute('DELETE FROM extractions WHERE cache_key = ?', (cache_key,))
+                evicted += 1
+                total -= size
+                if total <= self.max_bytes:
+                    break
+            conn.commit()
+        conn.close()
+        return evicted
+
+    def clear(self):
+        """Remove every cached extraction"""
+        conn = self._connect()
+        conn.execute('DELETE FROM extractions')
+        conn.commit()
+        conn.close()
+
+    def stats(self):
+        """Entry count, total size and this process's hit/miss counters"""
+        conn = self._connect()
+        entries, size = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM extractions').fetchone()
+        conn.close()
+        return {
+            'entries': entries,
+            'size_bytes': size,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses
+        }
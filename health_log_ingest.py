@@ -0,0 +1,178 @@
+"""
+Bulk Health Log Ingestion
+=========================
+
+Parsing and validation for batches of health readings, such as a wearable
+syncing a day of minute-level heart rate in one request.
+
+- ``parse_readings`` takes a request body holding either a JSON array of
+  readings or NDJSON (one reading per line). A bad NDJSON line is a row
+  error, not a failed batch.
+- ``validate_readings`` checks the whole batch column by column with pandas
+  instead of reading by reading, and returns the insertable rows plus a list
+  of per-row errors. Timestamps may be ISO 8601 strings (any offset) or
+  epoch seconds; they are stored as UTC ``YYYY-MM-DDTHH:MM:SS`` so the same
+  reading always has the same key, and the reading's ``log_date`` is its
+  UTC date.
+
+A reading is ``{"user_id", "log_type", "value", "timestamp"}`` with optional
+``"unit"`` and ``"notes"``. Readings are deduplicated on
+``(user_id, log_type, timestamp)``, within the batch here and against the
+database by the unique index from ``dashboard_migrations``.
+"""
+
+import json
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, Iterable, List, Tuple
+
+MAX_READINGS = 100000
+REQUIRED_FIELDS = ('user_id', 'log_type', 'value', 'timestamp')
+OPTIONAL_FIELDS = ('unit', 'notes')
+DEDUPE_KEY = ['user_id', 'log_type', 'recorded_at']
+
+_DECODER = json.JSONDecoder()
+# Epoch seconds that fit in a pandas timestamp
+_EPOCH_MIN = pd.Timestamp.min.ceil('s').timestamp()
+_EPOCH_MAX = pd.Timestamp.max.floor('s').timestamp()
+
+
+class IngestError(ValueError):
+    """The request body cannot be read as a batch of readings"""
+
+
+def parse_readings(body) -> Tuple[List, List[Dict]]:
+    """
+    Readings from a JSON array or NDJSON request body
+
+    Returns ``(readings, errors)``. For NDJSON, rows are line numbers: a line
+    that is not valid JSON is reported in ``errors``, and it and blank lines
+    are None in ``readings``. Raises IngestError for an empty or unreadable
+    body.
+    """
+    if isinstance(body, bytes):
+        try:
+            body = body.decode('utf-8')
+        except UnicodeDecodeError:
+            raise IngestError('Body is not UTF-8')
+    body = body.strip()
+    if not body:
+        raise IngestError('No readings in request body')
+
+    if body.startswith('['):
+        try:
+            readings = json.loads(body)
+        except json.JSONDecodeError as e:
+            raise IngestError(f'Invalid JSON array: {e}')
+        return readings, []
+
+    # raw_decode skips the per-call setup of json.loads, which adds up over
+    # tens of thousands of lines
+    decode = _DECODER.raw_decode
+    readings, errors = [], []
+    for row, line in enumerate(body.splitlines()):
+        line = line.strip()
+        if not line:
+            readings.append(None)
+            continue
+        try:
+            reading, end = decode(line)
+            if end != len(line):
+                raise json.JSONDecodeError('Extra data', line, end)
+            readings.append(reading)
+        except json.JSONDecodeError as e:
+            readings.append(None)
+            errors.append({'row': row, 'errors': [f'invalid JSON: {e.msg}']})
+    return readings, errors
+
+
+def _is_string(column: pd.Series) -> pd.Series:
+    return column.map(type).eq(str)
+
+
+def _numbers(column: pd.Series) -> pd.Series:
+    """JSON numbers as floats; NaN for anything else, booleans and numeric strings included"""
+    return pd.to_numeric(column.where(column.map(type).isin([int, float])), errors='coerce')
+
+
+def _non_empty_strings(column: pd.Series) -> pd.Series:
+    return column.where(_is_string(column), '').astype(bool)
+
+
+def _optional_strings(column: pd.Series) -> pd.Series:
+    return column.isna() | _is_string(column)
+
+
+def parse_timestamps(column: pd.Series) -> pd.Series:
+    """UTC timestamps from ISO 8601 strings or epoch seconds as numbers (NaT where neither)"""
+    strings = _is_string(column)
+    epoch = _numbers(column)
+    text = column.where(strings)
+    parsed = pd.to_datetime(text, utc=True, format='ISO8601', errors='coerce')
+    # Only representable numbers go through the unit conversion: casting NaN
+    # rows to integers there can trip numpy's overflow check, and values past
+    # the datetime range raise even with errors='coerce'
+    numeric = epoch.between(_EPOCH_MIN, _EPOCH_MAX)
+    if numeric.any():
+        parsed = parsed.where(~numeric, pd.to_datetime(epoch[numeric], unit='s', utc=True, errors='coerce'))
+    return parsed
+
+
+def validate_readings(readings: List, known_users: Callable[[List[str]], Iterable[str]]) -> Tuple[pd.DataFrame, List[Dict]]:
+    """
+    Check a batch of readings
+
+    Args:
+        readings: Parsed readings (dicts; None is skipped, anything else is a row error)
+        known_users: Called once with the batch's distinct user_ids; returns
+            the ones that exist
+
+    Returns:
+        ``(rows, errors)``: a DataFrame of valid readings with ``user_id``,
+        ``log_date``, ``log_type``, ``value``, ``unit``, ``notes`` and
+        ``recorded_at`` indexed by input row, and ``[{'row', 'errors'}]`` for
+        the rest, in row order
+    """
+    positions = [row for row, reading in enumerate(readings) if isinstance(reading, dict)]
+    problems = {
+        row: ['reading must be a JSON object']
+        for row, reading in enumerate(readings) if reading is not None and not isinstance(reading, dict)
+    }
+
+    frame = pd.DataFrame([readings[row] for row in positions], index=pd.Index(positions, dtype=int),
+                         columns=list(REQUIRED_FIELDS + OPTIONAL_FIELDS)).astype(object)
+    values = _numbers(frame['value'])
+    recorded = parse_timestamps(frame['timestamp'])
+    user_ids = _non_empty_strings(frame['user_id'])
+    existing = set(known_users(frame['user_id'][user_ids.to_numpy()].unique().tolist()))
+
+    checks = [
+        (user_ids, 'user_id must be a non-empty string'),
+        (~user_ids | frame['user_id'].isin(existing), 'unknown user_id'),
+        (_non_empty_strings(frame['log_type']), 'log_type must be a non-empty string'),
+        (pd.Series(np.isfinite(values.to_numpy(dtype=float)), index=frame.index), 'value must be a finite number'),
+        (recorded.notna(), 'timestamp must be ISO 8601 or epoch seconds'),
+        (_optional_strings(frame['unit']), 'unit must be a string'),
+        (_optional_strings(frame['notes']), 'notes must be a string'),
+    ]
+    valid = pd.Series(True, index=frame.index)
+    for passed, message in checks:
+        for row in frame.index[~passed.to_numpy()]:
+            problems.setdefault(row, []).append(message)
+        valid &= passed
+
+    rows = frame[valid.to_numpy()]
+    instants = recorded[valid.to_numpy()].dt.tz_localize(None).to_numpy()
+    recorded_at = np.datetime_as_string(instants.astype('datetime64[s]')).astype(object)
+    rows = pd.DataFrame({
+        'user_id': rows['user_id'],
+        'log_date': np.datetime_as_string(instants.astype('datetime64[D]')).astype(object),
+        'log_type': rows['log_type'],
+        'value': values[valid.to_numpy()].astype(float),
+        'unit': rows['unit'].where(rows['unit'].notna(), None),
+        'notes': rows['notes'].where(rows['notes'].notna(), ''),
+        'recorded_at': recorded_at,
+    }, index=rows.index)
+
+    errors = [{'row': int(row), 'errors': messages} for row, messages in sorted(problems.items())]
+    return rows, errors
@@ -0,0 +1,114 @@
+"""
+Health Log Rollups
+==================
+
+Trend queries over the pre-aggregated ``health_log_daily`` and
+``health_log_weekly`` tables (see ``dashboard_migrations``) instead of the raw
+health logs.
+
+Each rollup row holds the reading count, value count, total, minimum and
+maximum for one user, log type and day (or Monday-start week). A trigger
+keeps them current for logs inserted one at a time; bulk ingests, which
+carry a device timestamp, are rolled up once per batch with
+``roll_up_logs``. Logs are rolled up on ``date(log_date)``; a log whose date
+SQLite cannot read is kept in ``health_logs`` but left out of the rollups.
+
+A trend over a window reads the daily rows for the days before the window's
+first Monday and the weekly rows from then on - a few dozen rows per log
+type whether the window is 30 days or a year.
+"""
+
+import sqlite3
+from typing import List
+
+GRANULARITIES = ('day', 'week')
+
+_UPSERT_TOTALS = '''
+    ON CONFLICT DO UPDATE SET
+        readings = readings + excluded.readings,
+        value_count = value_count + excluded.value_count,
+        total = total + excluded.total,
+        min_value = COALESCE(MIN(min_value, excluded.min_value), min_value, excluded.min_value),
+        max_value = COALESCE(MAX(max_value, excluded.max_value), max_value, excluded.max_value)
+'''
+
+_NEW_LOGS = '''
+    FROM health_logs
+    WHERE log_id > ? AND recorded_at IS NOT NULL
+      AND user_id IS NOT NULL AND date(log_date) IS NOT NULL AND log_type IS NOT NULL
+'''
+
+ROLL_UP_DAILY = f'''
+    INSERT INTO health_log_daily
+    SELECT user_id, date(log_date), log_type, COUNT(*), COUNT(value), COALESCE(SUM(value), 0), MIN(value), MAX(value)
+    {_NEW_LOGS}
+    GROUP BY 1, 2, 3
+    {_UPSERT_TOTALS}
+'''
+
+ROLL_UP_WEEKLY = f'''
+    INSERT INTO health_log_weekly
+    SELECT user_id, date(log_date, '-6 days', 'weekday 1'), log_type,
+           COUNT(*), COUNT(value), COALESCE(SUM(value), 0), MIN(value), MAX(value)
+    {_NEW_LOGS}
+    GROUP BY 1, 2, 3
+    {_UPSERT_TOTALS}
+'''
+
+# Days from the window start to its first Monday, then whole weeks; the
+# window is open-ended like the raw query it replaces
+TREND_SUMMARY = '''
+    SELECT log_type, SUM(total) / NULLIF(SUM(value_count), 0), MIN(min_value), MAX(max_value), SUM(readings)
+    FROM (
+        SELECT log_type, readings, value_count, total, min_value, max_value
+        FROM health_log_daily
+        WHERE user_id = :user_id AND log_date >= date('now', :window)
+          AND log_date < date('now', :window, 'weekday 1')
+        UNION ALL
+        SELECT log_type, readings, value_count, total, min_value, max_value
+        FROM health_log_weekly
+        WHERE user_id = :user_id AND week_start >= date('now', :window, 'weekday 1')
+    )
+    GROUP BY log_type
+'''
+
+TREND_SERIES = {
+    'day': '''
+        SELECT log_type, log_date, total / NULLIF(value_count, 0), min_value, max_value, readings
+        FROM health_log_daily
+        WHERE user_id = :user_id AND log_date >= date('now', :window)
+        ORDER BY log_type, log_date
+    ''',
+    # Every week the window touches, the first one in full
+    'week': '''
+        SELECT log_type, week_start, total / NULLIF(value_count, 0), min_value, max_value, readings
+        FROM health_log_weekly
+        WHERE user_id = :user_id AND week_start >= date('now', :window, '-6 days', 'weekday 1')
+        ORDER BY log_type, week_start
+    ''',
+}
+
+
+def roll_up_logs(conn: sqlite3.Connection, after_log_id: int):
+    """
+    Add device readings with ``log_id`` above ``after_log_id`` to the rollups
+
+    For the bulk ingest: call it in the transaction that inserted the
+    readings, with the highest ``log_id`` from before the insert.
+    """
+    conn.execute(ROLL_UP_DAILY, (after_log_id,))
+    conn.execute(ROLL_UP_WEEKLY, (after_log_id,))
+
+
+def trend_summary(cursor, user_id: str, days: int = 30) -> List[tuple]:
+    """``(log_type, average, min, max, readings)`` per log type since ``days`` days ago"""
+    cursor.execute(TREND_SUMMARY, {'user_id': user_id, 'window': f'-{int(days)} days'})
+    return cursor.fetchall()
+
+
+def trend_series(cursor, user_id: str, days: int = 90, granularity: str = 'week') -> List[tuple]:
+    """``(log_type, period start, average, min, max, readings)`` per day or week since ``days`` days ago"""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+    cursor.execute(TREND_SERIES[granularity], {'user_id': user_id, 'window': f'-{int(days)} days'})
+    return cursor.fetchall()
@@ -0,0 +1,258 @@
+"""
+Local Background Job Queue
+==========================
+
+Runs slow API work (report extraction, full assessments) off the request
+threads. Submitting a job returns its id immediately; a small pool of worker
+threads drains a bounded in-memory queue, and job status and results are kept
+in a local SQLite database so clients can poll for them.
+
+When the queue is full ``submit`` raises ``JobQueueFull`` instead of letting
+work pile up, so the API can answer 429 and clients back off.
+
+Several processes may share the job database (a reloader child, several
+server workers). Each ``JobStore`` records itself as the owner of the jobs it
+creates and keeps renewing a lease on them in ``job_owners``; only
+unfinished jobs whose owner's lease has run out are failed as orphans, by
+any live store when it starts and each time it renews its lease.
+"""
+
+import os
+import json
+import queue
+import socket
+import sqlite3
+import threading
+import traceback
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+TERMINAL_STATUSES = ('succeeded', 'failed')
+
+# Seconds a job store's lease lasts without renewal before its process counts as gone
+JOB_LEASE_SECONDS = 30
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+
+
+class JobStore:
+    """SQLite-backed record of job status and results"""
+
+    def __init__(self, db_path='api_jobs.db', lease_seconds=JOB_LEASE_SECONDS):
+        """
+        Args:
+            db_path: SQLite database shared by every process serving jobs
+            lease_seconds: Seconds without a renewed lease before this store's
+                unfinished jobs may be failed by another process
+        """
+        self.db_path = Path(db_path)
+        self.lease_seconds = lease_seconds
+        self.owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self._stopped = threading.Event()
+        self.init_database()
+        self._heartbeat = threading.Thread(target=self._beat, name='job-store-heartbeat', daemon=True)
+        self._heartbeat.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def init_database(self):
+        """Create the job tables, register this store as an owner and fail orphaned jobs"""
+        conn = self._connect()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                created_at TIMESTAMP NOT NULL,
+                started_at TIMESTAMP,
+                finished_at TIMESTAMP,
+                result TEXT,
+                error TEXT,
+                owner TEXT
+            )
+        ''')
+        if 'owner' not in {row['name'] for row in conn.execute('PRAGMA table_info(jobs)')}:
+            conn.execute('ALTER TABLE jobs ADD COLUMN owner TEXT')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS job_owners (
+                owner TEXT PRIMARY KEY,
+                lease_expires_at TIMESTAMP NOT NULL
+            )
+        ''')
+        conn.commit()
+        conn.close()
+        self.heartbeat()
+        self.fail_orphaned_jobs()
+
+    def heartbeat(self):
+        """Renew this store's lease on its jobs"""
+        expires_at = (datetime.now() + timedelta(seconds=self.lease_seconds)).isoformat()
+        conn = self._connect()
+        conn.execute('INSERT OR REPLACE INTO job_owners (owner, lease_expires_at) VALUES (?, ?)',
+                     (self.owner, expires_at))
+        conn.commit()
+        conn.close()
+
+    def _beat(self):
+        while not self._stopped.wait(self.lease_seconds / 3):
+            try:
+                self.heartbeat()
+                self.fail_orphaned_jobs()
+            except sqlite3.Error as e:
+                print(f"⚠️ Job store heartbeat failed: {e}")
+
+    def fail_orphaned_jobs(self):
+        """
+        Fail unfinished jobs whose owner's lease ran out (or that have no owner)
+
+        Payloads live in memory only, so such jobs cannot be resumed. Jobs of
+        live processes sharing the database are left alone. Returns how many
+        jobs were failed.
+        """
+        now = datetime.now().isoformat()
+        conn = self._connect()
+        cursor = conn.execute('''
+            UPDATE jobs SET status = 'failed', error = 'Interrupted by server restart', finished_at = ?
+            WHERE status IN ('queued', 'running')
+              AND (owner IS NULL OR owner NOT IN (SELECT owner FROM job_owners WHERE lease_expires_at >= ?))
+        ''', (now, now))
+        conn.execute('DELETE FROM job_owners WHERE lease_expires_at < ?', (now,))
+        conn.commit()
+        conn.close()
+        return cursor.rowcount
+
+    def close(self):
+        """Stop the heartbeat; this store's unfinished jobs become orphans"""
+        self._stopped.set()
+        self._heartbeat.join()
+        conn = self._connect()
+        conn.execute('DELETE FROM job_owners WHERE owner = ?', (self.owner,))
+        conn.commit()
+        conn.close()
+
+    def create(self, kind):
+        job_id = uuid.uuid4().hex
+        conn = self._connect()
+        conn.execute(
+            'INSERT INTO jobs (job_id, kind, status, created_at, owner) VALUES (?, ?, ?, ?, ?)',
+            (job_id, kind, 'queued', datetime.now().isoformat(), self.owner)
+        )
+        conn.commit()
+        conn.close()
+        return job_id
+
+    def delete(self, job_id):
+        conn = self._connect()
+        conn.execute('DELETE FROM jobs WHERE job_id = ?', (job_id,))
+        conn.commit()
+        conn.close()
+
+    def mark_running(self, job_id):
+        self._update(job_id, status='running', started_at=datetime.now().isoformat())
+
+    def mark_succeeded(self, job_id, result):
+        self._update(job_id, status='succeeded', finished_at=datetime.now().isoformat(),
+                     result=json.dumps(result, default=str))
+
+    def mark_failed(self, job_id, error):
+        self._update(job_id, status='failed', finished_at=datetime.now().isoformat(), error=error)
+
+    def _update(self, job_id, **fields):
+        assignments = ', '.join(f'{column} = ?' for column in fields)
+        conn = self._connect()
+        conn.execute(f'UPDATE jobs SET {assignments} WHERE job_id = ?', (*fields.values(), job_id))
+        conn.commit()
+        conn.close()
+
+    def get(self, job_id):
+        """Return the job as a dict (with the decoded result), or None"""
+        conn = self._connect()
+        row = conn.execute('SELECT * FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+        conn.close()
+        if row is None:
+            return None
+
+        job = dict(row)
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def prune(self, max_age_hours=24):
+        """Delete finished jobs older than ``max_age_hours``"""
+        cutoff = (datetime.now() - timedelta(hours=max_age_hours)).isoformat()
+        conn = self._connect()
+        cursor = conn.execute(
+            "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND finished_at < ?", (cutoff,)
+        )
+        conn.commit()
+        conn.close()
+        return cursor.rowcount
+
+
+class JobQueue:
+    """Bounded queue drained by a fixed pool of worker threads"""
+
+    def __init__(self, store, workers=2, max_pending=32):
+        """
+        Args:
+            store: JobStore that records job status and results
+            workers: Number of worker threads
+            max_pending: Jobs allowed to wait in the queue before submissions are rejected
+        """
+        self.store = store
+        self.workers = workers
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._threads = []
+        for index in range(workers):
+            thread = threading.Thread(target=self._work, name=f'job-worker-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, kind, func, *args, **kwargs):
+        """
+        Queue ``func(*args, **kwargs)`` and return the new job id
+
+        ``func`` must return a JSON-serializable result; any exception it raises
+        marks the job failed with the exception message.
+        """
+        job_id = self.store.create(kind)
+        try:
+            self._queue.put_nowait((job_id, func, args, kwargs))
+        except queue.Full:
+            self.store.delete(job_id)
+            raise JobQueueFull(f"Job queue is full ({self._queue.maxsize} pending jobs)")
+        return job_id
+
+    def pending(self):
+        """Approximate number of jobs waiting for a worker"""
+        return self._queue.qsize()
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+
+            job_id, func, args, kwargs = job
+            try:
+                self.store.mark_running(job_id)
+                self.store.mark_succeeded(job_id, func(*args, **kwargs))
+            except Exception as e:
+                print(f"❌ Job {job_id} failed: {e}")
+                self.store.mark_failed(job_id, str(e) or traceback.format_exc(limit=1))
+            finally:
+                self._queue.task_done()
+
+    def shutdown(self):
+        """Finish queued jobs, then stop the workers"""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
@@ -0,0 +1,244 @@
+"""
+Structured Lab Result Parser
+============================
+
+Reads the lab results in a report the way a person does: as
+"Analyte: value unit (range)" lines and as rows of lab result tables
+("Glucose    126    mg/dL    70 - 99"), instead of taking every number
+near a keyword.
+
+One pass over the lines of a document builds an index from field to the
+results found for it (value, unit, reference range, section), so each
+field is then a dictionary lookup. Section headings are tracked, and
+results under history/plan style headings (previous or target values) are
+left out.
+"""
+
+import re
+from typing import Dict, List, Optional
+
+# Extra names labs use for the fields in ``medical_mappings``
+ANALYTE_ALIASES = {
+    'glucose': ['blood glucose', 'random glucose', 'fasting blood sugar', 'fasting plasma glucose',
+                'plasma glucose', 'fbs', 'rbs'],
+    'hba1c': ['glycated hemoglobin', 'glycosylated hemoglobin', 'hemoglobin a1c', 'a1c'],
+    'cholesterol': ['total cholesterol', 'cholesterol total', 'serum cholesterol'],
+    'hdl': ['hdl c', 'hdl cholesterol', 'cholesterol hdl'],
+    'ldl': ['ldl c', 'ldl cholesterol', 'cholesterol ldl'],
+    'triglycerides': ['triglyceride', 'serum triglycerides'],
+    'creatinine': ['serum creatinine', 'creatinine serum'],
+    'urea': ['blood urea nitrogen', 'blood urea', 'serum urea', 'bun'],
+    'hemoglobin': ['haemoglobin', 'hgb', 'hb'],
+    'heart_rate': ['pulse rate', 'heart rate', 'pulse', 'hr'],
+    'bmi': ['body mass index', 'bmi'],
+}
+
+# Words that make a name something other than the analyte it contains
+# ('HDL ratio', 'non-HDL', 'urine glucose', 'target HbA1c')
+EXCLUDED_NAME_WORDS = {'ratio', 'non', 'urine', 'urinary', 'target', 'goal', 'previous', 'prior', 'change'}
+
+# Headings whose results are not current measurements
+SKIPPED_SECTION_WORDS = ('history', 'recommendation', 'plan', 'target', 'goal', 'instruction', 'medication')
+
+# Units may end in '%' for per-100 mL spellings ('g%', 'mg%')
+RESULT_LINE = re.compile(
+    r'^\s*(?:[-*•]\s*)?(?P<name>[a-z][a-z0-9 ,./()\'-]{0,40}?)\s*[:=]\s*'
+    r'(?P<value>[<>]?\s*\d+(?:\.\d+)?)(?![\d/.])\s*'
+    r'(?P<unit>%|[a-zµμ][a-z0-9µμ/^.*]*%?)?'
+    r'(?P<rest>.*)$'
+)
+RANGE_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*(?:-|–|to)\s*(\d+(?:\.\d+)?)|([<>])\s*=?\s*(\d+(?:\.\d+)?)')
+VALUE_CELL = re.compile(r'^[<>]?\s*(\d+(?:\.\d+)?)\s*(?P<unit>%|[a-zµμ][a-z0-9µμ/^.*]*%?)?\s*(?:\(?[hl*]\)?)?$')
+UNIT_CELL = re.compile(r'^(?:%|[a-zµμ][a-z0-9µμ/^.*]*%?)$')
+CELL_SEPARATOR = re.compile(r'\t|\s*\|\s*|\s{2,}')
+DIGIT = re.compile(r'\d')
+SECTION_HEADING = re.compile(r'^\s*([a-z][a-z &/,-]{2,60}?)\s*:?\s*$')
+
+# Result flags and words that are never units
+NOT_UNITS = {'h', 'l', 'high', 'low', 'normal', 'abnormal', 'on', 'at', 'in', 'and', 'to', 'of', 'was', 'is'}
+
+TABLE_NAME_HEADERS = {'test', 'test name', 'analyte', 'parameter', 'investigation', 'component', 'name'}
+TABLE_HEADER_WORDS = {header.split()[0] for header in TABLE_NAME_HEADERS}
+TABLE_VALUE_HEADERS = {'result', 'results', 'value', 'observed value', 'your value'}
+TABLE_UNIT_HEADERS = {'unit', 'units'}
+TABLE_RANGE_HEADERS = {'reference range', 'reference', 'range', 'ref range', 'normal range', 'reference interval',
+                       'biological reference interval'}
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase analyte name without parenthetical notes or punctuation"""
+    name = re.sub(r'\([^)]*\)', ' ', name.lower())
+    return ' '.join(re.sub(r'[^a-z0-9%]+', ' ', name).split())
+
+
+def parse_range(text: str):
+    """``(low, high)`` of the first reference range in ``text``, or (None, None)"""
+    match = RANGE_PATTERN.search(text)
+    if not match:
+        return None, None
+    if match.group(1):
+        return float(match.group(1)), float(match.group(2))
+    bound = float(match.group(4))
+    return (None, bound) if match.group(3) == '<' else (bound, None)
+
+
+class LabTableParser:
+    """Index the lab results in a report by field"""
+
+    def __init__(self, medical_mappings: Dict[str, tuple]):
+        """
+        Args:
+            medical_mappings: Field -> (keywords, units), as on HospitalReportProcessor;
+                the keywords (plus ``ANALYTE_ALIASES``) are the analyte names
+        """
+        self.aliases = {}
+        for field, (keywords, _) in medical_mappings.items():
+            for name in list(keywords) + ANALYTE_ALIASES.get(field, []):
+                self.aliases.setdefault(normalize_name(name), field)
+        # Longest first, for names that contain an alias ('fasting serum glucose')
+        self.alias_words = sorted(((tuple(alias.split()), field) for alias, field in self.aliases.items()),
+                                  key=lambda item: len(item[0]), reverse=True)
+
+    def resolve(self, name: str) -> Optional[str]:
+        """Field for an analyte name, or None"""
+        name = normalize_name(name)
+        if name in self.aliases:
+            return self.aliases[name]
+
+        words = name.split()
+        if not words or len(words) > 6 or EXCLUDED_NAME_WORDS.intersection(words):
+            return None
+        for alias_words, field in self.alias_words:
+            size = len(alias_words)
+            for start in range(len(words) - size + 1):
+                if tuple(words[start:start + size]) == alias_words:
+                    return field
+        return None
+
+    def parse(self, text: str) -> Dict[str, List[dict]]:
+        """
+        Index of the lab results in ``text``
+
+        Returns ``{field: [result, ...]}`` in document order; each result is
+        ``{'analyte', 'value', 'unit', 'low', 'high', 'section'}``.
+        """
+        return self.parse_with_remainder(text)[0]
+
+    def parse_with_remainder(self, text: str):
+        """``parse`` plus the text of every line that was not a lab result"""
+        index = {}
+        remainder = []
+        section = None
+        skip_section = False
+        columns = None
+
+        # Lowercase once; the original lines are only needed for the case of headings
+        for line, lower in zip(text.split('\n'), text.lower().split('\n')):
+            lower = lower.strip()
+            if not lower:
+                columns = None
+                remainder.append(line)
+                continue
+
+            if not DIGIT.search(lower):
+                # Section headings ('LABORATORY RESULTS:') and table headers
+                if lower.endswith(':') or line.isupper():
+                    heading = SECTION_HEADING.match(lower)
+                    if heading:
+                        section = heading.group(1)
+                        skip_section = any(word in section for word in SKIPPED_SECTION_WORDS)
+                        columns = None
+                elif lower.split(None, 1)[0] in TABLE_HEADER_WORDS:
+                    columns = self._table_columns(lower) or columns
+                remainder.append(line)
+                continue
+
+            result = None if skip_section else self._parse_line(lower, columns)
+            if result is None:
+                remainder.append(line)
+                continue
+
+            field, result = result
+            result['section'] = section
+            index.setdefault(field, []).append(result)
+
+        return index, '\n'.join(remainder)
+
+    @staticmethod
+    def _table_columns(lower):
+        """Column positions from a lab table header row, or None"""
+        cells = [cell for cell in CELL_SEPARATOR.split(lower) if cell]
+        if len(cells) < 2 or cells[0] not in TABLE_NAME_HEADERS:
+            return None
+        columns = {}
+        for position, cell in enumerate(cells):
+            if cell in TABLE_VALUE_HEADERS:
+                columns.setdefault('value', position)
+            elif cell in TABLE_UNIT_HEADERS:
+                columns.setdefault('unit', position)
+            elif cell in TABLE_RANGE_HEADERS:
+                columns.setdefault('range', position)
+        return columns if 'value' in columns else None
+
+    def _parse_line(self, lower, columns):
+        """``(field, result)`` for a result line or table row, or None"""
+        match = RESULT_LINE.match(lower)
+        if match:
+            field = self.resolve(match.group('name'))
+            if field is None:
+                return None
+            unit = match.group('unit')
+            if unit in NOT_UNITS:
+                unit = None
+            low, high = parse_range(match.group('rest'))
+            return field, self._result(match.group('name'), match.group('value'), unit, low, high)
+
+        if not CELL_SEPARATOR.search(lower):
+            return None
+        cells = [cell for cell in CELL_SEPARATOR.split(lower) if cell]
+        if len(cells) < 2:
+            return None
+        field = self.resolve(cells[0])
+        if field is None:
+            return None
+
+        result = self._table_row(cells, columns) if columns else self._free_row(cells)
+        return (field, result) if result else None
+
+    def _table_row(self, cells, columns):
+        """Result from a row under a recognised table header"""
+        def cell(name):
+            position = columns.get(name)
+            return cells[position] if position is not None and position < len(cells) else ''
+
+        value = VALUE_CELL.match(cell('value'))
+        if not value:
+            return self._free_row(cells)
+        unit = cell('unit') if UNIT_CELL.match(cell('unit')) else value.group('unit')
+        low, high = parse_range(cell('range'))
+        return self._result(cells[0], value.group(1), unit, low, high)
+
+    def _free_row(self, cells):
+        """Result from a row of cells without a header: the first numeric cell,
+        the unit after it and any reference range"""
+        for position, text in enumerate(cells[1:], 1):
+            value = VALUE_CELL.match(text)
+            if not value:
+                continue
+            unit = value.group('unit')
+            rest = cells[position + 1:]
+            if unit is None and rest and UNIT_CELL.match(rest[0]) and rest[0] not in NOT_UNITS:
+                unit = rest[0]
+            low, high = parse_range(' '.join(rest))
+            return self._result(cells[0], value.group(1), unit, low, high)
+        return None
+
+    @staticmethod
+    def _result(name, value, unit, low, high):
+        return {
+            'analyte': normalize_name(name),
+            'value': float(re.sub(r'[<>\s]', '', value)),
+            'unit': unit if unit not in NOT_UNITS else None,
+            'low': low,
+            'high': high
+        }
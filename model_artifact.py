@@ -0,0 +1,245 @@
+"""
+Versioned, Memory-Mappable Model Artifacts
+==========================================
+
+A model artifact is a directory with three files:
+
+- ``manifest.json``: schema version, content hash, buffer table and a small
+  metadata summary that can be read without loading the model
+- ``graph.pkl``: the object graph (estimators, encoders, settings) pickled
+  with protocol 5 and every NumPy array taken out of band
+- ``arrays.bin``: the raw bytes of those arrays, 64-byte aligned
+
+Loading memory-maps ``arrays.bin`` and hands the mapped slices back to the
+unpickler, so arrays that are kept as they are (coefficient tables, scaler
+means/scales) are read lazily and their pages are shared between worker
+processes that load the same artifact. ``graph.pkl`` is still a plain pickle,
+and objects that rebuild their arrays on unpickling copy them out of the
+mapping: scikit-learn trees copy their node arrays in ``__setstate__``, so
+tree ensembles (random forests, gradient boosting) get private copies in
+each process rather than shared pages. Verifying the content hash on load
+(the default) reads every byte of the mapping once, so pass ``verify=False``
+where load time matters more than catching a corrupted file.
+
+Each save writes a new version directory (``<name>.v<timestamp>``) and
+points the artifact path, a symlink, at it.
+
+Usage:
+    python model_artifact.py enhanced_chronic_disease_model_*.pkl
+converts legacy pickle models into artifacts next to them.
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import pickle
+import hashlib
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+SCHEMA_VERSION = 1
+ARTIFACT_SUFFIX = '.model'
+MANIFEST_FILE = 'manifest.json'
+GRAPH_FILE = 'graph.pkl'
+ARRAYS_FILE = 'arrays.bin'
+ALIGNMENT = 64
+
+
+def is_artifact(path):
+    """True if ``path`` is a model artifact directory"""
+    return (Path(path) / MANIFEST_FILE).is_file()
+
+
+def save_artifact(obj, path, metadata=None):
+    """
+    Write ``obj`` as a model artifact at ``path``
+
+    The artifact is assembled in a new version directory next to ``path``
+    and ``path`` is then re-pointed at it by atomically replacing a symlink:
+    readers see the previous version or the new one, never a missing or
+    partial artifact. The previous version is kept for readers still loading
+    it; older versions are removed. Where symlinks are not available (some
+    Windows setups) the directories are swapped by two renames instead, and
+    ``path`` is briefly missing.
+
+    Returns the manifest dict.
+    """
+    path = Path(path)
+    buffers = []
+    graph = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+
+    tmp_path = path.with_name(path.name + '.tmp')
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    tmp_path.mkdir(parents=True)
+
+    digest = hashlib.sha256(graph)
+    buffer_table = []
+    offset = 0
+    with open(tmp_path / ARRAYS_FILE, 'wb') as f:
+        for buffer in buffers:
+            raw = buffer.raw()
+            padding = -offset % ALIGNMENT
+            if padding:
+                f.write(b'\0' * padding)
+                digest.update(b'\0' * padding)
+                offset += padding
+            f.write(raw)
+            digest.update(raw)
+            buffer_table.append([offset, raw.nbytes])
+            offset += raw.nbytes
+
+    (tmp_path / GRAPH_FILE).write_bytes(graph)
+
+    manifest = {
+        'schema_version': SCHEMA_VERSION,
+        'created_at': datetime.now().isoformat(),
+        'content_hash': f'sha256:{digest.hexdigest()}',
+        'graph': {'file': GRAPH_FILE, 'nbytes': len(graph)},
+        'arrays': {'file': ARRAYS_FILE, 'nbytes': offset, 'alignment': ALIGNMENT, 'buffers': buffer_table},
+        'metadata': metadata or {}
+    }
+    with open(tmp_path / MANIFEST_FILE, 'w') as f:
+        json.dump(manifest, f, indent=2, default=str)
+
+    version_path = path.with_name(f'{path.name}.v{time.time_ns()}')
+    tmp_path.rename(version_path)
+    if path.is_symlink():
+        previous = path.resolve()
+    elif path.is_dir():
+        previous = path.with_name(f'{path.name}.v0').resolve()  # Where _point_to moves it
+    else:
+        previous = None
+    try:
+        _point_to(path, version_path)
+    except (OSError, NotImplementedError):
+        _swap_directory(path, version_path)
+        return manifest
+
+    # Keep the version just replaced for readers that resolved it already
+    for old_version in path.parent.glob(f'{glob.escape(path.name)}.v*'):
+        if old_version.is_dir() and old_version.resolve() not in (version_path.resolve(), previous):
+            shutil.rmtree(old_version, ignore_errors=True)
+
+    return manifest
+
+
+def _point_to(path, version_path):
+    """Atomically make ``path`` a symlink to ``version_path``"""
+    link = path.with_name(path.name + '.link')
+    if link.is_symlink() or link.exists():
+        link.unlink()
+    os.symlink(version_path.name, link, target_is_directory=True)
+    if path.is_dir() and not path.is_symlink():
+        # An artifact saved before versioning: moved aside (once) so the link
+        # can take its place
+        path.rename(path.with_name(f'{path.name}.v0'))
+    os.replace(link, path)
+
+
+def _swap_directory(path, version_path):
+    """Fallback without symlinks: move ``version_path`` to ``path`` by renames"""
+    old_path = path.with_name(path.name + '.old')
+    shutil.rmtree(old_path, ignore_errors=True)
+    if path.is_symlink():
+        path.unlink()
+    elif path.exists():
+        path.rename(old_path)
+    version_path.rename(path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def read_manifest(path):
+    """Read and validate an artifact manifest"""
+    with open(Path(path) / MANIFEST_FILE, 'r') as f:
+        manifest = json.load(f)
+
+    if manifest.get('schema_version') != SCHEMA_VERSION:
+        raise ValueError(
+            f"Unsupported artifact schema version {manifest.get('schema_version')} "
+            f"(expected {SCHEMA_VERSION})"
+        )
+    return manifest
+
+
+def load_artifact(path, mmap=True, verify=True):
+    """
+    Load the object stored in a model artifact
+
+    Args:
+        path: Artifact directory
+        mmap: Memory-map the array data (read-only) instead of reading it
+        verify: Check the content hash against the manifest. This hashes all
+            of the array data, so every page of the mapping is read at load
+            time rather than on first use
+    """
+    path = Path(path)
+    while True:
+        # Every file comes from the same version, even if a save swaps it meanwhile
+        version_path = path.resolve()
+        try:
+            return _load_version(version_path, mmap, verify)
+        except FileNotFoundError:
+            # Newer saves pruned that version mid-load: read the current one
+            if path.resolve() == version_path:
+                raise
+
+
+def _load_version(path, mmap, verify):
+    manifest = read_manifest(path)
+    graph = (path / manifest['graph']['file']).read_bytes()
+
+    arrays_path = path / manifest['arrays']['file']
+    if manifest['arrays']['nbytes'] == 0:
+        arrays = np.empty(0, dtype=np.uint8)
+    elif mmap:
+        arrays = np.memmap(arrays_path, dtype=np.uint8, mode='r')
+    else:
+        arrays = np.fromfile(arrays_path, dtype=np.uint8)
+
+    if verify:
+        digest = hashlib.sha256(graph)
+        digest.update(arrays)
+        if f'sha256:{digest.hexdigest()}' != manifest['content_hash']:
+            raise ValueError(f"Content hash mismatch for artifact {path}")
+
+    buffers = [arrays[offset:offset + nbytes] for offset, nbytes in manifest['arrays']['buffers']]
+    return pickle.loads(graph, buffers=buffers)
+
+
+def convert_pickle(pickle_path, artifact_path=None):
+    """Convert a legacy pickled model file into an artifact next to it"""
+    pickle_path = Path(pickle_path)
+    artifact_path = Path(artifact_path) if artifact_path else pickle_path.with_suffix(ARTIFACT_SUFFIX)
+
+    with open(pickle_path, 'rb') as f:
+        obj = pickle.load(f)
+
+    metadata = {'source': pickle_path.name}
+    if isinstance(obj, dict) and obj.get('model') is not None:
+        metadata['estimator'] = type(obj['model']).__name__
+    if isinstance(obj, dict) and isinstance(obj.get('metadata'), dict):
+        metadata.update({
+            key: obj['metadata'].get(key)
+            for key in ('model_type', 'auc_score', 'training_date') if key in obj['metadata']
+        })
+
+    return save_artifact(obj, artifact_path, metadata)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python model_artifact.py <model.pkl> [<model.pkl> ...]")
+        sys.exit(1)
+
+    for pickle_file in sys.argv[1:]:
+        try:
+            manifest = convert_pickle(pickle_file)
+            print(f"✅ {pickle_file} -> {Path(pickle_file).with_suffix(ARTIFACT_SUFFIX)} "
+                  f"({manifest['arrays']['nbytes']} array bytes, {manifest['content_hash'][:19]}...)")
+        except Exception as e:
+            print(f"❌ Error converting {pickle_file}: {e}")
@@ -0,0 +1,195 @@
+"""
+Shared Model Registry
+=====================
+
+One inference predictor per model directory per process. Every saved model
+is registered at startup but only loaded the first time a request needs that
+disease, and building the registry never creates the dataset fetcher (no
+Kaggle authentication or other network-oriented code at server startup).
+
+The registry also hot-reloads models: ``reload()`` (called by the admin
+endpoint or the directory watcher) loads changed models into a fresh
+predictor in the background and swaps it in with a single reference
+assignment. Requests already scoring on the old predictor finish on it.
+"""
+
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from enhanced_chronic_disease_predictor import EnhancedChronicDiseasePredictor
+from model_artifact import is_artifact, read_manifest
+
+
+def model_version(model_file):
+    """Version label of a saved model: the artifact content hash, or size and
+    mtime for legacy pickles. None if the file cannot be read right now."""
+    try:
+        if is_artifact(model_file):
+            return read_manifest(model_file)['content_hash'][:19]
+        stat = os.stat(model_file)
+        return f'pkl:{stat.st_size}-{int(stat.st_mtime)}'
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+class ModelRegistry:
+    """Process-wide owner of the serving predictor and its lazily loaded models"""
+
+    def __init__(self, model_dir='.'):
+        self.model_dir = Path(model_dir)
+        self._predictor = EnhancedChronicDiseasePredictor.for_inference(self.model_dir)
+        self.versions = {
+            disease: model_version(model_file)
+            for disease, model_file in self._predictor.model_files.items()
+        }
+        self.swapped_at = {}
+
+        self._reload_lock = threading.Lock()
+        self._swap_listeners = []
+        self._watcher = None
+        self._stop_watching = threading.Event()
+
+    @property
+    def predictor(self):
+        """The predictor currently serving requests"""
+        return self._predictor
+
+    def available_diseases(self):
+        """Diseases with a saved model, loaded or not"""
+        return self._predictor.available_diseases()
+
+    def warm_up(self, diseases=None):
+        """Eagerly load models (all by default); returns the diseases that loaded"""
+        predictor = self._predictor
+        diseases = diseases if diseases is not None else predictor.available_diseases()
+        return [disease for disease in diseases if predictor.ensure_loaded(disease)]
+
+    def model_info(self, disease):
+        """Describe a model without forcing it to load"""
+        predictor = self._predictor
+        model = predictor.models.get(disease)
+        model_file = predictor.model_files.get(disease)
+        info = {
+            'name': disease,
+            'loaded': model is not None,
+            'model_type': type(model).__name__ if model is not None else None,
+            'model_file': str(model_file) if model_file else None,
+            'version': self.versions.get(disease),
+            'swapped_at': self.swapped_at.get(disease)
+        }
+
+        # Artifacts carry a metadata summary in their manifest
+        if model is None and model_file is not None and is_artifact(model_file):
+            try:
+                info['model_type'] = read_manifest(model_file)['metadata'].get('estimator')
+            except Exception as e:
+                print(f"⚠️ Could not read manifest for {disease}: {e}")
+
+        return info
+
+    def add_swap_listener(self, listener):
+        """Call ``listener(new_predictor)`` after every predictor swap"""
+        if listener not in self._swap_listeners:
+            self._swap_listeners.append(listener)
+
+    def reload(self, diseases=None):
+        """
+        Pick up new or changed model files and swap them in
+
+        Changed models that were already in memory are loaded before the swap,
+        so the first request on the new version does not pay for loading.
+        Unchanged models are carried over without touching the disk. A model
+        that fails to load keeps serving its previous version.
+
+        Returns ``{disease: new_version}`` for the models that were swapped.
+        """
+        with self._reload_lock:
+            current = self._predictor
+            model_files = EnhancedChronicDiseasePredictor.discover_model_files(self.model_dir)
+            disk_versions = {disease: model_version(model_file) for disease, model_file in model_files.items()}
+            changed = [
+                disease for disease, version in disk_versions.items()
+                if version is not None and version != self.versions.get(disease)
+                and (diseases is None or disease in diseases)
+            ]
+            if not changed:
+                return {}
+
+            # Request threads lazy-load into current.models; snapshot it under
+            # the same lock so it cannot change while we iterate
+            with current._load_lock:
+                loaded = list(current.models)
+
+            replacement = EnhancedChronicDiseasePredictor()
+            replacement.model_files = dict(current.model_files)
+            for disease in loaded:
+                if disease not in changed:
+                    replacement._apply_model_data(current._model_data(disease), disease)
+
+            swapped = {}
+            for disease in changed:
+                if disease in loaded:
+                    print(f"🔄 Loading new {disease} model ({disk_versions[disease]})...")
+                    if not replacement.load_model(str(model_files[disease]), disease):
+                        replacement._apply_model_data(current._model_data(disease), disease)
+                        continue
+                replacement.model_files[disease] = model_files[disease]
+                swapped[disease] = disk_versions[disease]
+
+            if not swapped:
+                return {}
+
+            # The swap itself: one reference assignment
+            self._predictor = replacement
+            now = datetime.now().isoformat()
+            for disease, version in swapped.items():
+                self.versions[disease] = version
+                self.swapped_at[disease] = now
+
+            for listener in self._swap_listeners:
+                try:
+                    listener(replacement)
+                except Exception as e:
+                    print(f"⚠️ Model swap listener failed: {e}")
+
+            print(f"✅ Swapped in new models: {', '.join(f'{d} ({v})' for d, v in swapped.items())}")
+            return swapped
+
+    def start_watching(self, interval=10.0):
+        """Poll the model directory every ``interval`` seconds and reload changes"""
+        if self._watcher is not None:
+            return
+
+        def watch():
+            while not self._stop_watching.wait(interval):
+                try:
+                    self.reload()
+                except Exception as e:
+                    print(f"⚠️ Model reload failed: {e}")
+
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(target=watch, name='model-registry-watcher', daemon=True)
+        self._watcher.start()
+        print(f"👀 Watching {self.model_dir} for model updates every {interval}s")
+
+    def stop_watching(self):
+        """Stop the directory watcher, if running"""
+        if self._watcher is not None:
+            self._stop_watching.set()
+            self._watcher.join()
+            self._watcher = None
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_model_registry(model_dir='.'):
+    """Return the process-wide registry for ``model_dir``, creating it once"""
+    key = Path(model_dir).resolve()
+    with _registries_lock:
+        if key not in _registries:
+            _registries[key] = ModelRegistry(model_dir)
+        return _registries[key]
@@ -0,0 +1,69 @@
+"""
+Fused multi-disease scoring for a single patient
+================================================
+
+Scores one patient profile against every loaded disease model in one call.
+The profile is mapped to all disease feature sets in a single pass, each
+model's base learners are evaluated once (their probabilities feed both the
+risk score and the confidence), and the per-disease work can optionally fan
+out over a persistent thread pool.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+
+class MultiDiseaseScorer:
+    """Score one patient across diabetes, heart disease, kidney disease, stroke, hypertension and COPD"""
+
+    def __init__(self, predictor, feature_mapper: Callable[[Dict, List[str]], Dict[str, Dict]],
+                 max_workers: Optional[int] = None):
+        """
+        Args:
+            predictor: EnhancedChronicDiseasePredictor with loaded models
+            feature_mapper: Callable mapping a patient profile and a list of
+                diseases to ``{disease: disease_features}`` in one pass
+            max_workers: Size of the thread pool used to score diseases in
+                parallel; ``None`` or ``1`` scores them serially
+        """
+        self.predictor = predictor
+        self.feature_mapper = feature_mapper
+        self.max_workers = max_workers
+
+        # Created once so requests never pay for pool start-up
+        self._executor = ThreadPoolExecutor(max_workers=max_workers) if max_workers and max_workers > 1 else None
+
+    def score(self, patient_profile: Dict, diseases: Optional[List[str]] = None,
+              disease_features: Optional[Dict[str, Dict]] = None) -> Dict[str, Dict]:
+        """
+        Score ``patient_profile`` for each requested disease
+
+        ``disease_features`` may carry an already computed ``feature_mapper``
+        result so callers that inspect the mapping do not pay for it twice.
+
+        Returns ``{disease: risk_result}`` for the diseases that could be
+        assessed, in the order requested.
+        """
+        available = self.predictor.available_diseases()
+        diseases = [d for d in (diseases if diseases is not None else available) if d in available]
+
+        if disease_features is None:
+            disease_features = self.feature_mapper(patient_profile, diseases)
+        jobs = [(disease, disease_features.get(disease)) for disease in diseases if disease_features.get(disease)]
+
+        if self._executor is not None and len(jobs) > 1:
+            futures = [
+                (disease, self._executor.submit(self.predictor.predict_risk_score, features, disease))
+                for disease, features in jobs
+            ]
+            results = [(disease, future.result()) for disease, future in futures]
+        else:
+            results = [(disease, self.predictor.predict_risk_score(features, disease)) for disease, features in jobs]
+
+        return {disease: risk_result for disease, risk_result in results if risk_result}
+
+    def shutdown(self):
+        """Release the worker threads, if any"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
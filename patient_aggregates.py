@@ -0,0 +1,257 @@
+"""
+Incremental Per-Patient Aggregates
+==================================
+
+Keeps a running summary of every patient's report values in a local SQLite
+database, so a new report updates the patient's aggregate in O(1) per field
+instead of re-reading the whole history.
+
+For each numeric field the store keeps the count, running sum, last value
+and first/last report times, plus the running sums a least-squares line
+needs (sum of t, t^2 and t*y, with t in days). That gives a real trend:
+the fitted slope per day, labelled increasing/decreasing/stable.
+
+Reports are identified by their source file's content hash and their
+extracted values, so submitting the same report for a patient twice does not
+count it twice, while two files that happen to give the same values do.
+"""
+
+import json
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+from pathlib import Path
+
+# Fields averaged and trended; everything else is taken from the latest report
+NUMERICAL_FIELDS = ['glucose', 'hba1c', 'cholesterol', 'hdl', 'ldl', 'triglycerides',
+                    'creatinine', 'urea', 'hemoglobin', 'heart_rate', 'bmi',
+                    'systolic', 'diastolic']
+CATEGORICAL_FIELDS = ['gender', 'age']
+
+# Change over the observed period, relative to the mean, below which a
+# field counts as stable
+TREND_TOLERANCE = 0.05
+
+# Per-report bookkeeping keys that are not part of a report's identity
+VOLATILE_KEYS = ('source_file', 'extraction_date', 'pages_read', 'stop_reason')
+
+
+def fit_slope(count, sum_t, sum_y, sum_tt, sum_ty):
+    """Least-squares slope from running sums, or None without two distinct times"""
+    denominator = count * sum_tt - sum_t * sum_t
+    if count < 2 or abs(denominator) < 1e-12:
+        return None
+    return (count * sum_ty - sum_t * sum_y) / denominator
+
+
+def classify_trend(slope, span, mean):
+    """'increasing', 'decreasing' or 'stable' for a slope over a span of time"""
+    if slope is None or not span:
+        return 'stable'
+    change = slope * span
+    if abs(change) <= TREND_TOLERANCE * max(abs(mean), 1e-9):
+        return 'stable'
+    return 'increasing' if change > 0 else 'decreasing'
+
+
+def report_key(report_data):
+    """Identity of a report: a hash of its extracted values, which include the
+    ``source_hash`` of its file's bytes when it came from ``combine_reports``"""
+    values = {key: value for key, value in report_data.items() if key not in VOLATILE_KEYS}
+    return hashlib.sha256(json.dumps(values, sort_keys=True, default=float).encode('utf-8')).hexdigest()
+
+
+def report_time(report_data):
+    """When a report was taken: its report date, else when it was extracted"""
+    for key in ('report_date', 'extraction_date'):
+        if report_data.get(key):
+            try:
+                return datetime.fromisoformat(str(report_data[key]))
+            except ValueError:
+                continue
+    return datetime.now()
+
+
+class PatientAggregateStore:
+    """SQLite-backed running aggregates of each patient's report values"""
+
+    def __init__(self, db_path='patient_aggregates.db'):
+        self.db_path = Path(db_path)
+        self._initialized = False
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if not self._initialized:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        if not self._initialized:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS field_aggregates (
+                    patient_id TEXT NOT NULL,
+                    field TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    total REAL NOT NULL,
+                    last_value REAL,
+                    origin_at TIMESTAMP NOT NULL,
+                    first_at TIMESTAMP NOT NULL,
+                    last_at TIMESTAMP NOT NULL,
+                    sum_t REAL NOT NULL,
+                    sum_tt REAL NOT NULL,
+                    sum_ty REAL NOT NULL,
+                    PRIMARY KEY (patient_id, field)
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS patient_attributes (
+                    patient_id TEXT NOT NULL,
+                    field TEXT NOT NULL,
+                    value TEXT,
+                    observed_at TIMESTAMP NOT NULL,
+                    PRIMARY KEY (patient_id, field)
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS patient_reports (
+                    patient_id TEXT NOT NULL,
+                    report_key TEXT NOT NULL,
+                    source_file TEXT,
+                    report_time TIMESTAMP NOT NULL,
+                    added_at TIMESTAMP NOT NULL,
+                    PRIMARY KEY (patient_id, report_key)
+                )
+            ''')
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    def add_reports(self, patient_id, reports):
+        """
+        Fold new reports into a patient's aggregate
+
+        Reports already added for this patient are skipped. Returns the updated
+        aggregate (see ``get_aggregate``).
+        """
+        with self._lock:
+            conn = self._connect()
+            try:
+                for report_data in reports:
+                    self._add_report(conn, patient_id, report_data)
+                conn.commit()
+            finally:
+                conn.close()
+        return self.get_aggregate(patient_id)
+
+    def _add_report(self, conn, patient_id, report_data):
+        key = report_key(report_data)
+        taken_at = report_time(report_data)
+        inserted = conn.execute(
+            'INSERT OR IGNORE INTO patient_reports (patient_id, report_key, source_file, report_time, added_at) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (patient_id, key, report_data.get('source_file'), taken_at.isoformat(), datetime.now().isoformat())
+        ).rowcount
+        if not inserted:
+            return False
+
+        for field in NUMERICAL_FIELDS:
+            value = report_data.get(field)
+            if value is None:
+                continue
+            value = float(value)
+
+            row = conn.execute(
+                'SELECT origin_at, first_at, last_at FROM field_aggregates WHERE patient_id = ? AND field = ?',
+                (patient_id, field)
+            ).fetchone()
+            if row is None:
+                conn.execute('''
+                    INSERT INTO field_aggregates
+                    (patient_id, field, count, total, last_value, origin_at, first_at, last_at, sum_t, sum_tt, sum_ty)
+                    VALUES (?, ?, 1, ?, ?, ?, ?, ?, 0, 0, 0)
+                ''', (patient_id, field, value, value, taken_at.isoformat(), taken_at.isoformat(), taken_at.isoformat()))
+                continue
+
+            origin_at, first_at, last_at = (datetime.fromisoformat(t) for t in row)
+            t = (taken_at - origin_at).total_seconds() / 86400
+            is_latest = taken_at >= last_at
+            conn.execute('''
+                UPDATE field_aggregates SET
+                    count = count + 1, total = total + ?,
+                    sum_t = sum_t + ?, sum_tt = sum_tt + ?, sum_ty = sum_ty + ?,
+                    last_value = CASE WHEN ? THEN ? ELSE last_value END,
+                    first_at = ?, last_at = ?
+                WHERE patient_id = ? AND field = ?
+            ''', (value, t, t * t, t * value, is_latest, value,
+                  min(first_at, taken_at).isoformat(), max(last_at, taken_at).isoformat(), patient_id, field))
+
+        for field in CATEGORICAL_FIELDS:
+            value = report_data.get(field)
+            if value is None:
+                continue
+            conn.execute('''
+                INSERT INTO patient_attributes (patient_id, field, value, observed_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT(patient_id, field) DO UPDATE SET value = excluded.value, observed_at = excluded.observed_at
+                WHERE excluded.observed_at >= patient_attributes.observed_at
+            ''', (patient_id, field, json.dumps(value, default=float), taken_at.isoformat()))
+        return True
+
+    def get_aggregate(self, patient_id):
+        """
+        The patient's aggregate, shaped like ``aggregate_medical_data`` output
+
+        Numeric fields map to ``{'latest', 'average', 'trend', 'values_count',
+        'slope_per_day', 'first_at', 'last_at'}`` (or None); age and gender to
+        their most recent value. Returns {} for an unknown patient.
+        """
+        conn = self._connect()
+        rows = conn.execute('''
+            SELECT field, count, total, last_value, first_at, last_at, sum_t, sum_tt, sum_ty
+            FROM field_aggregates WHERE patient_id = ?
+        ''', (patient_id,)).fetchall()
+        attributes = dict(conn.execute(
+            'SELECT field, value FROM patient_attributes WHERE patient_id = ?', (patient_id,)
+        ).fetchall())
+        report_count = conn.execute(
+            'SELECT COUNT(*) FROM patient_reports WHERE patient_id = ?', (patient_id,)
+        ).fetchone()[0]
+        conn.close()
+
+        if not report_count:
+            return {}
+
+        aggregated = {field: None for field in NUMERICAL_FIELDS}
+        for field, count, total, last_value, first_at, last_at, sum_t, sum_tt, sum_ty in rows:
+            mean = total / count
+            slope = fit_slope(count, sum_t, total, sum_tt, sum_ty)
+            span = (datetime.fromisoformat(last_at) - datetime.fromisoformat(first_at)).total_seconds() / 86400
+            aggregated[field] = {
+                'latest': last_value,
+                'average': mean,
+                'trend': classify_trend(slope, span, mean),
+                'values_count': count,
+                'slope_per_day': slope,
+                'first_at': first_at,
+                'last_at': last_at
+            }
+
+        for field in CATEGORICAL_FIELDS:
+            aggregated[field] = json.loads(attributes[field]) if field in attributes else None
+
+        return aggregated
+
+    def report_count(self, patient_id):
+        """Number of distinct reports folded into the patient's aggregate"""
+        conn = self._connect()
+        count = conn.execute('SELECT COUNT(*) FROM patient_reports WHERE patient_id = ?', (patient_id,)).fetchone()[0]
+        conn.close()
+        return count
+
+    def delete_patient(self, patient_id):
+        """Forget everything stored for a patient"""
+        with self._lock:
+            conn = self._connect()
+            for table in ('field_aggregates', 'patient_attributes', 'patient_reports'):
+                conn.execute(f'DELETE FROM {table} WHERE patient_id = ?', (patient_id,))
+            conn.commit()
+            conn.close()
@@ -1,15 +1,336 @@
 import pandas as pd
 import numpy as np
 import re
+import io
+import os
+import time
+import signal
+import threading
+import contextlib
+import zipfile
+import xml.etree.ElementTree as ET
 from datetime import datetime
 import json
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, wait
+from extraction_cache import file_content_hash
+from lab_table_parser import LabTableParser
+from unit_registry import UnitRegistry
+from patient_aggregates import CATEGORICAL_FIELDS, NUMERICAL_FIELDS, classify_trend, fit_slope, report_time
 import PyPDF2
-import docx
+from bisect import bisect_left
 from typing import Dict, List, Union, Optional
 
+# Bump whenever extraction results change, so cached extractions are redone
+EXTRACTOR_VERSION = 5
+
+NUMBER_PATTERN = re.compile(r'\b(\d+(?:\.\d+)?)\b')
+
+class MedicalExtractionEngine:
+    """
+    Single-pass keyword/unit extractor for ``extract_medical_data``
+
+    All keyword and unit patterns are compiled once. Extraction lowercases the
+    report once, finds every keyword occurrence with one alternation scan and
+    every "number [unit]" candidate with one digit scan, then resolves each
+    field from those two indexes. The values (and their order) are the same as
+    calling ``extract_numerical_values`` for every keyword and unit, but the
+    cost grows with the length of the report rather than with length x
+    keywords x units.
+    """
+    
+    def __init__(self, medical_mappings: Dict[str, tuple], window_before: int = 25, window_after: int = 50):
+        self.medical_mappings = medical_mappings
+        self.window_before = window_before
+        self.window_after = window_after
+        
+        self.keywords = sorted({keyword for keywords, _ in medical_mappings.values() for keyword in keywords},
+                               key=len, reverse=True)
+        self.units = sorted({unit for _, units in medical_mappings.values() for unit in units})
+        
+        # Longest keyword first, so the match at a position tells us every
+        # keyword that starts there: the ones that are a prefix of it
+        self.keyword_pattern = re.compile('|'.join(re.escape(k) for k in self.keywords))
+        self.keyword_prefixes = {
+            keyword: [other for other in self.keywords if keyword.startswith(other)]
+            for keyword in self.keywords
+        }
+        # Same trick for units: the longest unit that follows a number, plus
+        # every unit that is a prefix of it ('' matches after any number).
+        # A keyword ending in a letter is never followed by the middle of a
+        # number, so only the starts of numbers need to be indexed.
+        units_by_length = sorted((unit for unit in self.units if unit), key=len, reverse=True)
+        number_start = '' if any(keyword[-1].isdigit() for keyword in self.keywords) else r'(?<!\d)'
+        self.number_pattern = re.compile(
+            number_start + r'(?=(\d+(?:\.\d+)?)(\s*)(' + '|'.join(re.escape(u) for u in units_by_length) + ')?)'
+        )
+        self.unit_prefixes = {
+            unit: [other for other in self.units if unit.startswith(other)]
+            for unit in self.units
+        }
+    
+    def index_keywords(self, text_lower: str) -> Dict[str, List[int]]:
+        """Start positions of every keyword (non-overlapping per keyword, like re.finditer)"""
+        positions = {keyword: [] for keyword in self.keywords}
+        next_allowed = dict.fromkeys(self.keywords, 0)
+        match = self.keyword_pattern.search(text_lower)
+        while match:
+            start = match.start()
+            for keyword in self.keyword_prefixes[match.group()]:
+                if start >= next_allowed[keyword]:
+                    positions[keyword].append(start)
+                    next_allowed[keyword] = start + len(keyword)
+            # Resume one character later so keywords inside this one are found too
+            match = self.keyword_pattern.search(text_lower, start + 1)
+        return positions
+    
+    def index_unit_values(self, text_lower: str) -> Dict[str, tuple]:
+        """For every unit, the start positions where ``number\\s*unit`` matches and the matches"""
+        matches = list(self.number_pattern.finditer(text_lower))
+        with_unit = [match for match in matches if match.group(3)]
+        
+        candidates = {}
+        for unit in self.units:
+            selected = matches if not unit else [
+                match for match in with_unit if unit in self.unit_prefixes[match.group(3)]
+            ]
+            candidates[unit] = ([match.start() for match in selected], selected)
+        return candidates
+    
+    def _unit_values(self, newlines, occurrences, keyword, unit, unit_candidates):
+        """Values for ``keyword.*?(number)\\s*unit``: the first candidate after
+        each keyword occurrence on the same line, without overlapping matches"""
+        starts, matches = unit_candidates
+        values = []
+        resume_at = 0
+        for position in occurrences:
+            if position < resume_at:
+                continue
+            keyword_end = position + len(keyword)
+            index = bisect_left(starts, keyword_end)
+            if index == len(starts):
+                break
+            line_end = newlines[bisect_left(newlines, keyword_end)]
+            if starts[index] > line_end:
+                continue
+            match = matches[index]
+            values.append(float(match.group(1)))
+            resume_at = match.end(2) + len(unit)
+        return values
+    
+    def _window_values(self, text_lower, occurrences, window_cache):
+        """Plausible numbers within the window around each keyword occurrence"""
+        values = []
+        for position in occurrences:
+            # Keywords sharing a start position ('hdl', 'hdl cholesterol') share a window
+            if position not in window_cache:
+                surrounding_text = text_lower[max(0, position - self.window_before):position + self.window_after]
+                window_cache[position] = [
+                    value for value in map(float, NUMBER_PATTERN.findall(surrounding_text))
+                    if 0 < value < 1000  # Basic sanity check
+                ]
+            values.extend(window_cache[position])
+        return values
+    
+    def extract(self, text_lower: str, fields: Optional[List[str]] = None) -> Dict[str, List[float]]:
+        """Return ``{field: [values]}`` for every mapped field (or just ``fields``)
+        of a lowercased report"""
+        return {key: values for key, (values, _) in self.extract_with_units(text_lower, fields).items()}
+    
+    def extract_with_units(self, text_lower: str, fields: Optional[List[str]] = None) -> Dict[str, tuple]:
+        """Like ``extract``, but ``{field: (values, units)}`` with the unit each
+        value was found with (None for numbers taken from around a keyword)"""
+        keyword_positions = self.index_keywords(text_lower)
+        if fields is not None and not any(
+            keyword_positions[keyword] for key in fields for keyword in self.medical_mappings[key][0]
+        ):
+            return {key: ([], []) for key in fields}
+        unit_values = self.index_unit_values(text_lower)
+        newlines = [m.start() for m in re.finditer('\n', text_lower)] + [len(text_lower)]
+        
+        window_cache = {}
+        results = {}
+        for key, (keywords, units) in self.medical_mappings.items():
+            if fields is not None and key not in fields:
+                continue
+            values = []
+            value_units = []
+            for keyword in keywords:
+                occurrences = keyword_positions[keyword]
+                if not occurrences:
+                    continue
+                for unit in units:
+                    found = self._unit_values(newlines, occurrences, keyword, unit, unit_values[unit])
+                    values.extend(found)
+                    value_units.extend([unit or None] * len(found))
+                found = self._window_values(text_lower, occurrences, window_cache)
+                values.extend(found)
+                value_units.extend([None] * len(found))
+            results[key] = (values, value_units)
+        return results
+
+# Fields generate_patient_profile needs; enough to stop reading a long report
+PROFILE_FIELDS = ('age', 'gender', 'glucose', 'systolic', 'diastolic', 'cholesterol', 'hdl', 'heart_rate', 'bmi')
+
+def _open_binary(source):
+    """Readable binary file for a path, bytes or a binary file object
+    (file objects are rewound and left open)"""
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source)
+    if hasattr(source, 'read'):
+        if source.seekable():
+            source.seek(0)
+        return contextlib.nullcontext(source)
+    return open(source, 'rb')
+
+WORD_NAMESPACE = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_W_BODY, _W_P, _W_R, _W_T = (WORD_NAMESPACE + tag for tag in ('body', 'p', 'r', 't'))
+_W_TAB, _W_BR, _W_CR, _W_HYPHEN = (WORD_NAMESPACE + tag for tag in ('tab', 'br', 'cr', 'noBreakHyphen'))
+_W_TBL, _W_TR, _W_TC, _W_TYPE = (WORD_NAMESPACE + tag for tag in ('tbl', 'tr', 'tc', 'type'))
+
+def iter_docx_lines(source):
+    """
+    Yield the text of a DOCX body in document order, straight from the XML
+    
+    ``word/document.xml`` is streamed out of the zip with an incremental
+    parser and each finished paragraph or table is dropped from memory, so
+    no object model is built. Every paragraph is one line; every table row is
+    one line of its cells' text separated by tabs (a nested table's text goes
+    into the outer cell). ``source`` is a path, bytes or a binary file object.
+    """
+    with _open_binary(source) as file, zipfile.ZipFile(file) as archive, \
+            archive.open('word/document.xml') as document:
+        body = None
+        paragraphs = []  # text parts of each open paragraph (text boxes nest them)
+        run_depth = table_depth = 0
+        cells = cell_parts = None
+        
+        for event, element in ET.iterparse(document, events=('start', 'end')):
+            tag = element.tag
+            if event == 'start':
+                if tag == _W_P:
+                    paragraphs.append([])
+                elif tag == _W_R:
+                    run_depth += 1
+                elif tag == _W_TBL:
+                    table_depth += 1
+                elif tag == _W_TR and table_depth == 1:
+                    cells = []
+                elif tag == _W_TC and table_depth == 1:
+                    cell_parts = []
+                elif tag == _W_BODY:
+                    body = element
+                continue
+            
+            if tag == _W_T:
+                if paragraphs:
+                    paragraphs[-1].append(element.text or '')
+            elif run_depth and paragraphs and tag in (_W_TAB, _W_BR, _W_CR, _W_HYPHEN):
+                if tag == _W_TAB:
+                    paragraphs[-1].append('\t')
+                elif tag == _W_HYPHEN:
+                    paragraphs[-1].append('-')
+                elif element.get(_W_TYPE, 'textWrapping') == 'textWrapping':
+                    # Page and column breaks end no line, as in python-docx
+                    paragraphs[-1].append('\n')
+            elif tag == _W_R:
+                run_depth -= 1
+            elif tag == _W_P:
+                text = ''.join(paragraphs.pop())
+                if paragraphs:
+                    paragraphs[-1].append(text)
+                elif table_depth:
+                    cell_parts.append(text.replace('\t', ' '))
+                else:
+                    yield text
+            elif tag == _W_TC and table_depth == 1:
+                cells.append(' '.join(part for part in cell_parts if part))
+            elif tag == _W_TR and table_depth == 1:
+                yield '\t'.join(cells)
+            elif tag == _W_TBL:
+                table_depth -= 1
+            
+            # Finished top-level paragraphs and tables are no longer needed
+            if body is not None and not table_depth and not paragraphs and tag in (_W_P, _W_TBL):
+                body.clear()
+
+def _report_parts(report):
+    """Split a report given as a path or a ``(filename, content)`` pair"""
+    if isinstance(report, tuple):
+        return report
+    return report, None
+
+class ReportTimeout(BaseException):
+    """Raised inside a worker process when a report exceeds its time limit
+    (a BaseException so the readers' ``except Exception`` blocks let it through)"""
+
+# Seconds a batch may overrun its per-file timeouts before the workers still
+# busy with it are treated as stuck and terminated
+REPORT_TIMEOUT_GRACE = 5
+
+_worker_processor = None
+
+def _init_report_worker(processor_class, page_budget, required_fields, cache):
+    """Process pool initializer: one processor per worker process, with the timeout handler installed"""
+    global _worker_processor
+    _worker_processor = processor_class(page_budget=page_budget, required_fields=required_fields, cache=cache)
+    if hasattr(signal, 'setitimer'):
+        signal.signal(signal.SIGALRM, _raise_report_timeout)
+
+def _raise_report_timeout(signum, frame):
+    raise ReportTimeout()
+
+def _timeout_result(file_path, seconds):
+    return {'file': Path(file_path).name, 'status': 'timeout', 'cached': False,
+            'seconds': seconds, 'content_hash': None, 'data': None}
+
+def _extract_report_worker(file_path, content, timeout):
+    """Worker entry point: extract one report, interrupted after ``timeout`` seconds"""
+    result = None
+    try:
+        if timeout and hasattr(signal, 'setitimer'):
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        result = _worker_processor.extract_report_timed(file_path, content)
+    except ReportTimeout:
+        # The alarm went off after extraction returned, before it was cleared
+        pass
+    finally:
+        if timeout and hasattr(signal, 'setitimer'):
+            try:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+            except ReportTimeout:
+                pass
+    return result if result is not None else _timeout_result(file_path, timeout)
+
 class HospitalReportProcessor:
-    def __init__(self):
+    def __init__(self, page_budget: Optional[int] = None, required_fields: Optional[List[str]] = None,
+                 workers: int = 1, file_timeout: Optional[float] = None, cache=None):
+        """
+        Args:
+            page_budget: Read at most this many pages of a PDF report (None: all pages)
+            required_fields: Stop reading a PDF report once all of these fields
+                have been found (None: read until the page budget)
+            workers: Worker processes for process_multiple_reports (1: serial,
+                0: one per CPU core)
+            file_timeout: Seconds allowed per report. Reports with a time
+                limit always go through worker processes, which interrupt
+                themselves with SIGALRM where it exists; workers still stuck
+                once the batch's time is up are terminated. The calling
+                process's signal handlers are never touched.
+            cache: Optional ExtractionCache; reports whose content was already
+                extracted are not read again
+        """
+        self.page_budget = page_budget
+        self.required_fields = required_fields
+        self.workers = workers
+        self.file_timeout = file_timeout
+        self.cache = cache
+        
+        # Worker pool shared by every extract_reports call (see _get_pool)
+        self._pool = None
+        self._pool_workers = 0
+        self._pool_lock = threading.Lock()
+        
         self.medical_keywords = {
             # Diabetes markers
             'glucose': ['glucose', 'blood sugar', 'blood glucose', 'fasting glucose', 'random glucose'],
@@ -49,44 +370,84 @@ class HospitalReportProcessor:
             'bpm': r'(\d+(?:\.\d+)?)\s*bpm',
             'years': r'(\d+)\s*(?:years?|yrs?)',
         }
+        
+        # Field -> (keywords, units) used by extract_medical_data
+        self.medical_mappings = {
+            'glucose': (['glucose', 'blood sugar', 'fasting glucose'], ['mg/dl', 'mmol/l']),
+            'hba1c': (['hba1c', 'hemoglobin a1c', 'a1c'], ['%', 'percentage']),
+            'cholesterol': (['total cholesterol', 'cholesterol'], ['mg/dl']),
+            'hdl': (['hdl', 'hdl cholesterol'], ['mg/dl']),
+            'ldl': (['ldl', 'ldl cholesterol'], ['mg/dl']),
+            'triglycerides': (['triglycerides', 'tg'], ['mg/dl']),
+            'creatinine': (['creatinine', 'serum creatinine'], ['mg/dl']),
+            'urea': (['urea', 'bun'], ['mg/dl']),
+            'hemoglobin': (['hemoglobin', 'hb'], ['g/dl']),
+            'heart_rate': (['heart rate', 'pulse'], ['bpm']),
+            'bmi': (['bmi', 'body mass index'], ['kg/m2', '']),
+        }
+        self.extraction_engine = MedicalExtractionEngine(self.medical_mappings)
+        self.lab_parser = LabTableParser(self.medical_mappings)
+        self.unit_registry = UnitRegistry()
+        
+        self.age_patterns = [re.compile(pattern) for pattern in (
+            r'age[:\s]*(\d+)',
+            r'(\d+)\s*years?\s*old',
+            r'patient.*?(\d+)\s*years?'
+        )]
+        self.gender_patterns = [re.compile(pattern) for pattern in (
+            r'gender[:\s]*(male|female)',
+            r'sex[:\s]*(male|female|m|f)',
+            r'\b(male|female)\b'
+        )]
+        # Date the report was taken (not a date of birth)
+        self.report_date_pattern = re.compile(
+            r'(?<!birth )\b(?:report date|visit date|collection date|date)[:\s]*(\d{4}-\d{2}-\d{2})'
+        )
     
-    def extract_text_from_pdf(self, file_path: str) -> str:
-        """Extract text from PDF file"""
+    def iter_pdf_pages(self, file_path):
+        """Yield the text of each PDF page as it is extracted (``file_path`` may
+        also be the PDF's bytes or a binary file object)"""
         try:
-            with open(file_path, 'rb') as file:
+            with _open_binary(file_path) as file:
                 pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
                 for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-                return text
+                    yield page.extract_text() or ""
         except Exception as e:
             print(f"Error reading PDF: {e}")
-            return ""
     
-    def extract_text_from_docx(self, file_path: str) -> str:
-        """Extract text from DOCX file"""
+    def extract_text_from_pdf(self, file_path) -> str:
+        """Extract text from PDF file"""
+        return "".join(page_text + "\n" for page_text in self.iter_pdf_pages(file_path))
+    
+    def extract_text_from_docx(self, file_path) -> str:
+        """Extract text from DOCX file (path, bytes or binary file object),
+        including its tables"""
         try:
-            doc = docx.Document(file_path)
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            return text
+            return "".join(line + "\n" for line in iter_docx_lines(file_path))
         except Exception as e:
             print(f"Error reading DOCX: {e}")
             return ""
     
-    def extract_text_from_file(self, file_path: str) -> str:
-        """Extract text from various file formats"""
+    def extract_text_from_file(self, file_path: str, content=None) -> str:
+        """
+        Extract text from various file formats
+        
+        The format comes from ``file_path``'s extension. If ``content`` (bytes
+        or a binary file object, e.g. an upload stream) is given it is parsed
+        in memory and nothing is read from disk.
+        """
+        source = file_path if content is None else content
         file_path = Path(file_path)
         
         if file_path.suffix.lower() == '.pdf':
-            return self.extract_text_from_pdf(str(file_path))
+            return self.extract_text_from_pdf(source)
         elif file_path.suffix.lower() in ['.docx', '.doc']:
-            return self.extract_text_from_docx(str(file_path))
+            return self.extract_text_from_docx(source)
         elif file_path.suffix.lower() == '.txt':
             try:
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    return file.read()
+                with _open_binary(source) as file:
+                    # Universal newlines, as when reading the file in text mode
+                    return io.StringIO(file.read().decode('utf-8'), newline=None).read()
             except Exception as e:
                 print(f"Error reading text file: {e}")
                 return ""
@@ -128,6 +489,15 @@ class HospitalReportProcessor:
     
     def extract_blood_pressure(self, text: str) -> Dict[str, Optional[float]]:
         """Extract blood pressure readings"""
+        systolic_values, diastolic_values = self.blood_pressure_readings(text)
+        
+        return {
+            'systolic': np.mean(systolic_values) if systolic_values else None,
+            'diastolic': np.mean(diastolic_values) if diastolic_values else None
+        }
+    
+    def blood_pressure_readings(self, text: str) -> tuple:
+        """Return the plausible (systolic values, diastolic values) in the text"""
         bp_pattern = r'(\d{2,3})/(\d{2,3})\s*mmhg|(\d{2,3})/(\d{2,3})'
         matches = re.findall(bp_pattern, text.lower())
         
@@ -152,98 +522,376 @@ class HospitalReportProcessor:
             except ValueError:
                 continue
         
-        return {
-            'systolic': np.mean(systolic_values) if systolic_values else None,
-            'diastolic': np.mean(diastolic_values) if diastolic_values else None
-        }
+        return systolic_values, diastolic_values
     
     def extract_medical_data(self, text: str) -> Dict[str, Union[float, str, None]]:
         """Extract medical data from text"""
-        extracted_data = {}
-        
-        # Extract specific medical values
-        medical_mappings = {
-            'glucose': (['glucose', 'blood sugar', 'fasting glucose'], ['mg/dl', 'mmol/l']),
-            'hba1c': (['hba1c', 'hemoglobin a1c', 'a1c'], ['%', 'percentage']),
-            'cholesterol': (['total cholesterol', 'cholesterol'], ['mg/dl']),
-            'hdl': (['hdl', 'hdl cholesterol'], ['mg/dl']),
-            'ldl': (['ldl', 'ldl cholesterol'], ['mg/dl']),
-            'triglycerides': (['triglycerides', 'tg'], ['mg/dl']),
-            'creatinine': (['creatinine', 'serum creatinine'], ['mg/dl']),
-            'urea': (['urea', 'bun'], ['mg/dl']),
-            'hemoglobin': (['hemoglobin', 'hb'], ['g/dl']),
-            'heart_rate': (['heart rate', 'pulse'], ['bpm']),
-            'bmi': (['bmi', 'body mass index'], ['kg/m2', '']),
-        }
+        extracted_data, _, _ = self._extract_from_pages([text])
+        return extracted_data
+    
+    def extract_medical_data_streaming(self, pages, required_fields: Optional[List[str]] = None,
+                                       page_budget: Optional[int] = None) -> Optional[Dict[str, Union[float, str, None]]]:
+        """
+        Extract medical data from page texts, one page at a time
         
-        for key, (keywords, units) in medical_mappings.items():
-            values = []
-            for keyword in keywords:
-                keyword_values = self.extract_numerical_values(text, keyword, units)
-                values.extend(keyword_values)
-            
-            if values:
-                extracted_data[key] = np.mean(values)  # Take average if multiple values
-            else:
-                extracted_data[key] = None
+        Pages are pulled from ``pages`` (e.g. ``iter_pdf_pages``) only as they
+        are needed, and reading stops once every field in ``required_fields``
+        has a value or ``page_budget`` pages have been read. The result is the
+        ``extract_medical_data`` dict plus ``pages_read`` and ``stop_reason``
+        ('fields_complete', 'page_budget' or None), or None if no page could
+        be read.
+        """
+        extracted_data, pages_read, stop_reason = self._extract_from_pages(pages, required_fields, page_budget)
+        if pages_read == 0:
+            return None
         
-        # Extract blood pressure separately
-        bp_data = self.extract_blood_pressure(text)
-        extracted_data.update(bp_data)
+        extracted_data['pages_read'] = pages_read
+        extracted_data['stop_reason'] = stop_reason
+        return extracted_data
+    
+    def _extract_from_pages(self, pages, required_fields=None, page_budget=None):
+        """
+        Accumulate field values page by page; returns (data, pages read, stop reason)
         
-        # Extract age
-        age_patterns = [
-            r'age[:\s]*(\d+)',
-            r'(\d+)\s*years?\s*old',
-            r'patient.*?(\d+)\s*years?'
-        ]
+        Values come from the lab results the structured parser finds on each
+        page. The keyword scan only runs for fields a page has no structured
+        result for, over the lines that were not results, and its values are
+        used only for fields that never had a structured result. All values
+        are converted to their field's canonical unit together at the end.
+        """
+        field_values = {key: ([], []) for key in self.medical_mappings}
+        scanned_values = {key: ([], []) for key in self.medical_mappings}
+        systolic_values, diastolic_values = [], []
+        age = gender = report_date = None
+        pages_read = 0
+        stop_reason = None
         
-        for pattern in age_patterns:
-            matches = re.findall(pattern, text.lower())
-            if matches:
-                try:
-                    age = int(matches[0])
-                    if 0 < age < 150:  # Sanity check
-                        extracted_data['age'] = age
+        try:
+            for page_text in pages:
+                page_lower = page_text.lower()
+                pages_read += 1
+                
+                # Lab result lines and tables, indexed by field
+                lab_index, remainder = self.lab_parser.parse_with_remainder(page_text)
+                for key, results in lab_index.items():
+                    values, units = field_values[key]
+                    values.extend(result['value'] for result in results)
+                    units.extend(result['unit'] for result in results)
+                
+                # Keyword scan of the rest of the page for the fields still missing
+                missing = [key for key in self.medical_mappings if key not in lab_index]
+                if missing:
+                    for key, (values, units) in self.extraction_engine.extract_with_units(remainder.lower(), missing).items():
+                        scanned_values[key][0].extend(values)
+                        scanned_values[key][1].extend(units)
+                
+                # Extract blood pressure separately
+                systolic, diastolic = self.blood_pressure_readings(page_lower)
+                systolic_values.extend(systolic)
+                diastolic_values.extend(diastolic)
+                
+                # Demographics come from the first page that mentions them
+                if age is None:
+                    age = self._extract_age(page_lower)
+                if gender is None:
+                    gender = self._extract_gender(page_lower)
+                if report_date is None:
+                    report_date = self._extract_report_date(page_lower)
+                
+                if required_fields:
+                    found = {key for key in field_values if field_values[key][0] or scanned_values[key][0]}
+                    found.update(key for key, value in (('systolic', systolic_values), ('diastolic', diastolic_values),
+                                                        ('age', age), ('gender', gender)) if value)
+                    if found.issuperset(required_fields):
+                        stop_reason = 'fields_complete'
                         break
-                except ValueError:
-                    continue
+                if page_budget is not None and pages_read >= page_budget:
+                    stop_reason = 'page_budget'
+                    break
+        finally:
+            # Stop a page generator early so it closes its file
+            if hasattr(pages, 'close'):
+                pages.close()
         
-        if 'age' not in extracted_data:
-            extracted_data['age'] = None
+        extracted_data = self._field_means({
+            key: values if values[0] else self._with_units_if_any(*scanned_values[key])
+            for key, values in field_values.items()
+        })
         
-        # Extract gender
-        gender_patterns = [
-            r'gender[:\s]*(male|female)',
-            r'sex[:\s]*(male|female|m|f)',
-            r'\b(male|female)\b'
-        ]
+        extracted_data['systolic'] = np.mean(systolic_values) if systolic_values else None
+        extracted_data['diastolic'] = np.mean(diastolic_values) if diastolic_values else None
+        extracted_data['age'] = age
+        extracted_data['gender'] = gender
+        extracted_data['report_date'] = report_date
+        
+        return extracted_data, pages_read, stop_reason
+    
+    @staticmethod
+    def _with_units_if_any(values, units):
+        """Scanned values, keeping only the ones found with a unit when there are
+        any (bare numbers near the keyword cannot be converted)"""
+        if any(units):
+            kept = [(value, unit) for value, unit in zip(values, units) if unit]
+            return [value for value, _ in kept], [unit for _, unit in kept]
+        return values, units
+    
+    def _field_means(self, field_values):
+        """Average of each field's values after converting them all to canonical
+        units in one vectorized step (None for fields with no usable value)
+        
+        A value in a unit the registry cannot convert is left out when the
+        field has values that did convert, and taken as it is when none did,
+        so an unlisted spelling never loses a field's only result."""
+        fields = list(field_values)
+        codes, values, units = [], [], []
+        for code, key in enumerate(fields):
+            found, found_units = field_values[key]
+            codes.extend([code] * len(found))
+            values.extend(found)
+            units.extend(found_units)
+        
+        normalized = self.unit_registry.normalize([fields[code] for code in codes], values, units)
+        codes = np.asarray(codes, dtype=int)
+        converted = np.bincount(codes[~np.isnan(normalized)], minlength=len(fields))
+        unconverted = np.isnan(normalized) & (converted[codes] == 0)
+        normalized[unconverted] = np.asarray(values, dtype=float)[unconverted]
+        usable = ~np.isnan(normalized)
+        sums = np.bincount(codes[usable], weights=normalized[usable], minlength=len(fields))
+        counts = np.bincount(codes[usable], minlength=len(fields))
         
-        for pattern in gender_patterns:
-            matches = re.findall(pattern, text.lower())
-            if matches:
-                gender = matches[0].lower()
+        return {
+            key: sums[code] / counts[code] if counts[code] else None
+            for code, key in enumerate(fields)
+        }
+    
+    def _extract_age(self, text_lower: str) -> Optional[int]:
+        """First plausible age, trying the patterns in order"""
+        for pattern in self.age_patterns:
+            match = pattern.search(text_lower)
+            if match:
+                age = int(match.group(1))
+                if 0 < age < 150:  # Sanity check
+                    return age
+        return None
+    
+    def _extract_gender(self, text_lower: str) -> Optional[str]:
+        """Gender from the first pattern that matches"""
+        for pattern in self.gender_patterns:
+            match = pattern.search(text_lower)
+            if match:
+                gender = match.group(1)
                 if gender in ['m', 'male']:
-                    extracted_data['gender'] = 'male'
+                    return 'male'
                 elif gender in ['f', 'female']:
-                    extracted_data['gender'] = 'female'
-                break
+                    return 'female'
+                return None
+        return None
+    
+    def _extract_report_date(self, text_lower: str) -> Optional[str]:
+        """ISO date of the report, if it states one"""
+        match = self.report_date_pattern.search(text_lower)
+        if match:
+            try:
+                return datetime.strptime(match.group(1), '%Y-%m-%d').date().isoformat()
+            except ValueError:
+                return None
+        return None
+    
+    def extract_report_data(self, file_path: str, content=None) -> Optional[Dict[str, Union[float, str, None]]]:
+        """
+        Extract medical data from one report file, or None if it has no text
         
-        if 'gender' not in extracted_data:
-            extracted_data['gender'] = None
+        PDFs are streamed page by page and honour ``required_fields`` and
+        ``page_budget``; other formats are read whole. ``content`` (bytes or a
+        binary file object) is parsed in memory instead of reading ``file_path``.
+        """
+        return self._extract_report_cached(file_path, content)[0]
+    
+    def _extract_report_cached(self, file_path, content=None):
+        """Extract a report through the cache; returns (data, served from cache, content hash)"""
+        content_hash = file_content_hash(file_path if content is None else content)
+        if self.cache is None:
+            return self._extract_report_file(file_path, content)[1], False, content_hash
         
-        return extracted_data
+        cache_key = self.cache.make_key(content_hash, EXTRACTOR_VERSION, self._extraction_settings(file_path))
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached[1], True, content_hash
+        
+        text, data = self._extract_report_file(file_path, content, keep_text=True)
+        if data:
+            self.cache.put(cache_key, content_hash, text, data, Path(file_path).name)
+        return data, False, content_hash
+    
+    def _extraction_settings(self, file_path):
+        """Settings that change what is extracted from this file"""
+        suffix = Path(file_path).suffix.lower()
+        if suffix == '.pdf':
+            return {
+                'format': suffix,
+                'page_budget': self.page_budget,
+                'required_fields': sorted(self.required_fields) if self.required_fields else None
+            }
+        return {'format': suffix}
+    
+    def _extract_report_file(self, file_path, content=None, keep_text=False):
+        """Read and extract one report; returns (text read or None, data or None)"""
+        if Path(file_path).suffix.lower() == '.pdf':
+            pages = self.iter_pdf_pages(file_path if content is None else content)
+            page_texts = []
+            if keep_text:
+                pages = self._keep_pages(pages, page_texts)
+            data = self.extract_medical_data_streaming(pages, self.required_fields, self.page_budget)
+            return ("".join(page_text + "\n" for page_text in page_texts) if keep_text else None), data
+        
+        text = self.extract_text_from_file(file_path, content)
+        return text, (self.extract_medical_data(text) if text else None)
+    
+    @staticmethod
+    def _keep_pages(pages, page_texts):
+        """Pass pages through, remembering the ones that were read"""
+        for page_text in pages:
+            page_texts.append(page_text)
+            yield page_text
+    
+    def extract_report_timed(self, file_path: str, content=None) -> Dict[str, any]:
+        """
+        Extract one report and time it
+        
+        Returns ``{'file', 'status', 'cached', 'seconds', 'content_hash', 'data'}``
+        where status is 'ok', 'no_text', 'timeout' or 'error', content_hash is
+        the SHA-256 of the file's bytes and data is the extracted dict (or None).
+        """
+        print(f"Processing {file_path}...")
+        start = time.perf_counter()
+        data = None
+        cached = False
+        content_hash = None
+        try:
+            data, cached, content_hash = self._extract_report_cached(file_path, content)
+            status = 'ok' if data else 'no_text'
+        except ReportTimeout:
+            print(f"⏱️ Timed out processing {file_path}")
+            status = 'timeout'
+        except Exception as e:
+            print(f"❌ Error processing {file_path}: {e}")
+            status = 'error'
+        
+        return {
+            'file': Path(file_path).name,
+            'status': status,
+            'cached': cached,
+            'seconds': round(time.perf_counter() - start, 4),
+            'content_hash': content_hash,
+            'data': data
+        }
     
-    def process_multiple_reports(self, file_paths: List[str]) -> Dict[str, any]:
-        """Process multiple hospital reports and aggregate data"""
+    def extract_reports(self, file_paths: List[str], workers: Optional[int] = None,
+                        timeout: Optional[float] = None) -> List[Dict[str, any]]:
+        """
+        Extract many reports, fanning them out to a process pool
+        
+        Args:
+            file_paths: Report files, as paths or as ``(filename, content)``
+                pairs whose content (bytes or a binary file object) is parsed
+                in memory
+            workers: Worker processes (default ``self.workers``; 0: one per CPU core)
+            timeout: Seconds allowed per report (default ``self.file_timeout``)
+        
+        Returns one ``extract_report_timed`` result per file, in input order.
+        """
+        workers = self.workers if workers is None else workers
+        timeout = self.file_timeout if timeout is None else timeout
+        workers = max(min(workers or os.cpu_count() or 1, len(file_paths)), 1)
+        reports = [_report_parts(report) for report in file_paths]
+        
+        # Without a time limit one worker is just this process; a limit is
+        # only enforced inside worker processes
+        if workers == 1 and not timeout:
+            return [self.extract_report_timed(file_path, content) for file_path, content in reports]
+        
+        print(f"⚡ Processing {len(file_paths)} reports with {workers} worker processes...")
+        
+        pool = self._get_pool(workers)
+        futures = []
+        for file_path, content in reports:
+            # File objects cannot be sent to a worker; their bytes can
+            if content is not None and not isinstance(content, (bytes, bytearray)):
+                with _open_binary(content) as file:
+                    content = file.read()
+            futures.append(pool.submit(_extract_report_worker, str(file_path), content, timeout))
+        
+        # Each worker gets through its share of the batch within the per-file
+        # limits; whatever is still running after that (plus a grace period)
+        # is stuck, e.g. where there is no SIGALRM
+        stuck = set()
+        if timeout:
+            rounds = -(-len(futures) // workers)
+            stuck = wait(futures, timeout=rounds * timeout + REPORT_TIMEOUT_GRACE).not_done
+            if stuck:
+                self._terminate_pool(pool)
+        
+        results = []
+        for (file_path, _), future in zip(reports, futures):
+            if future in stuck:
+                print(f"⏱️ Timed out processing {file_path}")
+                results.append(_timeout_result(file_path, timeout))
+                continue
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"❌ Error processing {file_path}: {e}")
+                results.append({'file': Path(file_path).name, 'status': 'error', 'cached': False,
+                                'seconds': None, 'content_hash': None, 'data': None})
+        
+        return results
+    
+    def _get_pool(self, workers):
+        """The processor's worker pool, (re)created when the worker count changes"""
+        with self._pool_lock:
+            if self._pool is None or self._pool_workers != workers:
+                if self._pool is not None:
+                    self._pool.shutdown(wait=False)
+                self._pool = ProcessPoolExecutor(
+                    max_workers=workers, initializer=_init_report_worker,
+                    initargs=(type(self), self.page_budget, self.required_fields, self.cache)
+                )
+                self._pool_workers = workers
+            return self._pool
+    
+    def _terminate_pool(self, pool):
+        """Kill the workers of a pool with stuck reports; the next batch gets a new pool"""
+        with self._pool_lock:
+            if self._pool is pool:
+                self._pool = None
+        processes = list((pool._processes or {}).values())
+        for process in processes:
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.join(timeout=REPORT_TIMEOUT_GRACE)
+    
+    def close(self):
+        """Shut down the worker pool"""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+    
+    def process_multiple_reports(self, file_paths: List[str], workers: Optional[int] = None,
+                                 timeout: Optional[float] = None) -> Dict[str, any]:
+        """Process multiple hospital reports (paths or ``(filename, content)`` pairs) and aggregate data"""
+        return self.combine_reports(self.extract_reports(file_paths, workers, timeout))
+    
+    def combine_reports(self, file_results: List[Dict[str, any]]) -> Dict[str, any]:
+        """Aggregate ``extract_reports`` results (in report order) into processed data"""
         all_extracted_data = []
         
-        for file_path in file_paths:
-            print(f"Processing {file_path}...")
-            text = self.extract_text_from_file(file_path)
-            if text:
-                data = self.extract_medical_data(text)
-                data['source_file'] = Path(file_path).name
+        for result in file_results:
+            data = result['data']
+            if data:
+                data['source_file'] = result['file']
+                data['source_hash'] = result.get('content_hash')
                 data['extraction_date'] = datetime.now().isoformat()
                 all_extracted_data.append(data)
         
@@ -253,7 +901,10 @@ class HospitalReportProcessor:
         return {
             'individual_reports': all_extracted_data,
             'aggregated_data': aggregated_data,
-            'report_count': len(all_extracted_data)
+            'report_count': len(all_extracted_data),
+            'file_timings': [
+                {key: result[key] for key in ('file', 'status', 'cached', 'seconds')} for result in file_results
+            ]
         }
     
     def aggregate_medical_data(self, data_list: List[Dict]) -> Dict[str, Union[float, str, None]]:
@@ -262,25 +913,22 @@ class HospitalReportProcessor:
             return {}
         
         aggregated = {}
-        numerical_fields = ['glucose', 'hba1c', 'cholesterol', 'hdl', 'ldl', 'triglycerides', 
-                           'creatinine', 'urea', 'hemoglobin', 'heart_rate', 'bmi', 
-                           'systolic', 'diastolic']
         
-        for field in numerical_fields:
-            values = [data[field] for data in data_list if data.get(field) is not None]
+        for field in NUMERICAL_FIELDS:
+            reports = [data for data in data_list if data.get(field) is not None]
+            values = [data[field] for data in reports]
             if values:
                 aggregated[field] = {
                     'latest': values[-1],  # Most recent value
                     'average': np.mean(values),
-                    'trend': 'stable',  # Could implement trend analysis
+                    'trend': self._trend(reports, values),
                     'values_count': len(values)
                 }
             else:
                 aggregated[field] = None
         
         # Take the most recent non-null value for categorical fields
-        categorical_fields = ['gender', 'age']
-        for field in categorical_fields:
+        for field in CATEGORICAL_FIELDS:
             for data in reversed(data_list):  # Start from most recent
                 if data.get(field) is not None:
                     aggregated[field] = data[field]
@@ -290,6 +938,22 @@ class HospitalReportProcessor:
         
         return aggregated
     
+    @staticmethod
+    def _trend(reports: List[Dict], values: List[float]) -> str:
+        """Trend of a field's values: fitted over report dates when every report
+        has one, otherwise over the reports' order"""
+        if all(data.get('report_date') for data in reports):
+            origin = report_time(reports[0])
+            times = [(report_time(data) - origin).total_seconds() / 86400 for data in reports]
+        else:
+            times = list(range(len(values)))
+        
+        slope = fit_slope(
+            len(values), sum(times), sum(values),
+            sum(t * t for t in times), sum(t * y for t, y in zip(times, values))
+        )
+        return classify_trend(slope, max(times) - min(times), np.mean(values))
+    
     def generate_patient_profile(self, aggregated_data: Dict) -> Dict[str, any]:
         """Generate patient profile for disease prediction"""
         profile = {}
@@ -0,0 +1,242 @@
+"""
+SQLite Connection Pool
+======================
+
+Reusable SQLite connections for the dashboard, instead of a new
+``sqlite3.connect`` (and a cold statement cache) for every query.
+
+- Each thread gets its own connection, set up once with WAL journaling
+  (readers no longer block the writer or each other) and
+  ``synchronous=NORMAL`` (no fsync on every commit, still durable to a crash
+  of the process). Connections keep sqlite3's prepared statement cache
+  between requests.
+- A thread hands its connection back with ``release()`` (the dashboard does
+  this at the end of every request), so short-lived server threads share a
+  small set of idle connections.
+- ``BatchWriter`` funnels writes from many threads through one writer thread
+  that commits them in groups: one transaction, and one lock acquisition,
+  per batch instead of per row. This is what keeps concurrent health logging
+  clear of "database is locked".
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from pathlib import Path
+
+
+class ConnectionPool:
+    """Per-thread SQLite connections in WAL mode, reused across requests"""
+
+    def __init__(self, db_path, max_idle=8, cached_statements=256, timeout=30):
+        """
+        Args:
+            db_path: SQLite database file
+            max_idle: Released connections kept open for reuse
+            cached_statements: Prepared statements cached per connection
+            timeout: Seconds to wait on a locked database
+        """
+        self.db_path = Path(db_path)
+        self.max_idle = max_idle
+        self.cached_statements = cached_statements
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._idle = []
+        self._connections = []
+
+    def _connect(self):
+        # Connections move between threads through the idle list, but only
+        # one thread uses a connection at a time
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False,
+                               cached_statements=self.cached_statements)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def connection(self):
+        """This thread's connection (an idle one, or a new one)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    def release(self):
+        """Give this thread's connection back to the pool"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+        self._local.conn = None
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+            self._connections.remove(conn)
+        conn.close()
+
+    @contextmanager
+    def transaction(self):
+        """This thread's connection, committed on success and rolled back on error"""
+        conn = self.connection()
+        with conn:
+            yield conn
+
+    def query(self, sql, params=()):
+        """All rows of a read query"""
+        return self.connection().execute(sql, params).fetchall()
+
+    def query_one(self, sql, params=()):
+        """First row of a read query, or None"""
+        return self.connection().execute(sql, params).fetchone()
+
+    def execute(self, sql, params=()):
+        """Run one write statement in its own transaction; returns the cursor"""
+        with self.transaction() as conn:
+            return conn.execute(sql, params)
+
+    def executemany(self, sql, rows):
+        """Run a statement for every row in one transaction; returns the rows changed"""
+        with self.transaction() as conn:
+            return conn.executemany(sql, rows).rowcount
+
+    def close_all(self):
+        """Close every connection the pool opened"""
+        with self._lock:
+            connections, self._connections, self._idle = self._connections, [], []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    def stats(self):
+        """Open and idle connection counts"""
+        with self._lock:
+            return {'connections': len(self._connections), 'idle': len(self._idle)}
+
+
+class BatchWriter:
+    """Group-commit writer: statements from any thread, committed in batches by one thread"""
+
+    _STOP = object()
+
+    def __init__(self, pool, max_batch=500, max_delay=0.002):
+        """
+        Args:
+            pool: ConnectionPool to write through
+            max_batch: Most statements committed in one transaction
+            max_delay: Seconds to wait for more statements before committing
+        """
+        self.pool = pool
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.batches = 0
+        self.writes = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, sql, params=()):
+        """Queue a write; the Future resolves to its ``lastrowid`` once committed"""
+        future = Future()
+        self._ensure_started()
+        self._queue.put((future, sql, params))
+        return future
+
+    def execute(self, sql, params=(), timeout=30):
+        """Queue a write and wait for its commit; returns its ``lastrowid``"""
+        return self.submit(sql, params).result(timeout)
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name='sqlite-batch-writer', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        conn = self.pool.connection()
+        # The writer manages its own transactions
+        conn.isolation_level = None
+        try:
+            while True:
+                item = self._queue.get()
+                if item is self._STOP:
+                    return
+                batch = [item]
+                deadline = time.monotonic() + self.max_delay
+                while len(batch) < self.max_batch:
+                    try:
+                        item = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if item is self._STOP:
+                        self._write(conn, batch)
+                        return
+                    batch.append(item)
+                self._write(conn, batch)
+        finally:
+            conn.isolation_level = ''
+            self.pool.release()
+
+    def _write(self, conn, batch):
+        """Commit a batch; a failing statement only fails its own Future, and
+        every Future in the batch is resolved whatever goes wrong"""
+        done = []
+        error = None
+        committed = False
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for future, sql, params in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                conn.execute('SAVEPOINT batch_item')
+                try:
+                    cursor = conn.execute(sql, params)
+                except Exception as e:
+                    # Not only sqlite3.Error: binding a Python int over 64 bits
+                    # raises OverflowError
+                    conn.execute('ROLLBACK TO batch_item')
+                    future.set_exception(e)
+                else:
+                    done.append((future, cursor.lastrowid))
+                conn.execute('RELEASE batch_item')
+            conn.execute('COMMIT')
+            committed = True
+        except Exception as e:
+            error = e
+            try:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+            except sqlite3.Error:
+                pass
+        finally:
+            if committed:
+                self.batches += 1
+                self.writes += len(done)
+                for future, row_id in done:
+                    future.set_result(row_id)
+            else:
+                error = error or RuntimeError('Batch writer stopped before the batch was committed')
+                for future, _, _ in batch:
+                    if not future.done() and (future.running() or future.set_running_or_notify_cancel()):
+                        future.set_exception(error)
+
+    def close(self, timeout=30):
+        """Commit what is queued and stop the writer thread"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join(timeout)
+
+    def stats(self):
+        """Batches committed, statements written and statements waiting"""
+        return {'batches': self.batches, 'writes': self.writes, 'queued': self._queue.qsize()}
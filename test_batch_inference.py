@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Batch inference test script - checks predict_risk_scores_batch against the
+single-patient predict_risk_score path using the cached training datasets,
+and that one malformed profile does not fail a whole cohort
+"""
+from enhanced_chronic_disease_predictor import EnhancedChronicDiseasePredictor
+from ultimate_chronic_disease_system import UltimateChronicDiseaseSystem
+import pandas as pd
+import numpy as np
+import tempfile
+import os
+
+def test_batch_matches_single_predictions():
+    """Batch scores, categories and confidences should match per-row scoring"""
+    predictor = EnhancedChronicDiseasePredictor()
+    assert predictor.load_model('enhanced_chronic_disease_model_stroke.pkl', 'stroke')
+    assert predictor.load_model('enhanced_chronic_disease_model_heart_disease.pkl', 'heart_disease')
+
+    cohorts = {
+        'stroke': pd.read_csv('dataset_cache/fedesoriano_stroke-prediction-dataset/healthcare-dataset-stroke-data.csv')
+                    .drop(columns='stroke').head(50),
+        'heart_disease': pd.read_csv('dataset_cache/johnsmith88_heart-disease-dataset/heart.csv')
+                           .drop(columns='target').head(50)
+    }
+
+    for disease, cohort in cohorts.items():
+        print(f"🔍 Checking batch inference for {disease}...")
+        batch = predictor.predict_risk_scores_batch(cohort, disease)
+        assert batch is not None
+        assert batch['valid'].all()
+
+        for i, record in enumerate(cohort.to_dict('records')):
+            single = predictor.predict_risk_score(record, disease)
+            assert np.isclose(batch['risk_score'][i], single['risk_score'])
+            assert np.isclose(batch['confidence'][i], single['confidence'])
+            assert batch['risk_category'][i] == single['risk_category']
+
+        print(f"✅ {disease}: {len(cohort)} rows match single-patient predictions")
+
+def test_batch_records_skip_unusable_rows():
+    """Rows with missing features come back as None instead of failing the batch"""
+    predictor = EnhancedChronicDiseasePredictor()
+    assert predictor.load_model('enhanced_chronic_disease_model_heart_disease.pkl', 'heart_disease')
+
+    heart_sample = {
+        'age': 63, 'sex': 1, 'cp': 3, 'trestbps': 145, 'chol': 233, 'fbs': 1,
+        'restecg': 0, 'thalach': 150, 'exang': 0, 'oldpeak': 2.3, 'slope': 0, 'ca': 0, 'thal': 1
+    }
+    results = predictor.predict_risk_scores_records([heart_sample, {'age': 40}, {}], 'heart_disease')
+
+    assert results[0] is not None
+    assert np.isclose(results[0]['risk_score'], predictor.predict_risk_score(heart_sample, 'heart_disease')['risk_score'])
+    assert results[1] is None and results[2] is None
+
+def test_malformed_profile_fails_alone():
+    """A profile that cannot be mapped to model features is reported, the rest are scored"""
+    predictor = EnhancedChronicDiseasePredictor()
+    assert predictor.load_model('enhanced_chronic_disease_model_heart_disease.pkl', 'heart_disease')
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            system = UltimateChronicDiseaseSystem(predictor)
+            assessments, errors = system._assess_profiles_batch({
+                'P1': {'age': 63, 'gender': 'Male', 'blood_pressure_systolic': 145, 'cholesterol': 233},
+                'P2': {'age': 50, 'blood_pressure_systolic': 'not recorded'},
+                'P3': {'age': 45, 'gender': 'Female', 'blood_pressure_systolic': 120, 'cholesterol': 180}
+            })
+        finally:
+            os.chdir(cwd)
+
+    assert list(errors) == ['P2']
+    assert list(assessments) == ['P1', 'P3']
+    assert all('heart_disease' in assessment for assessment in assessments.values())
+    print("✅ A malformed profile fails alone")
+
+if __name__ == "__main__":
+    test_batch_matches_single_predictions()
+    test_batch_records_skip_unusable_rows()
+    test_malformed_profile_fails_alone()
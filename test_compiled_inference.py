@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Compiled inference plan test script - checks the pandas-free single-row fast
+path against the DataFrame preprocessing pipeline
+"""
+from enhanced_chronic_disease_predictor import EnhancedChronicDiseasePredictor
+import pandas as pd
+import numpy as np
+
+def _slow_path_prediction(predictor, patient_data, disease):
+    """Run predict_risk_score with the compiled plan temporarily removed"""
+    plan = predictor.inference_plans.pop(disease)
+    try:
+        return predictor.predict_risk_score(patient_data, disease)
+    finally:
+        predictor.inference_plans[disease] = plan
+
+def test_compiled_plan_matches_dataframe_pipeline():
+    """Compiled plans are built at load time and reproduce the pandas path"""
+    predictor = EnhancedChronicDiseasePredictor()
+    assert predictor.load_model('enhanced_chronic_disease_model_stroke.pkl', 'stroke')
+    assert predictor.load_model('enhanced_chronic_disease_model_heart_disease.pkl', 'heart_disease')
+    assert set(predictor.inference_plans) == {'stroke', 'heart_disease'}
+
+    cohorts = {
+        'stroke': pd.read_csv('dataset_cache/fedesoriano_stroke-prediction-dataset/healthcare-dataset-stroke-data.csv')
+                    .drop(columns='stroke').head(30),
+        'heart_disease': pd.read_csv('dataset_cache/johnsmith88_heart-disease-dataset/heart.csv')
+                           .drop(columns='target').head(30)
+    }
+
+    for disease, cohort in cohorts.items():
+        plan = predictor.inference_plans[disease]
+        for record in cohort.to_dict('records'):
+            assert plan.transform(record) is not None
+
+            fast = predictor.predict_risk_score(record, disease)
+            slow = _slow_path_prediction(predictor, record, disease)
+            assert np.isclose(fast['risk_score'], slow['risk_score'])
+            assert np.isclose(fast['confidence'], slow['confidence'])
+            assert fast['risk_category'] == slow['risk_category']
+
+        print(f"✅ {disease}: compiled plan matches DataFrame pipeline")
+
+def test_compiled_plan_defers_unhandled_input():
+    """Unexpected columns and unseen labels fall back to the DataFrame path"""
+    predictor = EnhancedChronicDiseasePredictor()
+    assert predictor.load_model('enhanced_chronic_disease_model_stroke.pkl', 'stroke')
+    plan = predictor.inference_plans['stroke']
+
+    record = pd.read_csv('dataset_cache/fedesoriano_stroke-prediction-dataset/healthcare-dataset-stroke-data.csv') \
+               .drop(columns='stroke').iloc[0].to_dict()
+
+    assert plan.transform({**record, 'extra_feature': 1}) is None
+    assert plan.transform({**record, 'smoking_status': 'not a category'}) is None
+    assert plan.transform({**record, 'age': 'sixty'}) is None
+
+if __name__ == "__main__":
+    test_compiled_plan_matches_dataframe_pipeline()
+    test_compiled_plan_defers_unhandled_input()
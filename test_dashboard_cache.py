@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Dashboard cache test script - checks TTL expiry and LRU eviction, that a
+load racing a write is not cached, and that dashboard polling is served
+from memory until a health log, risk assessment, nudge click or bulk ingest
+for that user invalidates it
+"""
+from dashboard_cache import DashboardCache
+from pathlib import Path
+import importlib
+import tempfile
+import sys
+import os
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_ttl_lru_and_invalidation():
+    """Entries expire, the least recently used is evicted, and writes drop entries"""
+    clock = FakeClock()
+    cache = DashboardCache(max_entries=2, ttl=60, clock=clock)
+
+    cache.put('user_001', {'name': 'John'})
+    cache.put('user_002', {'name': 'Sarah'})
+    assert cache.get('user_001') == {'name': 'John'}
+    cache.put('user_003', {'name': 'Mike'})  # Evicts user_002, the least recently used
+    assert cache.get('user_002') is None
+    assert cache.stats()['evictions'] == 1
+
+    clock.now = 61
+    assert cache.get('user_001') is None
+
+    loads = []
+    def loader(user_id):
+        loads.append(user_id)
+        return {'user_id': user_id}
+    assert cache.get_or_load('user_001', loader) == cache.get_or_load('user_001', loader)
+    assert loads == ['user_001']
+    assert cache.get_or_load('nobody', lambda user_id: None) is None
+    assert cache.get('nobody') is None
+
+    assert cache.invalidate('user_001', 'user_404') == 1
+    assert cache.get('user_001') is None
+
+    # A load that a write overtook is returned but not kept
+    def racing_loader(user_id):
+        cache.invalidate(user_id)
+        return {'stale': True}
+    assert cache.get_or_load('user_002', racing_loader) == {'stale': True}
+    assert cache.get('user_002') is None
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['invalidations'], stats['max_entries']) == (2, 1, 2)
+    assert stats['hit_rate'] == round(stats['hits'] / (stats['hits'] + stats['misses']), 4)
+
+    print("✅ Cache expires, evicts and invalidates entries")
+
+def test_dashboard_polling_is_served_from_memory():
+    """Repeat polls hit the cache; each kind of write shows up on the next poll"""
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DASHBOARD_DB_PATH'] = str(Path(tmp) / 'dashboard.db')
+        try:
+            if 'dashboard_server' in sys.modules:
+                dashboard_server = importlib.reload(sys.modules['dashboard_server'])
+            else:
+                import dashboard_server
+        finally:
+            del os.environ['DASHBOARD_DB_PATH']
+        client = dashboard_server.app.test_client()
+
+        first = client.get('/api/dashboard/user_001').get_json()
+        for _ in range(9):
+            assert client.get('/api/dashboard/user_001').get_json() == first
+        stats = client.get('/api/cache-stats').get_json()
+        assert (stats['hits'], stats['misses'], stats['entries']) == (9, 1, 1)
+
+        reading = {'user_id': 'user_001', 'log_type': 'glucose', 'value': 333, 'unit': 'mg/dl'}
+        assert client.post('/api/log-health', json=reading).status_code == 200
+        data = client.get('/api/dashboard/user_001').get_json()
+        assert any(entry['value'] == 333 for entry in data['recent_logs']['glucose'])
+
+        assessment = {'user_id': 'user_001', 'disease': 'copd', 'risk_percentage': 91.5}
+        assert client.post('/api/risk-assessment', json=assessment).status_code == 200
+        assert client.post('/api/risk-assessment', json={'user_id': 'user_001'}).status_code == 400
+        data = client.get('/api/dashboard/user_001').get_json()
+        copd = [risk for risk in data['risk_assessments'] if risk['disease'] == 'copd']
+        assert copd[0]['risk_category'] == 'Very High Risk'
+
+        client.get('/api/dashboard/user_002')
+        assert client.post('/api/nudge-click', json={'user_id': 'user_002', 'nudge_type': 'high_bp',
+                                                     'message': 'Time to relax'}).status_code == 200
+        readings = [{'user_id': 'user_001', 'log_type': 'steps', 'value': 12345,
+                     'timestamp': '2030-01-01T08:00:00Z'}]
+        assert client.post('/api/log-health/bulk', json=readings).get_json()['inserted'] == 1
+        data = client.get('/api/dashboard/user_001').get_json()
+        assert data['health_trends']['steps']['max'] == 12345
+
+        stats = client.get('/api/cache-stats').get_json()
+        assert stats['invalidations'] == 4
+        assert stats['entries'] == 1  # user_001 reloaded; user_002 dropped by the nudge click
+
+        dashboard_server.dashboard.writer.close()
+        dashboard_server.dashboard.db.close_all()
+
+    print("✅ Dashboard polling is served from the cache")
+
+if __name__ == "__main__":
+    test_ttl_lru_and_invalidation()
+    test_dashboard_polling_is_served_from_memory()
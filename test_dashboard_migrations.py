@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Dashboard migration test script - checks that new and pre-migration
+databases are brought to the latest schema, that the dashboard queries use
+the composite indexes, that migrations revert cleanly, that a migration
+failing halfway is rolled back and can be retried, and that the query
+benchmark runs
+"""
+from dashboard_migrations import LATEST_VERSION, MIGRATIONS, current_version, migrate
+from dashboard_benchmark import MIGRATED_QUERIES, run_benchmark
+from pathlib import Path
+import tempfile
+import sqlite3
+
+def _indexes(conn):
+    return {row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'")}
+
+def test_new_database_migrates_to_latest():
+    """Tables and indexes are created once; running again changes nothing"""
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(Path(tmp) / 'dashboard.db')
+        changes = migrate(conn)
+
+        assert len(changes) == LATEST_VERSION
+        assert current_version(conn) == LATEST_VERSION
+        assert {'idx_health_logs_user_date_type', 'idx_risk_assessments_user_date',
+                'idx_nudge_history_user_shown'} <= _indexes(conn)
+        assert migrate(conn) == []
+
+        plans = {
+            name: ' '.join(row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}',
+                                                          {'user_id': 'user_001', 'window': '-30 days'}))
+            for name, sql in MIGRATED_QUERIES.items()
+        }
+        assert 'idx_health_logs_user_date_type' in plans['recent_logs']
+        assert 'health_log_weekly USING PRIMARY KEY' in plans['health_trends']
+        assert not any('SCAN health_logs' in plan for plan in plans.values())
+        conn.close()
+
+    print("✅ New databases migrate to the latest schema")
+
+def test_existing_database_is_adopted_and_reverts():
+    """A database made before migrations keeps its rows; indexes come and go"""
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(Path(tmp) / 'dashboard.db')
+        conn.execute("CREATE TABLE users (user_id TEXT PRIMARY KEY, name TEXT NOT NULL, age INTEGER, "
+                     "gender TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)")
+        conn.execute("INSERT INTO users (user_id, name) VALUES ('user_001', 'John Doe')")
+        conn.commit()
+
+        migrate(conn)
+        assert conn.execute("SELECT name FROM users").fetchall() == [('John Doe',)]
+
+        assert migrate(conn, target=1) == ['reverted 4: daily and weekly health log rollups',
+                                           'reverted 3: health log reading timestamps',
+                                           'reverted 2: dashboard query indexes']
+        assert current_version(conn) == 1
+        assert not _indexes(conn)
+        try:
+            migrate(conn, target=0)
+            assert False, "the initial schema cannot be reverted"
+        except ValueError:
+            pass
+
+        migrate(conn)
+        assert current_version(conn) == LATEST_VERSION
+        conn.close()
+
+def test_failed_migration_rolls_back_and_retries():
+    """A migration whose second statement fails leaves no table behind and no version recorded"""
+    broken = {
+        'version': LATEST_VERSION + 1,
+        'name': 'probe table',
+        'up': ['CREATE TABLE probe (reading_id INTEGER PRIMARY KEY)',
+               'INSERT INTO missing_table VALUES (1)'],
+        'down': ['DROP TABLE probe'],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(Path(tmp) / 'dashboard.db')
+        MIGRATIONS.append(broken)
+        try:
+            try:
+                migrate(conn, target=broken['version'])
+                assert False, "the broken migration should fail"
+            except sqlite3.OperationalError:
+                pass
+            assert current_version(conn) == LATEST_VERSION
+            assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'probe'").fetchone() is None
+
+            broken['up'][1] = 'INSERT INTO probe VALUES (1)'
+            assert migrate(conn, target=broken['version']) == [f"applied {broken['version']}: probe table"]
+            assert conn.execute('SELECT reading_id FROM probe').fetchall() == [(1,)]
+            migrate(conn)
+        finally:
+            MIGRATIONS.remove(broken)
+        assert current_version(conn) == LATEST_VERSION
+        conn.close()
+
+    print("✅ A failed migration rolls back and is retried")
+
+def test_small_benchmark_run():
+    """The dashboard is timed with and without indexes and rollups on the synthetic data"""
+    results = run_benchmark(rows=3000, users=20, queries=5, days=60)
+
+    assert results['schema_version'] == LATEST_VERSION
+    assert results['load_rows_per_sec'] > 0
+    assert results['before']['queries'] == results['after']['queries'] == 5
+    assert any('SCAN health_logs' in step for step in results['before']['plans']['health_trends'])
+    assert any('health_log_weekly' in step for step in results['after']['plans']['health_trends'])
+    assert set(results['long_range_trends']) == {'90_days', '365_days'}
+
+    print("✅ Dashboard benchmark runs before and after the indexes")
+
+if __name__ == "__main__":
+    test_new_database_migrates_to_latest()
+    test_existing_database_is_adopted_and_reverts()
+    test_failed_migration_rolls_back_and_retries()
+    test_small_benchmark_run()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Extraction benchmark test script - checks that synthetic reports carry their
+ground truth in every format, that precision/recall are scored per field and
+that a small benchmark run produces comparable JSON results
+"""
+from extraction_benchmark import SyntheticReportGenerator, compare_results, run_benchmark, score_fields
+from report_processor import HospitalReportProcessor
+from pathlib import Path
+import tempfile
+import json
+
+def test_generated_reports_carry_their_values():
+    """Every format holds the same text, and the header reads back correctly"""
+    generator = SyntheticReportGenerator(seed=7)
+    page_lines, truth = generator.generate(pages=3, index=1)
+    assert len(page_lines) == 3
+    assert generator.generate(pages=3, index=1) == (page_lines, truth)
+
+    processor = HospitalReportProcessor()
+    with tempfile.TemporaryDirectory() as tmp:
+        for file_format in ('txt', 'docx', 'pdf'):
+            path = Path(tmp) / f'report.{file_format}'
+            generator.write(page_lines, path, file_format)
+            text = processor.extract_text_from_file(str(path))
+            assert f'Age: {truth["age"]} years' in text
+            assert text.count('CLINICAL NOTES:') == 3
+
+            data = processor.extract_report_data(str(path))
+            assert data['age'] == truth['age'] and data['gender'] == truth['gender']
+
+    print("✅ Synthetic reports carry their ground truth")
+
+def test_precision_and_recall_per_field():
+    """Right values are hits; wrong values are both a false positive and a miss"""
+    pairs = [
+        ({'glucose': 126.0, 'gender': 'male'}, {'glucose': 126.5, 'gender': 'male'}),
+        ({'glucose': 99.0, 'gender': 'female'}, {'glucose': 140.0, 'gender': None}),
+        ({'glucose': None, 'gender': 'male'}, {'glucose': 110.0, 'gender': 'male'}),
+        ({'glucose': 105.0, 'gender': None}, {'glucose': None, 'gender': None}),
+    ]
+    scores = score_fields(pairs, ['glucose', 'gender', 'urea'])
+
+    assert scores['glucose']['true_positives'] == 1
+    assert scores['glucose']['precision'] == 1 / 3
+    assert scores['glucose']['recall'] == 1 / 3
+    assert scores['gender']['precision'] == 1.0 and scores['gender']['recall'] == 2 / 3
+    assert scores['urea']['precision'] is None and scores['urea']['recall'] is None
+
+def test_small_benchmark_run():
+    """One case per format and size, with speed, memory and accuracy, as JSON"""
+    results = run_benchmark(sizes=[1, 2], formats=['txt', 'docx', 'pdf'], pages_per_case=4)
+    results = json.loads(json.dumps(results))
+
+    assert [(case['format'], case['pages']) for case in results['cases']] == [
+        ('txt', 1), ('txt', 2), ('docx', 1), ('docx', 2), ('pdf', 1), ('pdf', 2)
+    ]
+    for case in results['cases']:
+        assert case['documents'] >= 2
+        assert case['docs_per_sec'] > 0 and case['mb_per_sec'] > 0
+        assert case['peak_rss_mb'] is None or case['peak_rss_mb'] > 0
+        assert set(case['accuracy']) == {'extract_medical_data', 'extract_blood_pressure'}
+        assert case['accuracy']['extract_blood_pressure']['systolic']['recall'] == 1.0
+        assert case['accuracy']['extract_medical_data']['age']['precision'] == 1.0
+
+    comparison = compare_results(results, results)
+    assert len(comparison) == 6
+    assert all(entry['docs_per_sec_ratio'] == 1.0 and not entry['accuracy_changes'] for entry in comparison)
+
+    print("✅ Benchmark results are comparable JSON")
+
+if __name__ == "__main__":
+    test_generated_reports_carry_their_values()
+    test_precision_and_recall_per_field()
+    test_small_benchmark_run()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Extraction cache test script - checks that reports are only parsed once per
+content, extractor version and settings, and that the cache stays within its
+size limit by evicting the least recently used entries
+"""
+from extraction_cache import ExtractionCache
+from report_processor import HospitalReportProcessor
+from pathlib import Path
+import tempfile
+import time
+
+REPORT = "Age: 45 years\nGender: Male\nFasting Glucose: 126 mg/dl\nBlood Pressure: 140/90 mmHg\n"
+
+class CountingProcessor(HospitalReportProcessor):
+    """Counts how many files are actually read"""
+    reads = 0
+
+    def extract_text_from_file(self, file_path, content=None):
+        CountingProcessor.reads += 1
+        return super().extract_text_from_file(file_path, content)
+
+def test_same_content_is_extracted_once():
+    """Re-uploads under another name hit the cache; only the new report is read"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ExtractionCache(Path(tmp) / 'cache' / 'reports.db')
+        processor = CountingProcessor(cache=cache)
+        CountingProcessor.reads = 0
+
+        first = Path(tmp) / 'labs_january.txt'
+        first.write_text(REPORT)
+        original = processor.process_multiple_reports([str(first)])
+
+        reupload = Path(tmp) / 'a1b2c3_labs_january.txt'
+        reupload.write_text(REPORT)
+        new_report = Path(tmp) / 'labs_march.txt'
+        new_report.write_text(REPORT.replace('126', '131'))
+        again = processor.process_multiple_reports([str(reupload), str(new_report)])
+
+        assert CountingProcessor.reads == 2
+        assert [t['cached'] for t in again['file_timings']] == [True, False]
+        assert again['individual_reports'][0]['glucose'] == original['individual_reports'][0]['glucose']
+        assert again['individual_reports'][0]['source_file'] == 'a1b2c3_labs_january.txt'
+        assert cache.stats()['entries'] == 2 and cache.stats()['hits'] == 1
+
+        # Uploads parsed from memory share entries with files on disk
+        upload = processor.extract_report_data('upload.txt', REPORT.encode('utf-8'))
+        assert upload['glucose'] == original['individual_reports'][0]['glucose']
+        assert CountingProcessor.reads == 2 and cache.stats()['hits'] == 2
+
+        # Different extraction settings do not share entries
+        assert CountingProcessor(cache=cache, page_budget=3)._extraction_settings('x.pdf')['page_budget'] == 3
+        assert ExtractionCache.make_key('abc', 1) != ExtractionCache.make_key('abc', 2)
+
+        print("✅ Cached reports are not parsed again")
+
+def test_least_recently_used_entries_are_evicted():
+    """Over the size limit, the entries used longest ago go first"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ExtractionCache(Path(tmp) / 'reports.db', max_bytes=2500)
+        text = 'x' * 1000
+        for name in ('a', 'b'):
+            cache.put(name, name, text, {'glucose': 100.0})
+            time.sleep(0.01)
+
+        assert cache.get('a') is not None
+        time.sleep(0.01)
+        cache.put('c', 'c', text, {'glucose': 100.0})
+
+        assert cache.get('b') is None
+        assert cache.get('a') is not None and cache.get('c') is not None
+        assert cache.stats()['size_bytes'] <= 2500
+
+def test_worker_processes_share_the_cache():
+    """Parallel ingestion reads and fills the same cache"""
+    with tempfile.TemporaryDirectory() as tmp:
+        files = []
+        for i in range(4):
+            path = Path(tmp) / f'report_{i}.txt'
+            path.write_text(REPORT.replace('45', str(40 + i)))
+            files.append(str(path))
+
+        processor = HospitalReportProcessor(workers=2, cache=ExtractionCache(Path(tmp) / 'reports.db'))
+        first = processor.process_multiple_reports(files)
+        second = processor.process_multiple_reports(files)
+
+        assert not any(t['cached'] for t in first['file_timings'])
+        assert all(t['cached'] for t in second['file_timings'])
+        assert [r['age'] for r in second['individual_reports']] == [40, 41, 42, 43]
+
+if __name__ == "__main__":
+    test_same_content_is_extracted_once()
+    test_least_recently_used_entries_are_evicted()
+    test_worker_processes_share_the_cache()
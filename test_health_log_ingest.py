@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Bulk ingest test script - checks that JSON arrays and NDJSON batches are
+validated per row, that readings are stored once however often they are
+sent, and that the bulk endpoint reports what it skipped and why
+"""
+from health_log_ingest import parse_readings, validate_readings
+from dashboard_benchmark import run_ingest_benchmark
+from pathlib import Path
+import importlib
+import tempfile
+import json
+import sys
+import os
+
+def _reading(user_id='user_001', value=72, timestamp='2025-03-01T08:30:00Z', **extra):
+    return dict({'user_id': user_id, 'log_type': 'heart_rate', 'value': value,
+                 'timestamp': timestamp, 'unit': 'bpm'}, **extra)
+
+def test_batches_are_validated_per_row():
+    """Each bad reading gets its own errors; good ones are normalized to UTC"""
+    body = '\n'.join([
+        json.dumps(_reading()),
+        '{"user_id": "user_001",',
+        json.dumps(_reading(timestamp='2025-03-01T09:30:00+01:00')),
+        '',
+        json.dumps(_reading(user_id='user_999', value='high', timestamp='yesterday')),
+        '[1, 2]',
+        json.dumps(_reading(timestamp=1740817800, notes=5)),
+    ])
+    readings, errors = parse_readings(body.encode())
+    assert len(readings) == 7 and readings[1] is None and readings[3] is None
+    assert [error['row'] for error in errors] == [1]
+
+    rows, errors = validate_readings(readings, lambda user_ids: [u for u in user_ids if u == 'user_001'])
+    assert list(rows.index) == [0, 2]
+    assert list(rows['recorded_at']) == ['2025-03-01T08:30:00', '2025-03-01T08:30:00']
+    assert list(rows['log_date']) == ['2025-03-01', '2025-03-01']
+    assert errors == [
+        {'row': 4, 'errors': ['unknown user_id', 'value must be a finite number',
+                              'timestamp must be ISO 8601 or epoch seconds']},
+        {'row': 5, 'errors': ['reading must be a JSON object']},
+        {'row': 6, 'errors': ['notes must be a string']},
+    ]
+
+    readings, errors = parse_readings('[' + json.dumps(_reading()) + ']')
+    assert readings == [_reading()] and errors == []
+
+    # Epoch seconds past the datetime range are a row error, not a failed batch
+    rows, errors = validate_readings([_reading(), _reading(timestamp=1e30)], lambda user_ids: user_ids)
+    assert list(rows.index) == [0]
+    assert errors == [{'row': 1, 'errors': ['timestamp must be ISO 8601 or epoch seconds']}]
+
+    print("✅ Bulk readings are validated per row")
+
+def test_bulk_endpoint_dedupes_readings():
+    """Re-sent readings and repeats within a batch are stored once"""
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DASHBOARD_DB_PATH'] = str(Path(tmp) / 'dashboard.db')
+        try:
+            if 'dashboard_server' in sys.modules:
+                dashboard_server = importlib.reload(sys.modules['dashboard_server'])
+            else:
+                import dashboard_server
+        finally:
+            del os.environ['DASHBOARD_DB_PATH']
+        client = dashboard_server.app.test_client()
+        db = dashboard_server.dashboard.db
+
+        batch = [_reading(timestamp=f'2025-03-01T08:{minute:02d}:00Z') for minute in range(60)]
+        batch.append(_reading(timestamp='2025-03-01T08:00:00Z'))
+        batch.append(_reading(user_id='user_404'))
+        result = client.post('/api/log-health/bulk', json=batch).get_json()
+        assert (result['received'], result['inserted'], result['duplicates'], result['rejected']) == (62, 60, 1, 1)
+        assert result['errors'] == [{'row': 61, 'errors': ['unknown user_id']}]
+
+        ndjson = '\n'.join(json.dumps(reading) for reading in batch[:10]) + '\nnot json'
+        result = client.post('/api/log-health/bulk', data=ndjson, content_type='application/x-ndjson').get_json()
+        assert (result['received'], result['inserted'], result['duplicates'], result['rejected']) == (11, 0, 10, 1)
+        assert result['errors'][0]['row'] == 10
+
+        assert db.query_one("SELECT COUNT(*) FROM health_logs WHERE recorded_at IS NOT NULL")[0] == 60
+        assert client.post('/api/log-health/bulk', data='[{"user_id": ').status_code == 400
+        assert client.post('/api/log-health/bulk', data='').status_code == 400
+
+        dashboard_server.dashboard.writer.close()
+        db.close_all()
+
+    print("✅ Bulk ingest stores each reading once")
+
+def test_small_ingest_benchmark_run():
+    """New readings are all inserted; the same readings re-sent are all duplicates"""
+    results = run_ingest_benchmark(readings=2000, batch_size=500, users=10)
+
+    assert results['new']['inserted'] == 2000 and results['new']['duplicates'] == 0
+    assert results['resent']['inserted'] == 0 and results['resent']['duplicates'] == 2000
+    assert results['new']['readings_per_sec'] > 0
+
+if __name__ == "__main__":
+    test_batches_are_validated_per_row()
+    test_bulk_endpoint_dedupes_readings()
+    test_small_ingest_benchmark_run()
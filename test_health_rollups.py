@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Health rollup test script - checks that the daily and weekly rollups agree
+with the raw health logs however the logs were written (backfilled, logged
+one at a time or bulk ingested), that logs are rolled up on their calendar
+day and unreadable dates are left out, and that trend series come back per
+day and per week
+"""
+from health_rollups import trend_series, trend_summary
+from dashboard_migrations import migrate
+from datetime import date, timedelta
+from pathlib import Path
+import importlib
+import tempfile
+import sqlite3
+import sys
+import os
+
+RAW_TRENDS = """
+    SELECT log_type, AVG(value), MIN(value), MAX(value), COUNT(*)
+    FROM health_logs
+    WHERE user_id = ? AND log_date >= date('now', ?)
+    GROUP BY log_type
+"""
+
+def _matches_raw_logs(cursor, user_id, days):
+    raw = cursor.execute(RAW_TRENDS, (user_id, f'-{days} days')).fetchall()
+    rolled_up = trend_summary(cursor, user_id, days)
+    return len(raw) == len(rolled_up) and all(
+        a[0] == b[0] and a[2:] == b[2:] and (a[1] is None and b[1] is None or abs(a[1] - b[1]) < 1e-9)
+        for a, b in zip(raw, rolled_up)
+    )
+
+def test_rollups_match_raw_logs():
+    """Backfilled, triggered and batch-rolled-up logs give the raw aggregates for any window"""
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(Path(tmp) / 'dashboard.db')
+        migrate(conn, target=3)
+        today = date.today()
+        logs = [('user_001', (today - timedelta(days=day)).isoformat(), log_type, value)
+                for day in range(400) for log_type, value in (('glucose', 90 + day % 30), ('steps', 5000 + day))]
+        conn.executemany("INSERT INTO health_logs (user_id, log_date, log_type, value) VALUES (?, ?, ?, ?)", logs)
+        conn.commit()
+
+        migrate(conn)  # Backfills the rollups
+        conn.execute("INSERT INTO health_logs (user_id, log_date, log_type, value) VALUES (?, ?, ?, ?)",
+                     ('user_001', today.isoformat(), 'glucose', 240.0))
+        conn.execute("INSERT INTO health_logs (user_id, log_date, log_type, value) VALUES (?, ?, ?, ?)",
+                     ('user_001', today.isoformat(), 'weight', None))
+        conn.commit()
+
+        cursor = conn.cursor()
+        for days in (1, 6, 7, 30, 90, 365, 1000):
+            assert _matches_raw_logs(cursor, 'user_001', days), days
+        assert dict((row[0], row[1:]) for row in trend_summary(cursor, 'user_001', 1))['weight'] == (None, None, None, 1)
+
+        weeks = trend_series(cursor, 'user_001', 365, 'week')
+        assert {row[1] for row in weeks} <= {(today - timedelta(days=offset)).isoformat() for offset in range(372)}
+        assert all(date.fromisoformat(row[1]).weekday() == 0 for row in weeks)
+        assert sum(row[5] for row in weeks if row[0] == 'steps') >= 365
+        days = trend_series(cursor, 'user_001', 6, 'day')
+        assert [row[1] for row in days if row[0] == 'steps'] == [
+            (today - timedelta(days=offset)).isoformat() for offset in range(6, -1, -1)]
+        conn.close()
+
+    print("✅ Rollups match the raw health logs")
+
+def test_rollups_use_the_calendar_day():
+    """Date-times share their day's rollup row; dates SQLite cannot read are skipped, not errors"""
+    insert = "INSERT INTO health_logs (user_id, log_date, log_type, value) VALUES (?, ?, ?, ?)"
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(Path(tmp) / 'dashboard.db')
+        migrate(conn, target=3)
+        today = date.today().isoformat()
+        conn.executemany(insert, [('user_001', today, 'glucose', 100.0),
+                                  ('user_001', f'{today}T07:30:00', 'glucose', 110.0),
+                                  ('user_001', '03/01/2024', 'glucose', 500.0)])
+        conn.commit()
+
+        migrate(conn)  # The backfill skips the unreadable date
+        conn.executemany(insert, [('user_001', f'{today} 21:00:00', 'glucose', 120.0),
+                                  ('user_001', '03/01/2024', 'glucose', 600.0)])
+        conn.commit()
+
+        cursor = conn.cursor()
+        assert trend_series(cursor, 'user_001', 7, 'day') == [('glucose', today, 110.0, 100.0, 120.0, 3)]
+        assert conn.execute("SELECT SUM(readings) FROM health_log_weekly").fetchone() == (3,)
+        assert conn.execute("SELECT COUNT(*) FROM health_logs").fetchone() == (5,)
+        assert _matches_raw_logs(cursor, 'user_001', 30)
+        conn.close()
+
+    print("✅ Rollups group logs by calendar day")
+
+def test_dashboard_trends_read_rollups():
+    """Single logs and bulk ingests both reach the dashboard trends and the chart API"""
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DASHBOARD_DB_PATH'] = str(Path(tmp) / 'dashboard.db')
+        try:
+            if 'dashboard_server' in sys.modules:
+                dashboard_server = importlib.reload(sys.modules['dashboard_server'])
+            else:
+                import dashboard_server
+        finally:
+            del os.environ['DASHBOARD_DB_PATH']
+        client = dashboard_server.app.test_client()
+        db = dashboard_server.dashboard.db
+
+        today = date.today()
+        readings = [{'user_id': 'user_003', 'log_type': 'heart_rate', 'value': 60 + minute % 25,
+                     'timestamp': f'{today - timedelta(days=minute % 90)}T{minute // 90:02d}:{minute % 60:02d}:00Z'}
+                    for minute in range(900)]
+        assert client.post('/api/log-health/bulk', json=readings).get_json()['inserted'] == 900
+        assert client.post('/api/log-health/bulk', json=readings).get_json()['inserted'] == 0
+        assert client.post('/api/log-health', json={'user_id': 'user_003', 'log_type': 'heart_rate',
+                                                     'value': 190, 'unit': 'bpm'}).status_code == 200
+        assert client.post('/api/log-health', json={'user_id': 'user_003', 'log_type': 'heart_rate',
+                                                     'value': 80, 'unit': 'bpm',
+                                                     'log_date': '03/01/2024'}).status_code == 200
+
+        cursor = db.connection().cursor()
+        for days in (7, 30, 90):
+            assert _matches_raw_logs(cursor, 'user_003', days), days
+        trends = client.get('/api/dashboard/user_003').get_json()['health_trends']
+        assert trends['heart_rate']['max'] == 190
+
+        chart = client.get('/api/trends/user_003?days=90&granularity=week').get_json()
+        assert sum(week['readings'] for week in chart['series']['heart_rate']) >= 901
+        assert client.get('/api/trends/user_003?granularity=month').status_code == 400
+
+        dashboard_server.dashboard.writer.close()
+        db.close_all()
+
+if __name__ == "__main__":
+    test_rollups_match_raw_logs()
+    test_rollups_use_the_calendar_day()
+    test_dashboard_trends_read_rollups()
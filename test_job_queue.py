@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Job queue test script - checks that background jobs record their results in
+the SQLite job store, that a full queue pushes back instead of growing, and
+that jobs orphaned by a restart are reported as failed while jobs of other
+live processes sharing the database are not
+"""
+from job_queue import JobQueue, JobQueueFull, JobStore
+from pathlib import Path
+import threading
+import tempfile
+import time
+
+def _wait_for(store, job_id, timeout=10):
+    """Poll the store until the job finishes"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = store.get(job_id)
+        if job['status'] in ('succeeded', 'failed'):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish")
+
+def _fail(message):
+    raise ValueError(message)
+
+def test_jobs_record_results_and_errors():
+    """Successful jobs store their JSON result, failing jobs their error message"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JobStore(Path(tmp) / 'jobs.db')
+        jobs = JobQueue(store, workers=2, max_pending=4)
+
+        ok_id = jobs.submit('full-assessment', lambda profile: {'risk': profile['age'] / 100}, {'age': 42})
+        failed_id = jobs.submit('upload-report', _fail, 'Could not extract medical data')
+
+        ok = _wait_for(store, ok_id)
+        assert ok['status'] == 'succeeded' and ok['result'] == {'risk': 0.42}
+        assert ok['kind'] == 'full-assessment' and ok['started_at'] and ok['finished_at']
+
+        failed = _wait_for(store, failed_id)
+        assert failed['status'] == 'failed' and failed['error'] == 'Could not extract medical data'
+        assert store.get('no-such-job') is None
+
+        jobs.shutdown()
+        print("✅ Job results and errors are stored")
+
+def test_full_queue_pushes_back():
+    """Once workers are busy and the queue is full, submit raises instead of queuing"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JobStore(Path(tmp) / 'jobs.db')
+        release = threading.Event()
+        jobs = JobQueue(store, workers=1, max_pending=2)
+
+        running = jobs.submit('upload-report', release.wait)
+        deadline = time.time() + 5
+        while store.get(running)['status'] != 'running' and time.time() < deadline:
+            time.sleep(0.01)
+
+        queued = [jobs.submit('upload-report', lambda: 'done') for _ in range(2)]
+        try:
+            jobs.submit('upload-report', lambda: 'done')
+            assert False, "submission beyond the queue bound was accepted"
+        except JobQueueFull:
+            pass
+
+        release.set()
+        assert all(_wait_for(store, job_id)['status'] == 'succeeded' for job_id in [running] + queued)
+        jobs.shutdown()
+        print("✅ Full queue rejects new jobs until it drains")
+
+def test_restart_fails_orphaned_jobs():
+    """Jobs of a process whose lease ran out are failed; a live process's jobs are not"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'jobs.db'
+        live = JobStore(db_path)
+        running = live.create('full-assessment')
+        live.mark_running(running)
+
+        # Another process sharing the database (a reloader child, a second worker)
+        other = JobStore(db_path)
+        assert other.get(running)['status'] == 'running'
+
+        gone = JobStore(db_path)
+        orphan = gone.create('upload-report')
+        gone.close()
+        assert other.fail_orphaned_jobs() == 1
+        job = other.get(orphan)
+        assert job['status'] == 'failed'
+        assert 'restart' in job['error']
+        assert other.get(running)['status'] == 'running'
+
+        # A store that crashed without closing is an orphan once its lease runs out
+        crashed = JobStore(db_path, lease_seconds=0.3)
+        stuck = crashed.create('upload-report')
+        crashed._stopped.set()
+        time.sleep(0.5)
+        restarted = JobStore(db_path, lease_seconds=0.3)
+        assert restarted.get(stuck)['status'] == 'failed'
+        assert other.get(running)['status'] == 'running'
+
+        for store in (live, other, restarted):
+            store.close()
+
+if __name__ == "__main__":
+    test_jobs_record_results_and_errors()
+    test_full_queue_pushes_back()
+    test_restart_fails_orphaned_jobs()
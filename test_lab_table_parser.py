@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Lab table parser test script - checks that "Analyte: value unit (range)"
+lines and lab result tables are indexed by field with their units and
+reference ranges, that history/plan sections are left out, and that
+extract_medical_data takes structured results over nearby numbers
+"""
+from lab_table_parser import LabTableParser
+from report_processor import HospitalReportProcessor
+from pathlib import Path
+
+LAB_REPORT = """
+LABORATORY RESULTS:
+Test Name          Result    Units    Reference Range
+Fasting Glucose    126 H     mg/dL    70 - 99
+HbA1c              6.8       %        < 5.7
+HDL Cholesterol    41        mg/dL    > 40
+Cholesterol/HDL Ratio    5.1
+
+Serum Creatinine: 1.10 mg/dl (0.6-1.2)
+Glucose, Fasting (FBS): 5.4 mmol/L
+Urine Glucose: 0 mg/dl
+Body Mass Index: 27.3
+
+PAST MEDICAL HISTORY:
+HbA1c: 9.1% in 2019
+
+PLAN:
+Target HbA1c: 7%
+"""
+
+def test_result_lines_and_tables_are_indexed():
+    """Every result lands under its field with its unit and reference range"""
+    parser = LabTableParser(HospitalReportProcessor().medical_mappings)
+    index = parser.parse(LAB_REPORT)
+
+    assert set(index) == {'glucose', 'hba1c', 'hdl', 'creatinine', 'bmi'}
+    fasting = index['glucose'][0]
+    assert fasting['value'] == 126.0 and fasting['unit'] == 'mg/dl'
+    assert (fasting['low'], fasting['high']) == (70.0, 99.0)
+    assert fasting['section'] == 'laboratory results'
+    assert index['glucose'][1]['unit'] == 'mmol/l'
+
+    # Previous and target values are not current results
+    assert [result['value'] for result in index['hba1c']] == [6.8]
+    assert index['hba1c'][0]['high'] == 5.7
+    assert index['hdl'][0]['low'] == 40.0 and index['hdl'][0]['high'] is None
+    assert index['creatinine'][0]['value'] == 1.1 and index['bmi'][0]['unit'] is None
+
+    print("✅ Lab results are indexed by field")
+
+def test_analyte_names_resolve_to_fields():
+    """Aliases and qualified names resolve; ratios, urine and targets do not"""
+    parser = LabTableParser(HospitalReportProcessor().medical_mappings)
+
+    assert parser.resolve('Hemoglobin A1c') == 'hba1c'
+    assert parser.resolve('Hemoglobin') == 'hemoglobin'
+    assert parser.resolve('Fasting Serum Glucose') == 'glucose'
+    assert parser.resolve('LDL-C') == 'ldl'
+    assert parser.resolve('Non-HDL Cholesterol') is None
+    assert parser.resolve('Urine Glucose') is None
+    assert parser.resolve('Report Date') is None
+
+def test_structured_results_win_over_nearby_numbers():
+    """Values come from the result lines, not from ranges, dates or neighbours"""
+    processor = HospitalReportProcessor()
+    data = processor.extract_medical_data(Path('sample_patient_report.txt').read_text())
+
+    assert data['glucose'] == 126.0
+    assert data['hba1c'] == 6.2
+    assert data['hdl'] == 35.0 and data['ldl'] == 160.0
+    assert data['bmi'] == 28.5 and data['heart_rate'] == 85.0
+    assert data['urea'] is None
+
+    data = processor.extract_medical_data(LAB_REPORT)
+    assert data['hba1c'] == 6.8 and data['creatinine'] == 1.1
+
+    # Free text without result lines still goes through the keyword scan
+    data = processor.extract_medical_data('Pulse was 72 bpm on arrival, glucose 140 mg/dl')
+    assert data['heart_rate'] is not None and data['glucose'] is not None
+
+if __name__ == "__main__":
+    test_result_lines_and_tables_are_indexed()
+    test_analyte_names_resolve_to_fields()
+    test_structured_results_win_over_nearby_numbers()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Model artifact test script - checks that memory-mapped model artifacts load
+into the predictor and score exactly like the legacy pickle files, that
+corrupted or unknown-version artifacts are rejected, and that saving over an
+artifact never leaves readers without one
+"""
+from enhanced_chronic_disease_predictor import EnhancedChronicDiseasePredictor
+from model_artifact import load_artifact, save_artifact, read_manifest, SCHEMA_VERSION
+import numpy as np
+import pandas as pd
+import tempfile
+import threading
+import json
+from pathlib import Path
+
+def test_artifact_matches_pickle_predictions():
+    """Artifacts and pickles of the same model give identical batch predictions"""
+    cohorts = {
+        'stroke': pd.read_csv('dataset_cache/fedesoriano_stroke-prediction-dataset/healthcare-dataset-stroke-data.csv')
+                    .drop(columns='stroke').head(50),
+        'heart_disease': pd.read_csv('dataset_cache/johnsmith88_heart-disease-dataset/heart.csv')
+                           .drop(columns='target').head(50)
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for disease, cohort in cohorts.items():
+            legacy = EnhancedChronicDiseasePredictor()
+            assert legacy.load_model(f'enhanced_chronic_disease_model_{disease}.pkl', disease)
+
+            artifact_path = Path(tmp) / f'enhanced_chronic_disease_model_{disease}.model'
+            assert legacy.save_model(disease, str(artifact_path))
+            assert read_manifest(artifact_path)['metadata']['disease'] == disease
+
+            predictor = EnhancedChronicDiseasePredictor()
+            assert predictor.load_model(str(artifact_path), disease)
+
+            expected = legacy.predict_risk_scores_batch(cohort, disease)
+            actual = predictor.predict_risk_scores_batch(cohort, disease)
+            assert np.array_equal(expected['risk_score'], actual['risk_score'])
+            assert np.array_equal(expected['confidence'], actual['confidence'])
+
+            print(f"✅ {disease}: artifact predictions match the pickle")
+
+def test_artifact_rejects_corruption_and_unknown_schema():
+    """A changed byte or a newer schema version makes loading fail"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'sample.model'
+        save_artifact({'coef': np.arange(32, dtype=np.float64), 'name': 'sample'}, path)
+
+        restored = load_artifact(path)
+        assert restored['name'] == 'sample'
+        assert np.array_equal(restored['coef'], np.arange(32, dtype=np.float64))
+
+        arrays = bytearray((path / 'arrays.bin').read_bytes())
+        arrays[0] ^= 0xFF
+        (path / 'arrays.bin').write_bytes(bytes(arrays))
+        try:
+            load_artifact(path)
+            assert False, "corrupted artifact was loaded"
+        except ValueError:
+            pass
+
+        manifest = json.loads((path / 'manifest.json').read_text())
+        manifest['schema_version'] = SCHEMA_VERSION + 1
+        (path / 'manifest.json').write_text(json.dumps(manifest))
+        try:
+            read_manifest(path)
+            assert False, "unknown schema version was accepted"
+        except ValueError:
+            pass
+
+def test_saving_swaps_versions_atomically():
+    """Readers always find a complete artifact while it is saved over; two versions are kept"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'sample.model'
+        path.mkdir()  # A directory artifact from before versioning
+        save_artifact({'coef': np.zeros(8), 'version': -1}, path)
+
+        failures = []
+        stop = threading.Event()
+        def poll():
+            while not stop.is_set():
+                try:
+                    assert load_artifact(path)['coef'].shape == (4096,)
+                except Exception as e:
+                    failures.append(e)
+
+        save_artifact({'coef': np.zeros(4096), 'version': 0}, path)
+        reader = threading.Thread(target=poll)
+        reader.start()
+        try:
+            for version in range(1, 30):
+                save_artifact({'coef': np.full(4096, float(version)), 'version': version}, path)
+        finally:
+            stop.set()
+            reader.join()
+
+        assert not failures, failures[:3]
+        assert path.is_symlink() and load_artifact(path)['version'] == 29
+        assert len(list(Path(tmp).glob('sample.model.v*'))) == 2
+
+if __name__ == "__main__":
+    test_artifact_matches_pickle_predictions()
+    test_artifact_rejects_corruption_and_unknown_schema()
+    test_saving_swaps_versions_atomically()
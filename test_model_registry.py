@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Model registry test script - checks that the serving predictor registers all
+saved models without loading them, loads each one on first use, never
+imports the network-oriented dataset fetcher, hot-swaps retrained models,
+and that the API swaps predictor and scorer together behind a required
+admin token
+"""
+from model_registry import ModelRegistry
+from model_artifact import convert_pickle
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import subprocess
+import tempfile
+import time
+import json
+import sys
+
+HEART_SAMPLE = {
+    'age': 63, 'sex': 1, 'cp': 3, 'trestbps': 145, 'chol': 233, 'fbs': 1,
+    'restecg': 0, 'thalach': 150, 'exang': 0, 'oldpeak': 2.3, 'slope': 0, 'ca': 0, 'thal': 1
+}
+
+STARTUP_SCRIPT = f"""
+import json, sys
+from model_registry import get_model_registry
+registry = get_model_registry('.')
+before = sorted(registry.predictor.models)
+available = registry.available_diseases()
+result = registry.predictor.predict_risk_score({HEART_SAMPLE!r}, 'heart_disease')
+print(json.dumps({{
+    'available': available,
+    'loaded_before': before,
+    'loaded_after': sorted(registry.predictor.models),
+    'scored': result is not None,
+    'fetcher_imported': 'multi_api_dataset_fetcher' in sys.modules or 'kaggle' in sys.modules
+}}))
+"""
+
+def test_registry_startup_is_lazy_and_offline():
+    """A fresh process loads nothing up front and never imports the fetcher"""
+    output = subprocess.run(
+        [sys.executable, '-c', STARTUP_SCRIPT], capture_output=True, text=True, check=True
+    ).stdout
+    state = json.loads(output.strip().splitlines()[-1])
+
+    assert set(state['available']) == {'diabetes', 'heart_disease', 'kidney_disease', 'stroke', 'hypertension', 'copd'}
+    assert state['loaded_before'] == []
+    assert state['loaded_after'] == ['heart_disease']
+    assert state['scored']
+    assert not state['fetcher_imported']
+
+    print("✅ Registry starts without loading models or touching the fetcher")
+
+def test_concurrent_first_use_loads_once():
+    """Parallel first requests for a disease share one load and agree on the score"""
+    registry = ModelRegistry('.')
+    assert registry.model_info('heart_disease')['loaded'] is False
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(
+            lambda _: registry.predictor.predict_risk_score(dict(HEART_SAMPLE), 'heart_disease'), range(16)
+        ))
+
+    assert all(result is not None for result in results)
+    assert len({result['risk_score'] for result in results}) == 1
+    assert list(registry.predictor.models) == ['heart_disease']
+    assert registry.model_info('heart_disease')['loaded'] is True
+
+def _retrain_heart_model(model_dir, auc_score):
+    """Write a new heart_disease artifact version into ``model_dir``"""
+    from enhanced_chronic_disease_predictor import EnhancedChronicDiseasePredictor
+    trainer = EnhancedChronicDiseasePredictor()
+    assert trainer.load_model('enhanced_chronic_disease_model_heart_disease.pkl', 'heart_disease')
+    trainer.model_metadata['heart_disease'] = {**trainer.model_metadata['heart_disease'], 'auc_score': auc_score}
+    assert trainer.save_model('heart_disease', str(Path(model_dir) / 'enhanced_chronic_disease_model_heart_disease.model'))
+
+def test_hot_reload_swaps_changed_models():
+    """Changed models are swapped in on a new predictor; the old one keeps working"""
+    with tempfile.TemporaryDirectory() as tmp:
+        for disease in ('heart_disease', 'stroke'):
+            name = f'enhanced_chronic_disease_model_{disease}'
+            convert_pickle(f'{name}.pkl', Path(tmp) / f'{name}.model')
+
+        registry = ModelRegistry(tmp)
+        swaps = []
+        registry.add_swap_listener(swaps.append)
+
+        old_predictor = registry.predictor
+        assert old_predictor.predict_risk_score(dict(HEART_SAMPLE), 'heart_disease') is not None
+        old_version = registry.model_info('heart_disease')['version']
+        assert registry.reload() == {}
+
+        _retrain_heart_model(tmp, 0.5)
+        reloaded = registry.reload()
+
+        assert list(reloaded) == ['heart_disease']
+        assert reloaded['heart_disease'] != old_version
+        assert registry.predictor is not old_predictor and swaps == [registry.predictor]
+        # Previously loaded models are warm on the new predictor; the rest stay lazy
+        assert list(registry.predictor.models) == ['heart_disease']
+        assert registry.predictor.model_metadata['heart_disease']['auc_score'] == 0.5
+        assert registry.model_info('heart_disease')['version'] == reloaded['heart_disease']
+        # Requests still holding the old predictor finish on the old version
+        assert old_predictor.model_metadata['heart_disease']['auc_score'] != 0.5
+        assert old_predictor.predict_risk_score(dict(HEART_SAMPLE), 'heart_disease') is not None
+
+        # The watcher picks up the next deployment on its own
+        registry.start_watching(interval=0.05)
+        try:
+            _retrain_heart_model(tmp, 0.6)
+            deadline = time.time() + 10
+            while registry.predictor.model_metadata['heart_disease']['auc_score'] != 0.6 and time.time() < deadline:
+                time.sleep(0.05)
+        finally:
+            registry.stop_watching()
+        assert registry.predictor.model_metadata['heart_disease']['auc_score'] == 0.6
+
+        print("✅ Hot reload swaps new model versions in")
+
+def test_api_reload_needs_a_token_and_swaps_as_one():
+    """Reloads are refused unless ADMIN_TOKEN is set; predictor and scorer change together"""
+    import api_server
+    client = api_server.app.test_client()
+    token = api_server.ADMIN_TOKEN
+    try:
+        api_server.ADMIN_TOKEN = None
+        assert client.post('/api/admin/reload-models').status_code == 403
+        api_server.ADMIN_TOKEN = 'secret'
+        assert client.post('/api/admin/reload-models').status_code == 401
+        assert client.post('/api/admin/reload-models', headers={'X-Admin-Token': 'wrong'}).status_code == 401
+    finally:
+        api_server.ADMIN_TOKEN = token
+
+    registry = ModelRegistry('.')
+    models = api_server.models
+    try:
+        api_server._use_predictor(registry.predictor)
+        predictor, scorer = api_server._serving_models()
+        assert predictor is registry.predictor and scorer.predictor is predictor
+        # The swapped-in scorer keeps fanning diseases out over its thread pool
+        assert scorer.max_workers == api_server.SCORER_WORKERS and scorer._executor is not None
+    finally:
+        api_server.models = models
+
+if __name__ == "__main__":
+    test_registry_startup_is_lazy_and_offline()
+    test_concurrent_first_use_loads_once()
+    test_hot_reload_swaps_changed_models()
+    test_api_reload_needs_a_token_and_swaps_as_one()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Multi-disease scorer test script - checks fused scoring against per-disease
+predict_risk_score calls, serially and on a thread pool
+"""
+from enhanced_chronic_disease_predictor import EnhancedChronicDiseasePredictor
+from multi_disease_scorer import MultiDiseaseScorer
+import numpy as np
+
+HEART_SAMPLE = {
+    'age': 63, 'sex': 1, 'cp': 3, 'trestbps': 145, 'chol': 233, 'fbs': 1,
+    'restecg': 0, 'thalach': 150, 'exang': 0, 'oldpeak': 2.3, 'slope': 0, 'ca': 0, 'thal': 1
+}
+STROKE_SAMPLE = {
+    'id': 9046, 'gender': 'Male', 'age': 67.0, 'hypertension': 0, 'heart_disease': 1,
+    'ever_married': 'Yes', 'work_type': 'Private', 'Residence_type': 'Urban',
+    'avg_glucose_level': 228.69, 'bmi': 36.6, 'smoking_status': 'formerly smoked'
+}
+
+def _sample_mapper(patient_profile, diseases):
+    """Map the test profile straight onto the stored samples"""
+    samples = {'heart_disease': HEART_SAMPLE, 'stroke': STROKE_SAMPLE}
+    return {disease: samples.get(disease, {}) for disease in diseases}
+
+def test_fused_scoring_matches_individual_predictions():
+    """Serial and threaded scoring return the same results as single predicts"""
+    predictor = EnhancedChronicDiseasePredictor()
+    assert predictor.load_model('enhanced_chronic_disease_model_heart_disease.pkl', 'heart_disease')
+    assert predictor.load_model('enhanced_chronic_disease_model_stroke.pkl', 'stroke')
+
+    expected = {
+        'heart_disease': predictor.predict_risk_score(HEART_SAMPLE, 'heart_disease'),
+        'stroke': predictor.predict_risk_score(STROKE_SAMPLE, 'stroke')
+    }
+
+    for max_workers in (None, 4):
+        scorer = MultiDiseaseScorer(predictor, _sample_mapper, max_workers=max_workers)
+        results = scorer.score({'age': 63})
+        scorer.shutdown()
+
+        assert list(results) == ['heart_disease', 'stroke']
+        for disease, result in results.items():
+            assert np.isclose(result['risk_score'], expected[disease]['risk_score'])
+            assert np.isclose(result['confidence'], expected[disease]['confidence'])
+            assert result['risk_category'] == expected[disease]['risk_category']
+
+        print(f"✅ max_workers={max_workers}: fused scores match individual predictions")
+
+def test_fused_scoring_skips_unavailable_diseases():
+    """Unknown diseases and empty feature mappings are left out of the result"""
+    predictor = EnhancedChronicDiseasePredictor()
+    assert predictor.load_model('enhanced_chronic_disease_model_heart_disease.pkl', 'heart_disease')
+
+    scorer = MultiDiseaseScorer(predictor, lambda profile, diseases: {d: {} for d in diseases})
+    assert scorer.score({'age': 63}, ['heart_disease', 'copd']) == {}
+
+if __name__ == "__main__":
+    test_fused_scoring_matches_individual_predictions()
+    test_fused_scoring_skips_unavailable_diseases()
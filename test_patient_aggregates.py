@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Patient aggregate test script - checks that the incremental store agrees with
+recomputing from every report, fits a real trend over report dates, skips
+reports it has already seen (by file content and values) and persists
+between runs
+"""
+from patient_aggregates import PatientAggregateStore
+from report_processor import HospitalReportProcessor
+from pathlib import Path
+import tempfile
+
+def _report(report_date, glucose, systolic=None, age=55):
+    return {
+        'glucose': glucose, 'systolic': systolic, 'age': age, 'gender': 'female',
+        'report_date': report_date, 'source_file': f'labs_{report_date}.txt'
+    }
+
+HISTORY = [
+    _report('2023-01-10', 110.0, 128.0),
+    _report('2023-04-12', 118.0, 131.0),
+    _report('2023-07-15', 127.0),
+    _report('2023-10-20', 134.0, 129.0, age=56),
+]
+
+def test_incremental_aggregate_matches_full_recompute():
+    """Adding reports one at a time gives the same summary as aggregating them all"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PatientAggregateStore(Path(tmp) / 'aggregates.db')
+        for report in HISTORY:
+            aggregate = store.add_reports('P001', [dict(report)])
+
+        expected = HospitalReportProcessor().aggregate_medical_data(HISTORY)
+        for field in ('glucose', 'systolic'):
+            for key in ('latest', 'values_count', 'trend'):
+                assert aggregate[field][key] == expected[field][key]
+            assert abs(aggregate[field]['average'] - expected[field]['average']) < 1e-9
+
+        assert aggregate['glucose']['trend'] == 'increasing'
+        assert 0.08 < aggregate['glucose']['slope_per_day'] < 0.09
+        assert aggregate['systolic']['trend'] == 'stable'
+        assert aggregate['age'] == 56 and aggregate['gender'] == 'female'
+        assert aggregate['hba1c'] is None
+
+        print("✅ Incremental aggregate matches full recompute")
+
+def test_repeated_and_late_reports():
+    """Re-submitted reports are ignored and an older report does not become the latest"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'aggregates.db'
+        store = PatientAggregateStore(db_path)
+        store.add_reports('P001', [dict(report) for report in HISTORY[1:]])
+
+        aggregate = store.add_reports('P001', [dict(HISTORY[-1]), dict(HISTORY[0])])
+        assert store.report_count('P001') == 4
+        assert aggregate['glucose']['values_count'] == 4
+        assert aggregate['glucose']['latest'] == 134.0
+        assert aggregate['glucose']['first_at'].startswith('2023-01-10')
+        assert aggregate['age'] == 56
+
+        # Stored aggregates survive a restart; other patients are separate
+        reopened = PatientAggregateStore(db_path)
+        assert reopened.get_aggregate('P001')['glucose']['values_count'] == 4
+        assert reopened.get_aggregate('P002') == {}
+
+def test_undated_reports_are_told_apart_by_file():
+    """Two undated files with the same values are two reports; the same file again is not"""
+    with tempfile.TemporaryDirectory() as tmp:
+        morning = Path(tmp) / 'glucose_morning.txt'
+        evening = Path(tmp) / 'glucose_evening.txt'
+        morning.write_text('Glucose: 120 mg/dl\n')
+        evening.write_text('Glucose: 120 mg/dl\n\n')
+
+        processor = HospitalReportProcessor()
+        reports = processor.process_multiple_reports([str(morning), str(evening)])['individual_reports']
+        assert reports[0]['source_hash'] != reports[1]['source_hash']
+
+        store = PatientAggregateStore(Path(tmp) / 'aggregates.db')
+        assert store.add_reports('P001', reports)['glucose']['values_count'] == 2
+        again = processor.process_multiple_reports([str(morning)])['individual_reports']
+        assert store.add_reports('P001', again)['glucose']['values_count'] == 2
+        assert store.report_count('P001') == 2
+
+def test_stateless_aggregate_trend():
+    """aggregate_medical_data fits the trend too, over report order when undated"""
+    processor = HospitalReportProcessor()
+    falling = [{'glucose': value} for value in (150.0, 138.0, 121.0)]
+    steady = [{'glucose': value} for value in (100.0, 101.0, 100.0)]
+
+    assert processor.aggregate_medical_data(falling)['glucose']['trend'] == 'decreasing'
+    assert processor.aggregate_medical_data(steady)['glucose']['trend'] == 'stable'
+    assert processor.aggregate_medical_data(falling[:1])['glucose']['trend'] == 'stable'
+
+if __name__ == "__main__":
+    test_incremental_aggregate_matches_full_recompute()
+    test_repeated_and_late_reports()
+    test_undated_reports_are_told_apart_by_file()
+    test_stateless_aggregate_trend()
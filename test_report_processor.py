@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Report processor test script - checks that the single-pass extraction engine
+finds exactly the values the per-keyword regex scan finds, and that PDF
+reports are streamed page by page with an early stop, and that parallel
+ingestion returns the serial results in file order, and that the per-file
+timeout holds with and without a process pool (killing workers that stay
+stuck), and that reports can be parsed straight from memory, and that DOCX
+tables are read in document order
+"""
+from report_processor import HospitalReportProcessor, iter_docx_lines
+from extraction_benchmark import write_pdf
+from pathlib import Path
+from io import BytesIO
+import tempfile
+import threading
+import signal
+import docx
+import time
+
+TRICKY_TEXT = """
+Glucose 5.4 mmol/L on admission, fasting glucose: 99 mg/dl
+HbA1c 6.8 % (a1c target < 7 percentage)
+HDL cholesterol 41 mg/dL; total cholesterol 12.5.6 mg/dl
+Hb 13 g/dl
+BMI
+31.2 kg/m2, pulse 72 bpm heart rate 70bpm, TG 150
+"""
+
+def _per_keyword_values(processor, text):
+    """Reference: one extract_numerical_values call per keyword and unit set"""
+    values = {}
+    for key, (keywords, units) in processor.medical_mappings.items():
+        values[key] = []
+        for keyword in keywords:
+            values[key].extend(processor.extract_numerical_values(text, keyword, units))
+    return values
+
+def test_engine_matches_per_keyword_scan():
+    """Same values, in the same order, as scanning once per keyword and unit"""
+    processor = HospitalReportProcessor()
+    texts = [Path('sample_patient_report.txt').read_text(), Path('test_patient_report.txt').read_text(), TRICKY_TEXT]
+
+    for text in texts:
+        assert processor.extraction_engine.extract(text.lower()) == _per_keyword_values(processor, text)
+
+    print("✅ Extraction engine matches the per-keyword scan")
+
+def test_extract_medical_data_on_sample_report():
+    """Demographics and blood pressure still come out of the sample report"""
+    processor = HospitalReportProcessor()
+    data = processor.extract_medical_data(Path('sample_patient_report.txt').read_text())
+
+    assert data['age'] == 45
+    assert data['gender'] == 'male'
+    assert data['systolic'] == 140 and data['diastolic'] == 90
+    assert data['glucose'] is not None and data['urea'] is None
+
+def test_streaming_stops_when_fields_are_found():
+    """Pages are pulled lazily and reading stops once the requested fields are in"""
+    processor = HospitalReportProcessor()
+    pages = ['Age: 45 years\nGender: Male', 'Blood Pressure: 140/90 mmHg', 'Heart Rate: 85 bpm', 'Heart Rate: 95 bpm']
+    pulled = []
+
+    def page_stream():
+        for page in pages:
+            pulled.append(page)
+            yield page
+
+    data = processor.extract_medical_data_streaming(page_stream(), required_fields=['age', 'systolic'])
+    assert data['pages_read'] == 2 and data['stop_reason'] == 'fields_complete'
+    assert len(pulled) == 2
+    assert data['age'] == 45 and data['systolic'] == 140 and data['heart_rate'] is None
+
+    data = processor.extract_medical_data_streaming(iter(pages), page_budget=3)
+    assert data['pages_read'] == 3 and data['stop_reason'] == 'page_budget'
+
+    data = processor.extract_medical_data_streaming(iter(pages))
+    assert data['pages_read'] == 4 and data['stop_reason'] is None
+    assert processor.extract_medical_data_streaming(iter([])) is None
+
+    print("✅ Streaming extraction stops early")
+
+def test_pdf_reports_are_read_page_by_page():
+    """PDF reports honour the processor's page budget"""
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = str(Path(tmp) / 'discharge_summary.pdf')
+        write_pdf(pdf_path, [['Age: 52 years', 'Gender: Female']] + [['Heart Rate: 80 bpm']] * 20)
+
+        processor = HospitalReportProcessor(page_budget=5)
+        assert processor.extract_text_from_pdf(pdf_path).count('Heart Rate') == 20
+
+        data = processor.extract_report_data(pdf_path)
+        assert data['pages_read'] == 5 and data['stop_reason'] == 'page_budget'
+        assert data['age'] == 52 and data['gender'] == 'female'
+
+        processed = HospitalReportProcessor(required_fields=['age', 'heart_rate']).process_multiple_reports([pdf_path])
+        assert processed['individual_reports'][0]['pages_read'] == 2
+
+class SlowReportProcessor(HospitalReportProcessor):
+    """Hangs on files named slow_*, to exercise the per-file timeout; stuck_*
+    files also block SIGALRM, like a reader stuck where it cannot be interrupted"""
+    def extract_text_from_file(self, file_path, content=None):
+        if Path(file_path).name.startswith('stuck_'):
+            signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGALRM})
+            time.sleep(60)
+        if Path(file_path).name.startswith('slow_'):
+            time.sleep(30)
+        return super().extract_text_from_file(file_path, content)
+
+def test_parallel_ingestion_keeps_file_order():
+    """A process pool gives the serial results in the original order, with timings"""
+    with tempfile.TemporaryDirectory() as tmp:
+        files = []
+        for i in range(6):
+            path = Path(tmp) / f'report_{i}.txt'
+            path.write_text(f'Age: {40 + i} years\nHeart Rate: {70 + i} bpm\nBlood Pressure: {120 + i}/80 mmHg\n')
+            files.append(str(path))
+        empty = Path(tmp) / 'empty.txt'
+        empty.write_text('')
+        files.insert(3, str(empty))
+
+        processor = HospitalReportProcessor()
+        serial = processor.process_multiple_reports(files)
+        parallel = processor.process_multiple_reports(files, workers=3)
+
+        assert [r['source_file'] for r in parallel['individual_reports']] == [Path(f).name for f in files if f != str(empty)]
+        assert parallel['aggregated_data'] == serial['aggregated_data']
+        assert [t['file'] for t in parallel['file_timings']] == [Path(f).name for f in files]
+        assert [t['status'] for t in parallel['file_timings']].count('no_text') == 1
+        assert all(t['seconds'] is not None for t in parallel['file_timings'])
+
+    print("✅ Parallel ingestion matches serial ingestion")
+
+def test_parallel_ingestion_times_out_slow_files():
+    """A report that exceeds the per-file timeout is reported and skipped"""
+    with tempfile.TemporaryDirectory() as tmp:
+        files = []
+        for name in ('report_a.txt', 'slow_scan.txt', 'report_b.txt'):
+            path = Path(tmp) / name
+            path.write_text('Age: 50 years\nHeart Rate: 72 bpm\n')
+            files.append(str(path))
+
+        start = time.time()
+        processed = SlowReportProcessor(workers=2, file_timeout=1).process_multiple_reports(files)
+
+        assert time.time() - start < 20
+        assert [t['status'] for t in processed['file_timings']] == ['ok', 'timeout', 'ok']
+        assert processed['report_count'] == 2
+
+def test_serial_ingestion_times_out_slow_files():
+    """The per-file timeout also holds with one worker, in the main thread and in others"""
+    with tempfile.TemporaryDirectory() as tmp:
+        files = []
+        for name in ('report_a.txt', 'slow_scan.txt'):
+            path = Path(tmp) / name
+            path.write_text('Age: 50 years\nHeart Rate: 72 bpm\n')
+            files.append(str(path))
+        processor = SlowReportProcessor(file_timeout=1)
+
+        # The host application's own SIGALRM handler is left alone
+        app_handler = lambda signum, frame: None
+        previous = signal.signal(signal.SIGALRM, app_handler)
+        try:
+            start = time.time()
+            timings = [t['status'] for t in processor.extract_reports(files)]
+            assert time.time() - start < 10
+            assert timings == ['ok', 'timeout']
+            assert [t['status'] for t in processor.extract_reports(files[1:])] == ['timeout']
+            assert signal.getsignal(signal.SIGALRM) is app_handler
+        finally:
+            signal.signal(signal.SIGALRM, previous)
+
+        # Request threads use the same worker processes
+        results = []
+        thread = threading.Thread(target=lambda: results.extend(processor.extract_reports(files)))
+        start = time.time()
+        thread.start()
+        thread.join()
+        assert time.time() - start < 20
+        assert [t['status'] for t in results] == ['ok', 'timeout']
+        processor.close()
+
+    print("✅ Serial ingestion times out slow files")
+
+def test_stuck_workers_are_terminated():
+    """A worker that ignores its alarm is killed once the batch's time is up, and the pool is replaced"""
+    with tempfile.TemporaryDirectory() as tmp:
+        files = []
+        for name in ('report_a.txt', 'stuck_scan.txt'):
+            path = Path(tmp) / name
+            path.write_text('Age: 50 years\nHeart Rate: 72 bpm\n')
+            files.append(str(path))
+        processor = SlowReportProcessor(workers=2, file_timeout=1)
+
+        assert [t['status'] for t in processor.extract_reports(files[:1] * 2)] == ['ok', 'ok']
+        first_pool = processor._pool
+        worker_processes = list(first_pool._processes.values())
+        assert worker_processes
+        start = time.time()
+        assert [t['status'] for t in processor.extract_reports(files)] == ['ok', 'timeout']
+        assert time.time() - start < 30
+        assert all(not process.is_alive() for process in worker_processes)
+
+        assert [t['status'] for t in processor.extract_reports(files[:1] * 2)] == ['ok', 'ok']
+        assert processor._pool is not first_pool
+        processor.close()
+
+    print("✅ Stuck report workers are terminated")
+
+def test_reports_parse_from_memory():
+    """Bytes and file objects give the same data as the file on disk, for every format"""
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = Path(tmp) / 'labs.pdf'
+        write_pdf(str(pdf_path), [['Age: 61 years', 'Fasting Glucose: 140 mg/dl'], ['Blood Pressure: 150/95 mmHg']])
+        docx_path = Path(tmp) / 'discharge.docx'
+        document = docx.Document()
+        for line in ('Age: 50 years', 'Gender: Female', 'Heart Rate: 77 bpm'):
+            document.add_paragraph(line)
+        document.save(str(docx_path))
+        txt_path = Path(tmp) / 'notes.txt'
+        txt_path.write_bytes(b'Age: 45 years\r\nHbA1c: 6.2%\r\nHeart Rate: 85 bpm\r\n')
+
+        processor = HospitalReportProcessor()
+        for path in (pdf_path, docx_path, txt_path):
+            on_disk = processor.extract_report_data(str(path))
+            content = path.read_bytes()
+            assert processor.extract_report_data(path.name, content) == on_disk
+            assert processor.extract_report_data(path.name, BytesIO(content)) == on_disk
+            assert on_disk['age'] is not None
+
+        uploads = [(path.name, BytesIO(path.read_bytes())) for path in (pdf_path, docx_path, txt_path)]
+        serial = processor.process_multiple_reports(uploads)
+        parallel = processor.process_multiple_reports(uploads, workers=2)
+        assert [r['source_file'] for r in parallel['individual_reports']] == ['labs.pdf', 'discharge.docx', 'notes.txt']
+        assert parallel['aggregated_data'] == serial['aggregated_data']
+
+    print("✅ Reports parse from memory")
+
+def test_api_uploads_stay_in_memory():
+    """Multipart uploads larger than Werkzeug's spooling threshold are not written to temp files"""
+    import api_server
+    report = b'Glucose: 126 mg/dl\n' * 50000
+    with api_server.app.test_request_context('/api/upload-report', method='POST', content_type='multipart/form-data',
+                                             data={'files': (BytesIO(report), 'labs.txt')}):
+        assert isinstance(api_server.request.files['files'].stream, BytesIO)
+        files, error = api_server._read_uploaded_files()
+        assert error is None and files == [('labs.txt', report)]
+
+def test_docx_tables_are_read_in_document_order():
+    """Paragraphs match python-docx and table rows come through as tab-separated cells"""
+    document = docx.Document()
+    document.add_paragraph('Age: 58 years')
+    document.add_paragraph('LABORATORY RESULTS:')
+    table = document.add_table(rows=3, cols=4)
+    rows = [('Test', 'Result', 'Units', 'Reference Range'),
+            ('Fasting Glucose', '7.2', 'mmol/L', '3.9 - 5.5'),
+            ('HbA1c', '7.9', '%', '< 5.7')]
+    for row, values in zip(table.rows, rows):
+        for cell, value in zip(row.cells, values):
+            cell.text = value
+    table.cell(2, 1).add_paragraph('H')
+    paragraph = document.add_paragraph('Heart Rate: 88 bpm')
+    paragraph.add_run().add_break()
+    paragraph.add_run('rechecked')
+    document.add_page_break()
+    document.add_paragraph('Gender: Male')
+    content = BytesIO()
+    document.save(content)
+
+    lines = list(iter_docx_lines(content.getvalue()))
+    assert lines == ['Age: 58 years', 'LABORATORY RESULTS:', 'Test\tResult\tUnits\tReference Range',
+                     'Fasting Glucose\t7.2\tmmol/L\t3.9 - 5.5', 'HbA1c\t7.9 H\t%\t< 5.7',
+                     'Heart Rate: 88 bpm\nrechecked', '', 'Gender: Male']
+    body_paragraphs = [p.text for p in docx.Document(BytesIO(content.getvalue())).paragraphs]
+    assert [line for line in lines if '\t' not in line] == body_paragraphs
+
+    data = HospitalReportProcessor().extract_report_data('labs.docx', content.getvalue())
+    assert abs(data['glucose'] - 7.2 * 18.016) < 1e-9
+    assert data['hba1c'] == 7.9 and data['heart_rate'] == 88.0
+    assert data['age'] == 58 and data['gender'] == 'male'
+
+    print("✅ DOCX tables are read in document order")
+
+if __name__ == "__main__":
+    test_engine_matches_per_keyword_scan()
+    test_extract_medical_data_on_sample_report()
+    test_streaming_stops_when_fields_are_found()
+    test_pdf_reports_are_read_page_by_page()
+    test_parallel_ingestion_keeps_file_order()
+    test_parallel_ingestion_times_out_slow_files()
+    test_serial_ingestion_times_out_slow_files()
+    test_stuck_workers_are_terminated()
+    test_reports_parse_from_memory()
+    test_api_uploads_stay_in_memory()
+    test_docx_tables_are_read_in_document_order()
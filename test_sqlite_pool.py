@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+SQLite pool test script - checks that connections are set up once in WAL
+mode and reused across threads, that batched writes from many threads all
+commit without lock errors, that a write failing with any exception fails
+alone, and that the dashboard routes run on the pool
+"""
+from sqlite_pool import BatchWriter, ConnectionPool
+from pathlib import Path
+import importlib
+import tempfile
+import threading
+import sqlite3
+import sys
+import os
+
+INSERT_LOG = "INSERT INTO logs (user_id, value) VALUES (?, ?)"
+
+def _pool(tmp):
+    pool = ConnectionPool(Path(tmp) / 'pool.db', max_idle=2)
+    pool.execute("CREATE TABLE logs (log_id INTEGER PRIMARY KEY, user_id TEXT NOT NULL, value REAL)")
+    return pool
+
+def test_connections_are_reused_in_wal_mode():
+    """One connection per thread, handed back on release and picked up again"""
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = _pool(tmp)
+        conn = pool.connection()
+        assert pool.connection() is conn
+        assert pool.query_one('PRAGMA journal_mode')[0] == 'wal'
+        assert pool.query_one('PRAGMA synchronous')[0] == 1  # NORMAL
+
+        pool.release()
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(pool.connection()))
+        thread.start()
+        thread.join()
+        assert seen == [conn]
+
+        # A failed transaction leaves nothing behind
+        try:
+            with pool.transaction() as conn:
+                conn.execute(INSERT_LOG, ('user_001', 1.0))
+                conn.execute(INSERT_LOG, (None, 2.0))
+        except sqlite3.IntegrityError:
+            pass
+        assert pool.query_one('SELECT COUNT(*) FROM logs')[0] == 0
+        assert pool.executemany(INSERT_LOG, [('user_001', float(i)) for i in range(5)]) == 5
+
+        pool.close_all()
+        assert pool.stats() == {'connections': 0, 'idle': 0}
+
+    print("✅ Pooled connections are reused in WAL mode")
+
+def test_batched_writes_from_many_threads():
+    """Every write commits, in fewer transactions than writes; a bad row fails alone"""
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = _pool(tmp)
+        writer = BatchWriter(pool)
+        errors = []
+
+        def log_readings(user_id):
+            for i in range(100):
+                try:
+                    writer.execute(INSERT_LOG, (user_id, float(i)))
+                except sqlite3.Error as e:
+                    errors.append(e)
+
+        threads = [threading.Thread(target=log_readings, args=(f'user_{n}',)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        bad = writer.submit(INSERT_LOG, (None, 0.0))
+        for thread in threads:
+            thread.join()
+
+        assert not errors
+        assert isinstance(bad.exception(timeout=10), sqlite3.IntegrityError)
+        assert pool.query_one('SELECT COUNT(*) FROM logs')[0] == 800
+        assert writer.stats()['writes'] == 800
+        assert writer.stats()['batches'] <= 800
+
+        writer.close()
+        pool.close_all()
+
+    print("✅ Batched writes commit from many threads")
+
+def test_non_sqlite_errors_fail_alone():
+    """A value sqlite3 cannot bind fails its own write; the rest of the batch and the writer carry on"""
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = _pool(tmp)
+        writer = BatchWriter(pool, max_delay=0.05)
+
+        before = writer.submit(INSERT_LOG, ('user_001', 1.0))
+        too_big = writer.submit(INSERT_LOG, ('user_001', 2 ** 70))
+        after = writer.submit(INSERT_LOG, ('user_002', 2.0))
+
+        assert isinstance(too_big.exception(timeout=10), OverflowError)
+        assert before.result(timeout=10) and after.result(timeout=10)
+        assert writer.execute(INSERT_LOG, ('user_003', 3.0), timeout=10)
+        assert pool.query_one('SELECT COUNT(*) FROM logs')[0] == 3
+
+        writer.close()
+        pool.close_all()
+
+    print("✅ Non-SQLite errors fail only their own write")
+
+def test_dashboard_routes_use_the_pool():
+    """Health logs and nudge clicks go through the batch writer and are readable at once"""
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DASHBOARD_DB_PATH'] = str(Path(tmp) / 'dashboard.db')
+        try:
+            if 'dashboard_server' in sys.modules:
+                dashboard_server = importlib.reload(sys.modules['dashboard_server'])
+            else:
+                import dashboard_server
+        finally:
+            del os.environ['DASHBOARD_DB_PATH']
+        client = dashboard_server.app.test_client()
+
+        users = client.get('/api/users').get_json()
+        assert [user['user_id'] for user in users] == ['user_001', 'user_002', 'user_003']
+
+        reading = {'user_id': 'user_002', 'log_type': 'heart_rate', 'value': 64, 'unit': 'bpm'}
+        assert client.post('/api/log-health', json=reading).status_code == 200
+        assert client.post('/api/nudge-click', json={'user_id': 'user_002', 'nudge_type': 'high_bp',
+                                                     'message': 'Time to relax'}).status_code == 200
+        data = client.get('/api/dashboard/user_002').get_json()
+        assert any(entry['value'] == 64 for entry in data['recent_logs']['heart_rate'])
+
+        db = dashboard_server.dashboard.db
+        assert db.stats()['idle'] >= 1  # Request connections were handed back
+        assert db.query_one('SELECT COUNT(*) FROM nudge_history WHERE clicked')[0] == 1
+
+        dashboard_server.dashboard.writer.close()
+        db.close_all()
+
+if __name__ == "__main__":
+    test_connections_are_reused_in_wal_mode()
+    test_batched_writes_from_many_threads()
+    test_non_sqlite_errors_fail_alone()
+    test_dashboard_routes_use_the_pool()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Training scheduler test script - trains a reduced candidate set for one
+disease on the process pool and checks that a second run resumes from the
+checkpoints instead of refitting
+"""
+from enhanced_chronic_disease_predictor import EnhancedChronicDiseasePredictor
+from training_scheduler import TrainingScheduler
+from sklearn.model_selection import train_test_split
+from sklearn.ensemble import VotingClassifier
+import numpy as np
+import pandas as pd
+import tempfile
+from pathlib import Path
+
+HEART_CSV = 'dataset_cache/johnsmith88_heart-disease-dataset/heart.csv'
+
+def _cached_heart_dataset(disease, source_preference='kaggle'):
+    """Split the cached heart dataset the same way fetch_and_prepare_dataset does"""
+    if disease != 'heart_disease':
+        return None, None, None, None
+    df = pd.read_csv(HEART_CSV)
+    X, y = df.drop(columns='target'), df['target']
+    return train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+
+def _scheduler(predictor, workdir, candidates=('LogisticRegression', 'MLP')):
+    predictor.fetch_and_prepare_dataset = _cached_heart_dataset
+    return TrainingScheduler(
+        predictor, max_cores=2, checkpoint_dir=workdir / 'checkpoints', model_dir=workdir,
+        candidates=candidates
+    )
+
+def test_parallel_training_resumes_from_checkpoints():
+    """Finished jobs are checkpointed and a rerun loads them instead of training"""
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+
+        # Stroke has no data here, so the run stays unfinished and keeps its checkpoints
+        predictor = EnhancedChronicDiseasePredictor()
+        scheduler = _scheduler(predictor, workdir)
+        trained = scheduler.run(diseases=['heart_disease', 'stroke'])
+
+        assert list(trained) == ['heart_disease']
+        assert scheduler.stats['jobs_run'] == 2
+        assert (workdir / 'enhanced_chronic_disease_model_heart_disease.model' / 'manifest.json').exists()
+        for stage in ('prepared.pkl', 'candidate_LogisticRegression.pkl', 'candidate_MLP.pkl', 'complete.json'):
+            assert (workdir / 'checkpoints' / 'heart_disease' / stage).exists()
+
+        sample = pd.read_csv(HEART_CSV).drop(columns='target').iloc[0].to_dict()
+        expected = predictor.predict_risk_score(sample, 'heart_disease')
+
+        # A finished disease is loaded straight from its saved model
+        resumed = EnhancedChronicDiseasePredictor()
+        scheduler = _scheduler(resumed, workdir)
+        scheduler.run(diseases=['heart_disease', 'stroke'])
+        assert scheduler.stats == {'jobs_run': 0, 'jobs_resumed': 0, 'diseases_resumed': 1}
+        assert resumed.predict_risk_score(sample, 'heart_disease')['risk_score'] == expected['risk_score']
+
+        # Interrupted before finalizing: the candidate checkpoints are reused
+        (workdir / 'checkpoints' / 'heart_disease' / 'complete.json').unlink()
+        resumed = EnhancedChronicDiseasePredictor()
+        scheduler = _scheduler(resumed, workdir)
+        scheduler.run(diseases=['heart_disease'])
+        assert scheduler.stats == {'jobs_run': 0, 'jobs_resumed': 2, 'diseases_resumed': 0}
+        assert abs(resumed.predict_risk_score(sample, 'heart_disease')['risk_score'] - expected['risk_score']) < 1e-9
+
+        # That run finished every disease it was given, so the next retrain starts fresh
+        assert not (workdir / 'checkpoints' / 'heart_disease').exists()
+
+        print("✅ Parallel training checkpoints and resumes correctly")
+
+def test_failed_candidate_keeps_sibling_checkpoints():
+    """When one candidate fails, the others still finish and are checkpointed for the rerun"""
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+
+        scheduler = _scheduler(EnhancedChronicDiseasePredictor(), workdir,
+                               candidates=['NoSuchModel', 'LogisticRegression'])
+        assert scheduler.run(diseases=['heart_disease']) == {}
+        checkpoints = workdir / 'checkpoints' / 'heart_disease'
+        assert (checkpoints / 'candidate_LogisticRegression.pkl').exists()
+        assert not (checkpoints / 'candidate_NoSuchModel.pkl').exists()
+        assert not (checkpoints / 'complete.json').exists()
+
+        scheduler = _scheduler(EnhancedChronicDiseasePredictor(), workdir, candidates=['LogisticRegression'])
+        assert list(scheduler.run(diseases=['heart_disease'])) == ['heart_disease']
+        assert scheduler.stats['jobs_resumed'] == 1 and scheduler.stats['jobs_run'] == 0
+        print("✅ Sibling candidates of a failed job are checkpointed")
+
+def test_halving_search_reports_cost_next_to_auc():
+    """Both search strategies record fit time and fit count in the model metadata"""
+    X_train, X_test, y_train, y_test = _cached_heart_dataset('heart_disease')
+
+    for search in ('grid', 'halving'):
+        predictor = EnhancedChronicDiseasePredictor()
+        X_train_processed, X_test_processed = predictor.preprocess_features(X_train, X_test, y_train, 'heart_disease')
+        model_scores = {
+            name: predictor.fit_candidate_model(
+                name, X_train_processed, X_test_processed, y_train, y_test, n_jobs=1, search=search
+            )
+            for name in ('LogisticRegression', 'MLP')
+        }
+        predictor._finalize_trained_model(model_scores, X_train_processed, X_test_processed, y_train, y_test, 'heart_disease')
+
+        metadata = predictor.model_metadata['heart_disease']
+        assert metadata['search_strategy'] == search
+        assert metadata['search_time'] > 0
+        assert metadata['auc_score'] > 0.85
+        # 6 LogisticRegression configurations x 5 folds + refit, plus one MLP fit
+        if search == 'grid':
+            assert metadata['n_fits'] == 6 * 5 + 1 + 1
+        assert set(metadata['candidate_scores']) == {'LogisticRegression', 'MLP'}
+
+        print(f"✅ {search}: AUC {metadata['auc_score']:.4f}, {metadata['n_fits']} fits in {metadata['search_time']:.1f}s")
+
+def test_prefit_ensemble_matches_refit_voting_classifier():
+    """The ensemble built from fitted candidates predicts like a freshly fitted VotingClassifier"""
+    X_train, X_test, y_train, y_test = _cached_heart_dataset('heart_disease')
+    predictor = EnhancedChronicDiseasePredictor()
+    X_train_processed, X_test_processed = predictor.preprocess_features(X_train, X_test, y_train, 'heart_disease')
+
+    model_scores = {
+        name: predictor.fit_candidate_model(name, X_train_processed, X_test_processed, y_train, y_test, n_jobs=1)
+        for name in ('LogisticRegression', 'SVM', 'MLP')
+    }
+    estimators = [(name, scores['model']) for name, scores in model_scores.items()]
+
+    prefit = predictor._build_prefit_voting_classifier(estimators, y_train)
+    refit = VotingClassifier(estimators=estimators, voting='soft').fit(X_train_processed, y_train)
+
+    stored = np.mean([scores['test_proba'] for scores in model_scores.values()], axis=0)
+    assert np.allclose(prefit.predict_proba(X_test_processed), refit.predict_proba(X_test_processed))
+    assert np.allclose(prefit.predict_proba(X_test_processed), stored)
+    assert (prefit.predict(X_test_processed) == refit.predict(X_test_processed)).all()
+
+    print("✅ Prefit ensemble matches a refitted VotingClassifier")
+
+if __name__ == "__main__":
+    test_parallel_training_resumes_from_checkpoints()
+    test_failed_candidate_keeps_sibling_checkpoints()
+    test_halving_search_reports_cost_next_to_auc()
+    test_prefit_ensemble_matches_refit_voting_classifier()
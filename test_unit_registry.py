@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Unit registry test script - checks that lab values in mixed units are put on
+each field's canonical scale in one batch, that unknown units are not
+averaged in with converted values but do not lose a field's only result,
+and that reports mixing units extract correctly
+"""
+from unit_registry import UnitRegistry, normalize_unit
+from report_processor import HospitalReportProcessor
+import numpy as np
+
+def test_batch_conversion_to_canonical_units():
+    """Factors and offsets are applied per (field, unit); unknown units give NaN"""
+    registry = UnitRegistry()
+    converted = registry.normalize(
+        ['glucose', 'glucose', 'glucose', 'hba1c', 'creatinine', 'hemoglobin', 'glucose', 'bmi'],
+        [126.0, 7.0, 5.5, 53.0, 97.0, 135.0, 1.2, 28.4],
+        ['mg/dL', 'mmol/L', None, 'mmol/mol', 'µmol/L', 'g/L', 'mg/kg', None]
+    )
+
+    assert converted[0] == 126.0
+    assert abs(converted[1] - 126.112) < 1e-9
+    assert converted[2] == 5.5  # No unit: taken as canonical
+    assert abs(converted[3] - 7.00044) < 1e-9
+    assert abs(converted[4] - 1.097) < 0.001
+    assert abs(converted[5] - 13.5) < 1e-9
+    assert np.isnan(converted[6])
+    assert converted[7] == 28.4
+    assert registry.normalize([], [], []).size == 0
+
+    print("✅ Lab values convert to canonical units")
+
+def test_unit_spellings_and_registration():
+    """Unit spellings collapse to one form and new units can be registered"""
+    assert normalize_unit('mmol/L') == 'mmol/l'
+    assert normalize_unit('μmol / L') == 'umol/l'
+    assert normalize_unit('kg/m²') == 'kg/m2'
+    assert normalize_unit('percentage') == '%'
+    assert normalize_unit('g%') == normalize_unit('gm%') == normalize_unit('g/100 mL') == 'g/dl'
+    assert normalize_unit('mg%') == 'mg/dl'
+    assert normalize_unit('beats') == 'bpm'
+    assert normalize_unit(None) == ''
+
+    registry = UnitRegistry()
+    assert registry.canonical_unit('glucose') == 'mg/dl'
+    assert registry.conversion('glucose', 'mg/kg') is None
+    registry.register('glucose', 'mg/l', 0.1)
+    assert registry.conversion('glucose', 'mg/L') == (0.1, 0.0)
+    registry.register('potassium', 'meq/l', 1.0)
+    assert registry.canonical_unit('potassium') == 'meq/l'
+
+def test_reports_mixing_units_average_on_one_scale():
+    """A report giving glucose in mmol/L and mg/dL averages the converted values"""
+    processor = HospitalReportProcessor()
+    data = processor.extract_medical_data(
+        'Glucose: 7.0 mmol/L\nFasting Glucose: 126 mg/dl\nHbA1c: 53 mmol/mol\nTotal Cholesterol: 5.2 mmol/L\n'
+    )
+
+    assert abs(data['glucose'] - (126.112 + 126.0) / 2) < 1e-9
+    assert abs(data['hba1c'] - 7.00044) < 1e-9
+    assert abs(data['cholesterol'] - 201.084) < 1e-9
+
+    # The keyword scan keeps the values it found with a unit
+    data = processor.extract_medical_data('Glucose 5.4 mmol/L on admission, pulse 72 bpm')
+    assert abs(data['glucose'] - 97.2864) < 1e-9
+    assert data['heart_rate'] == 72.0
+
+def test_older_unit_spellings_still_extract():
+    """Per-100 mL, bare-gram and beats spellings extract as they did before unit conversion"""
+    processor = HospitalReportProcessor()
+    reports = {
+        'Hemoglobin: 13.5 g%': ('hemoglobin', 13.5),
+        'Hemoglobin: 13.5 gm%': ('hemoglobin', 13.5),
+        'Hemoglobin: 13.5 g': ('hemoglobin', 13.5),
+        'Hb 13.5 gm%': ('hemoglobin', 13.5),
+        'Creatinine: 1.1 mg%': ('creatinine', 1.1),
+        'Heart Rate: 72 beats per minute': ('heart_rate', 72.0),
+    }
+    for text, (field, value) in reports.items():
+        assert processor.extract_medical_data(text)[field] == value, text
+
+    # A unit with no conversion is kept when it is all there is, left out otherwise
+    assert processor.extract_medical_data('Glucose: 126 mg/kg')['glucose'] == 126.0
+    data = processor.extract_medical_data('Glucose: 126 mg/kg\nGlucose: 7.0 mmol/L')
+    assert abs(data['glucose'] - 126.112) < 1e-9
+
+    print("✅ Older unit spellings still extract")
+
+if __name__ == "__main__":
+    test_batch_conversion_to_canonical_units()
+    test_unit_spellings_and_registration()
+    test_reports_mixing_units_average_on_one_scale()
+    test_older_unit_spellings_still_extract()
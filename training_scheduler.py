@@ -0,0 +1,271 @@
+"""
+Parallel, Resumable Training Scheduler
+======================================
+
+Runs the per-disease training of EnhancedChronicDiseasePredictor as a set of
+independent (disease, candidate model) jobs on a process pool.
+
+- A single global core budget is shared by every job: the pool gets
+  ``max_cores // cores_per_job`` workers and each worker caps its grid search
+  and BLAS/OpenMP threads at ``cores_per_job``, so nothing oversubscribes the
+  machine with nested ``n_jobs=-1`` searches.
+- Every finished step is checkpointed to disk (prepared features per disease,
+  each fitted candidate, and a completion marker once the final model is
+  saved). Re-running after an interruption skips everything already done.
+  Once every requested disease has trained, its checkpoints are removed, so
+  the next full retrain starts from fresh data instead of the old models.
+"""
+
+import os
+import json
+import pickle
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+from threadpoolctl import threadpool_limits
+
+from enhanced_chronic_disease_predictor import EnhancedChronicDiseasePredictor
+from model_artifact import ARTIFACT_SUFFIX
+
+
+def _run_candidate_job(name, X_train_processed, X_test_processed, y_train, y_test, cores, search):
+    """Worker entry point: fit one candidate model within its share of the core budget"""
+    with threadpool_limits(limits=cores):
+        return EnhancedChronicDiseasePredictor.fit_candidate_model(
+            name, X_train_processed, X_test_processed, y_train, y_test, n_jobs=cores, search=search
+        )
+
+
+class TrainingScheduler:
+    """Train all disease models on a bounded process pool with checkpoint/resume"""
+
+    PREPROCESSING_ATTRIBUTES = ('imputers', 'label_encoders', 'scalers', 'feature_selectors', 'feature_names')
+
+    def __init__(self, predictor, max_cores=None, cores_per_job=1,
+                 checkpoint_dir='training_checkpoints', model_dir='.', resume=True, candidates=None,
+                 search='grid'):
+        """
+        Args:
+            predictor: EnhancedChronicDiseasePredictor that receives the trained models
+            max_cores: Total cores all jobs may use together (default: all CPUs)
+            cores_per_job: Cores given to each candidate job's grid search
+            checkpoint_dir: Directory for per-disease checkpoints
+            model_dir: Directory the final model files are saved to
+            resume: Reuse existing checkpoints instead of starting over
+            candidates: Subset of candidate model names to train (default: all)
+            search: Hyperparameter search strategy, 'grid' or 'halving'
+        """
+        self.predictor = predictor
+        self.max_cores = max(1, max_cores or os.cpu_count() or 1)
+        self.cores_per_job = max(1, min(cores_per_job, self.max_cores))
+        self.max_workers = max(1, self.max_cores // self.cores_per_job)
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.model_dir = Path(model_dir)
+        self.resume = resume
+        self.candidates = list(candidates) if candidates else EnhancedChronicDiseasePredictor.candidate_model_names()
+        self.search = search
+
+        # Counters for the last run, useful to see how much a resume saved
+        self.stats = {'jobs_run': 0, 'jobs_resumed': 0, 'diseases_resumed': 0}
+
+    def run(self, diseases=None, source_preference='kaggle'):
+        """Train every disease and return ``{disease: final_model}``"""
+        diseases = diseases or self.predictor.fetcher.list_available_diseases()
+        self.stats = {'jobs_run': 0, 'jobs_resumed': 0, 'diseases_resumed': 0}
+        trained_models = {}
+        pending = {}
+
+        print(f"🚀 Parallel training: {len(diseases)} diseases, {self.max_workers} workers "
+              f"x {self.cores_per_job} core(s) (budget: {self.max_cores})")
+        if self.resume:
+            unfinished = [d for d in diseases if (self.checkpoint_dir / d).is_dir()]
+            if unfinished:
+                print(f"♻️ Resuming an unfinished run from {self.checkpoint_dir} for: {', '.join(unfinished)}")
+
+        # Stage 1: restore finished diseases, prepare features for the rest
+        for disease in diseases:
+            print(f"\n{'='*80}")
+            print(f"🏥 PREPARING: {disease.upper()}")
+            print('='*80)
+
+            try:
+                if self.resume and self._restore_completed(disease):
+                    trained_models[disease] = self.predictor.models[disease]
+                    self.stats['diseases_resumed'] += 1
+                    continue
+
+                prepared = self._prepare(disease, source_preference)
+                if prepared is None:
+                    print(f"❌ Failed to prepare data for {disease}")
+                    continue
+
+                model_scores = {}
+                for name in self.candidates:
+                    checkpoint = self._read_checkpoint(disease, f'candidate_{name}') if self.resume else None
+                    # Results from a different search strategy are retrained
+                    if checkpoint is not None and checkpoint.get('search', 'grid') == self.search:
+                        model_scores[name] = checkpoint
+                        self.stats['jobs_resumed'] += 1
+                        print(f"  ♻️ Resumed {name} (AUC: {checkpoint['auc_score']:.4f})")
+
+                pending[disease] = {'data': prepared, 'model_scores': model_scores}
+
+            except Exception as e:
+                print(f"❌ Error preparing {disease}: {e}")
+
+        # Diseases whose candidates were all checkpointed need no pool time
+        for disease in [d for d, state in pending.items() if len(state['model_scores']) == len(self.candidates)]:
+            self._finalize(disease, pending.pop(disease), trained_models)
+
+        # Stage 2: fan the remaining candidate jobs out over the pool
+        jobs = [
+            (disease, name) for disease, state in pending.items()
+            for name in self.candidates if name not in state['model_scores']
+        ]
+        if jobs:
+            print(f"\n⚙️ Running {len(jobs)} candidate jobs...")
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as pool:
+                futures = {}
+                failed = set()
+                for disease, name in jobs:
+                    data = pending[disease]['data']
+                    future = pool.submit(
+                        _run_candidate_job, name, data['X_train'], data['X_test'],
+                        data['y_train'], data['y_test'], self.cores_per_job, self.search
+                    )
+                    futures[future] = (disease, name)
+
+                for future in as_completed(futures):
+                    disease, name = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"❌ {disease}/{name} failed: {e}")
+                        failed.add(disease)
+                        continue
+
+                    # Siblings of a failed candidate are still checkpointed so
+                    # the next run only refits what failed
+                    self.stats['jobs_run'] += 1
+                    self._write_checkpoint(disease, f'candidate_{name}', result)
+                    print(f"  ✓ {disease}/{name} - AUC: {result['auc_score']:.4f}")
+                    if disease in failed:
+                        continue
+
+                    state = pending[disease]
+                    state['model_scores'][name] = result
+                    if len(state['model_scores']) == len(self.candidates):
+                        self._finalize(disease, pending.pop(disease), trained_models)
+
+        print(f"\n🎉 Training completed! Successfully trained {len(trained_models)} models "
+              f"({self.stats['jobs_run']} jobs run, {self.stats['jobs_resumed']} resumed)")
+
+        # Checkpoints only serve to resume an unfinished run; a finished one
+        # must not make the next retrain reuse stale data and models
+        if all(disease in trained_models for disease in diseases):
+            self.clear_checkpoints(diseases)
+        else:
+            print(f"💾 Keeping checkpoints in {self.checkpoint_dir} to resume the unfinished diseases")
+        return trained_models
+
+    def clear_checkpoints(self, diseases):
+        """Delete the checkpoints of the given diseases"""
+        for disease in diseases:
+            shutil.rmtree(self.checkpoint_dir / disease, ignore_errors=True)
+
+    def _prepare(self, disease, source_preference):
+        """Fetch, split and preprocess a disease dataset, or restore it from its checkpoint"""
+        checkpoint = self._read_checkpoint(disease, 'prepared') if self.resume else None
+        if checkpoint is not None:
+            for attribute, value in checkpoint['preprocessing'].items():
+                getattr(self.predictor, attribute)[disease] = value
+            print(f"♻️ Restored preprocessed features for {disease}")
+            return checkpoint['data']
+
+        X_train, X_test, y_train, y_test = self.predictor.fetch_and_prepare_dataset(disease, source_preference)
+        if X_train is None:
+            return None
+
+        X_train_processed, X_test_processed = self.predictor.preprocess_features(X_train, X_test, y_train, disease)
+        data = {
+            'X_train': X_train_processed,
+            'X_test': X_test_processed,
+            'y_train': y_train.to_numpy() if hasattr(y_train, 'to_numpy') else y_train,
+            'y_test': y_test.to_numpy() if hasattr(y_test, 'to_numpy') else y_test
+        }
+        preprocessing = {
+            attribute: getattr(self.predictor, attribute)[disease]
+            for attribute in self.PREPROCESSING_ATTRIBUTES
+        }
+        self._write_checkpoint(disease, 'prepared', {'data': data, 'preprocessing': preprocessing})
+        return data
+
+    def _finalize(self, disease, state, trained_models):
+        """Build the final model from the candidate results, save it and mark the disease done"""
+        print(f"\n🏁 Finalizing {disease} model...")
+        data = state['data']
+
+        try:
+            model = self.predictor._finalize_trained_model(
+                state['model_scores'], data['X_train'], data['X_test'],
+                data['y_train'], data['y_test'], disease
+            )
+            filename = self._model_filename(disease)
+            if not self.predictor.save_model(disease, str(filename)):
+                return
+
+            marker = {'model_file': str(filename), 'completed_at': datetime.now().isoformat()}
+            self._write_checkpoint(disease, 'complete', marker)
+            trained_models[disease] = model
+            print(f"✅ {disease} model training completed successfully")
+
+        except Exception as e:
+            print(f"❌ Error training {disease} model: {e}")
+
+    def _restore_completed(self, disease):
+        """Load the saved model of a disease that finished in an earlier run"""
+        marker = self._read_checkpoint(disease, 'complete')
+        if marker is None or not Path(marker['model_file']).exists():
+            return False
+
+        print(f"♻️ {disease} already trained, loading {marker['model_file']}")
+        return self.predictor.load_model(marker['model_file'], disease)
+
+    def _model_filename(self, disease):
+        return self.model_dir / f'enhanced_chronic_disease_model_{disease}{ARTIFACT_SUFFIX}'
+
+    def _checkpoint_path(self, disease, stage):
+        suffix = '.json' if stage == 'complete' else '.pkl'
+        return self.checkpoint_dir / disease / f'{stage}{suffix}'
+
+    def _write_checkpoint(self, disease, stage, payload):
+        """Write a checkpoint atomically so a crash never leaves a half-written file"""
+        path = self._checkpoint_path(disease, stage)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + '.tmp')
+
+        if path.suffix == '.json':
+            with open(tmp_path, 'w') as f:
+                json.dump(payload, f, indent=2)
+        else:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(payload, f)
+        os.replace(tmp_path, path)
+
+    def _read_checkpoint(self, disease, stage):
+        """Return a checkpoint's payload, or None if it is missing or unreadable"""
+        path = self._checkpoint_path(disease, stage)
+        if not path.exists():
+            return None
+
+        try:
+            if path.suffix == '.json':
+                with open(path, 'r') as f:
+                    return json.load(f)
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable checkpoint {path}: {e}")
+            return None
@@ -7,9 +7,11 @@ from datetime import datetime
 from typing import Dict, List, Optional, Any
 
 # Import our enhanced components
-from multi_api_dataset_fetcher import MultiAPIDatasetFetcher
 from enhanced_chronic_disease_predictor import EnhancedChronicDiseasePredictor
 from report_processor import HospitalReportProcessor
+from extraction_cache import ExtractionCache
+from patient_aggregates import PatientAggregateStore
+from multi_disease_scorer import MultiDiseaseScorer
 
 class UltimateChronicDiseaseSystem:
     """
@@ -23,13 +25,17 @@ class UltimateChronicDiseaseSystem:
     - Professional reporting
     """
     
-    def __init__(self):
+    def __init__(self, predictor: Optional[EnhancedChronicDiseasePredictor] = None, scorer_workers: int = 4):
         print("🚀 Initializing Ultimate Chronic Disease Risk Assessment System...")
         
-        # Initialize components
-        self.fetcher = MultiAPIDatasetFetcher()
-        self.predictor = EnhancedChronicDiseasePredictor()
+        # Initialize components; a shared predictor (e.g. from the model
+        # registry) can be passed in so its models are not loaded twice.
+        # scorer_workers threads score a patient's diseases in parallel.
+        self.predictor = predictor or EnhancedChronicDiseasePredictor()
         self.report_processor = HospitalReportProcessor()
+        self.scorer_workers = scorer_workers
+        self.scorer = MultiDiseaseScorer(self.predictor, self._map_patient_to_all_disease_features,
+                                         max_workers=scorer_workers)
         
         # System configuration
         self.config = {
@@ -48,9 +54,28 @@ class UltimateChronicDiseaseSystem:
         for dir_path in [self.config['output_dir'], self.config['models_dir'], self.config['cache_dir']]:
             dir_path.mkdir(exist_ok=True)
         
+        # Reports already extracted (same content and extractor) are not parsed again
+        self.report_processor.cache = ExtractionCache(self.config['cache_dir'] / 'report_cache.db')
+        
+        # Running per-patient aggregates, so identified patients accumulate history
+        self.patient_aggregates = PatientAggregateStore(self.config['cache_dir'] / 'patient_aggregates.db')
+        
         print("✅ System initialized successfully!")
     
-    def setup_system(self, source_preference='direct_url', train_all=True):
+    def use_predictor(self, predictor: EnhancedChronicDiseasePredictor):
+        """Serve from another predictor, e.g. after a hot model reload"""
+        scorer = MultiDiseaseScorer(predictor, self._map_patient_to_all_disease_features,
+                                    max_workers=self.scorer_workers)
+        self.predictor = predictor
+        self.scorer = scorer
+    
+    @property
+    def fetcher(self):
+        """Multi-API dataset fetcher, shared with the predictor and created on first use"""
+        return self.predictor.fetcher
+    
+    def setup_system(self, source_preference='direct_url', train_all=True, parallel=False, max_cores=None,
+                     search='grid'):
         """Complete system setup including dataset fetching and model training"""
         print("\n🔧 SYSTEM SETUP PHASE")
         print("=" * 60)
@@ -70,7 +95,10 @@ class UltimateChronicDiseaseSystem:
         # Train models
         if train_all:
             print("\n2️⃣ Training All Disease Models...")
-            trained_models = self.predictor.train_all_diseases(source_preference=source_preference)
+            trained_models = self.predictor.train_all_diseases(
+                source_preference=source_preference, parallel=parallel, max_cores=max_cores, search=search,
+                checkpoint_dir=self.config['cache_dir'] / 'training_checkpoints'
+            )
             print(f"Successfully trained {len(trained_models)} models")
         else:
             print("\n2️⃣ Skipping model training (use train_all=True to enable)")
@@ -93,17 +121,14 @@ class UltimateChronicDiseaseSystem:
         print("\n📥 Loading existing models...")
         
         models_dir = self.config['models_dir']
-        model_files = list(models_dir.glob('enhanced_chronic_disease_model_*.pkl'))
+        model_files = EnhancedChronicDiseasePredictor.discover_model_files(models_dir)
         
         if not model_files:
             # Check current directory
-            model_files = list(Path('.').glob('enhanced_chronic_disease_model_*.pkl'))
+            model_files = EnhancedChronicDiseasePredictor.discover_model_files('.')
         
         loaded_count = 0
-        for model_file in model_files:
-            # Extract disease name from filename
-            disease = model_file.stem.replace('enhanced_chronic_disease_model_', '')
-            
+        for disease, model_file in model_files.items():
             if self.predictor.load_model(str(model_file), disease):
                 loaded_count += 1
         
@@ -127,47 +152,103 @@ class UltimateChronicDiseaseSystem:
         if patient_id:
             print(f"Patient ID: {patient_id}")
         
-        # Step 1: Process hospital reports
+        # Steps 1-2: Process hospital reports and extract the patient profile
+        processed_data, patient_profile = self._extract_patient_profile(patient_files, patient_id)
+        if processed_data is None:
+            return None
+        
+        # Step 3: Perform risk assessments
+        print("\n🎯 Step 3: Performing Risk Assessments...")
+        available_diseases = self.predictor.available_diseases()
+        if not available_diseases:
+            print("❌ No trained models available")
+            return None
+        
+        print(f"Available models: {available_diseases}")
+        
+        # Map and score every disease in one fused call
+        disease_profiles = self._map_patient_to_all_disease_features(patient_profile, available_diseases)
+        risk_assessments = self.scorer.score(patient_profile, available_diseases, disease_profiles)
+        
+        for disease in available_diseases:
+            if disease in risk_assessments:
+                risk_result = risk_assessments[disease]
+                print(f"  ✅ {disease}: {risk_result['risk_category']} ({risk_result['risk_percentage']:.1f}%)")
+            elif disease_profiles.get(disease):
+                print(f"  ❌ Failed to assess {disease}")
+            else:
+                print(f"  ⚠️ Insufficient data for {disease}")
+        
+        return self._finalize_assessment(patient_profile, risk_assessments, processed_data, patient_id)
+    
+    def _extract_patient_profile(self, patient_files: List[str], patient_id: Optional[str] = None):
+        """Process hospital reports and build the patient profile used for prediction"""
         print("\n📄 Step 1: Processing Hospital Reports...")
         processed_data = self.report_processor.process_multiple_reports(patient_files)
+        return self._build_patient_profile(processed_data, patient_id)
+    
+    def _build_patient_profile(self, processed_data: Optional[Dict], patient_id: Optional[str] = None):
+        """
+        Build the patient profile from processed report data
         
+        With a patient id the new reports are folded into the patient's stored
+        aggregate, and the profile reflects their whole report history.
+        """
         if not processed_data or 'aggregated_data' not in processed_data:
             print("❌ Failed to process hospital reports")
-            return None
+            return None, None
+        
+        if patient_id and processed_data['individual_reports']:
+            processed_data['aggregated_data'] = self.patient_aggregates.add_reports(
+                patient_id, processed_data['individual_reports']
+            )
+            print(f"📈 Patient history: {self.patient_aggregates.report_count(patient_id)} reports")
         
-        # Step 2: Extract patient profile
         print("\n👤 Step 2: Extracting Patient Profile...")
         patient_profile = self.report_processor.generate_patient_profile(processed_data['aggregated_data'])
         
         print(f"Extracted features: {list(patient_profile.keys())}")
+        return processed_data, patient_profile
+    
+    def _assess_profiles_batch(self, patient_profiles: Dict[str, Dict]):
+        """
+        Assess many patient profiles with one vectorized predict per disease
         
-        # Step 3: Perform risk assessments
-        print("\n🎯 Step 3: Performing Risk Assessments...")
+        Returns ``{patient_id: risk_assessments}`` for the patients that could
+        be mapped to model features and ``{patient_id: error}`` for the rest.
+        """
         risk_assessments = {}
-        
-        available_diseases = list(self.predictor.models.keys())
-        if not available_diseases:
-            print("❌ No trained models available")
-            return None
-        
-        print(f"Available models: {available_diseases}")
-        
-        for disease in available_diseases:
-            print(f"  Assessing {disease} risk...")
+        errors = {}
+        
+        # Map each patient once for every disease; a malformed profile only fails that patient
+        diseases = self.predictor.available_diseases()
+        patient_ids = []
+        mapped_profiles = []
+        for patient_id, patient_profile in patient_profiles.items():
+            try:
+                mapped_profiles.append(self._map_patient_to_all_disease_features(patient_profile, diseases))
+            except Exception as e:
+                print(f"  ❌ Could not map {patient_id} to model features: {e}")
+                errors[patient_id] = str(e)
+                continue
+            patient_ids.append(patient_id)
+            risk_assessments[patient_id] = {}
+        
+        for disease in diseases:
+            disease_records = [mapped[disease] for mapped in mapped_profiles]
             
-            # Map patient profile to disease-specific features
-            disease_profile = self._map_patient_to_disease_features(patient_profile, disease)
-            
-            if disease_profile:
-                risk_result = self.predictor.predict_risk_score(disease_profile, disease)
+            risk_results = self.predictor.predict_risk_scores_records(disease_records, disease)
+            for patient_id, risk_result in zip(patient_ids, risk_results):
                 if risk_result:
-                    risk_assessments[disease] = risk_result
-                    print(f"    ✅ {disease}: {risk_result['risk_category']} ({risk_result['risk_percentage']:.1f}%)")
-                else:
-                    print(f"    ❌ Failed to assess {disease}")
-            else:
-                print(f"    ⚠️ Insufficient data for {disease}")
+                    risk_assessments[patient_id][disease] = risk_result
+            
+            print(f"  ✅ {disease}: scored {sum(disease in r for r in risk_assessments.values())}/{len(patient_profiles)} patients")
         
+        return risk_assessments, errors
+    
+    def _finalize_assessment(self, patient_profile: Dict, risk_assessments: Dict,
+                             processed_data: Dict, patient_id: Optional[str]) -> Dict[str, Any]:
+        """Generate, save and display the comprehensive report for one patient"""
         # Step 4: Generate comprehensive report
         print("\n📊 Step 4: Generating Comprehensive Report...")
         comprehensive_report = self._generate_comprehensive_report(
@@ -191,26 +272,31 @@ class UltimateChronicDiseaseSystem:
         
         return comprehensive_report
     
-    def _map_patient_to_disease_features(self, patient_profile: Dict, disease: str) -> Dict:
-        """Map patient profile to disease-specific features"""
+    def _map_patient_to_all_disease_features(self, patient_profile: Dict, diseases: List[str]) -> Dict[str, Dict]:
+        """Map patient profile to the features of several diseases in one pass"""
+        
+        # Lookups shared across disease feature sets
+        age = patient_profile.get('age')
+        systolic = patient_profile.get('blood_pressure_systolic', patient_profile.get('systolic'))
+        glucose = patient_profile.get('glucose')
         
         # Common feature mappings
         feature_maps = {
             'diabetes': {
                 'pregnancies': patient_profile.get('pregnancies', 0),  # Default for males
-                'glucose': patient_profile.get('glucose'),
-                'blood_pressure': patient_profile.get('blood_pressure_systolic', patient_profile.get('systolic')),
+                'glucose': glucose,
+                'blood_pressure': systolic,
                 'skin_thickness': 20,  # Default
                 'insulin': 100,  # Default
                 'bmi': patient_profile.get('bmi'),
                 'diabetes_pedigree': 0.5,  # Default
-                'age': patient_profile.get('age')
+                'age': age
             },
             'heart_disease': {
-                'age': patient_profile.get('age'),
+                'age': age,
                 'sex': 1 if patient_profile.get('gender') == 1 else 0,
                 'cp': 2,  # Default chest pain type
-                'trestbps': patient_profile.get('blood_pressure_systolic', patient_profile.get('systolic')),
+                'trestbps': systolic,
                 'chol': patient_profile.get('cholesterol'),
                 'fbs': 1 if patient_profile.get('glucose', 0) > 120 else 0,
                 'restecg': 0,  # Default
@@ -222,8 +308,8 @@ class UltimateChronicDiseaseSystem:
                 'thal': 2  # Default
             },
             'kidney_disease': {
-                'age': patient_profile.get('age'),
-                'bp': patient_profile.get('blood_pressure_systolic', patient_profile.get('systolic')),
+                'age': age,
+                'bp': systolic,
                 'sg': 1.020,  # Default specific gravity
                 'al': 0,  # Default albumin
                 'su': 0,  # Default sugar
@@ -249,12 +335,19 @@ class UltimateChronicDiseaseSystem:
             }
         }
         
-        if disease not in feature_maps:
+        return {
+            disease: self._filter_disease_features(feature_maps.get(disease), disease)
+            for disease in diseases
+        }
+    
+    def _filter_disease_features(self, features: Optional[Dict], disease: str) -> Dict:
+        """Drop missing values and reject feature sets lacking required fields"""
+        if features is None:
             return {}
         
         # Filter out None values and ensure we have required features
         disease_features = {}
-        for key, value in feature_maps[disease].items():
+        for key, value in features.items():
             if value is not None:
                 disease_features[key] = value
         
@@ -563,8 +656,13 @@ class UltimateChronicDiseaseSystem:
         
         print("\n" + "=" * 80)
     
-    def batch_assess_patients(self, patient_data_dir: str, output_dir: Optional[str] = None):
-        """Batch process multiple patients"""
+    def batch_assess_patients(self, patient_data_dir: str, output_dir: Optional[str] = None, workers: int = 0):
+        """
+        Batch process multiple patients
+        
+        Every patient's reports are extracted together on ``workers`` processes
+        (0: one per CPU core, 1: serial) before the cohort is scored.
+        """
         print(f"\n📁 BATCH PATIENT ASSESSMENT")
         print("=" * 60)
         
@@ -582,25 +680,58 @@ class UltimateChronicDiseaseSystem:
         
         print(f"Found {len(patient_folders)} patient folders")
         
-        results = {}
-        for i, patient_folder in enumerate(patient_folders, 1):
-            patient_id = patient_folder.name
-            print(f"\n[{i}/{len(patient_folders)}] Processing Patient: {patient_id}")
-            
-            # Find report files
+        # Find every patient's report files
+        patient_files = {}
+        for patient_folder in patient_folders:
             report_files = []
             for ext in ['*.pdf', '*.docx', '*.txt']:
                 report_files.extend(patient_folder.glob(ext))
             
             if report_files:
-                report_files = [str(f) for f in report_files]
-                result = self.assess_patient_risk(report_files, patient_id)
-                results[patient_id] = result
+                patient_files[patient_folder.name] = [str(f) for f in report_files]
             else:
-                print(f"  ⚠️ No report files found for {patient_id}")
+                print(f"  ⚠️ No report files found for {patient_folder.name}")
+        
+        # Extract all reports across the worker pool, keeping each patient's file order
+        print(f"\n📄 Processing {sum(len(files) for files in patient_files.values())} hospital reports...")
+        file_results = self.report_processor.extract_reports(
+            [f for files in patient_files.values() for f in files], workers=workers
+        )
+        
+        # Build every patient's profile first, then score the cohort together
+        extracted = {}
+        offset = 0
+        for i, (patient_id, files) in enumerate(patient_files.items(), 1):
+            print(f"\n[{i}/{len(patient_files)}] Processing Patient: {patient_id}")
+            processed_data = self.report_processor.combine_reports(file_results[offset:offset + len(files)])
+            offset += len(files)
+            extracted[patient_id] = self._build_patient_profile(processed_data, patient_id)
+        
+        results = {patient_id: None for patient_id, (processed_data, _) in extracted.items() if processed_data is None}
+        patient_profiles = {
+            patient_id: patient_profile
+            for patient_id, (processed_data, patient_profile) in extracted.items()
+            if processed_data is not None
+        }
+        
+        if patient_profiles and self.predictor.available_diseases():
+            print(f"\n🎯 Scoring {len(patient_profiles)} patients...")
+            batch_assessments, mapping_errors = self._assess_profiles_batch(patient_profiles)
+            results.update({patient_id: None for patient_id in mapping_errors})
+            
+            for patient_id, patient_profile in patient_profiles.items():
+                if patient_id in mapping_errors:
+                    continue
+                processed_data = extracted[patient_id][0]
+                results[patient_id] = self._finalize_assessment(
+                    patient_profile, batch_assessments[patient_id], processed_data, patient_id
+                )
+        elif patient_profiles:
+            print("❌ No trained models available")
+            results.update({patient_id: None for patient_id in patient_profiles})
         
         # Generate batch summary
-        self._generate_batch_summary(results, output_dir or self.config['output_dir'])
+        self._generate_batch_summary(results, Path(output_dir) if output_dir else self.config['output_dir'])
         return results
     
     def _generate_batch_summary(self, results: Dict, output_dir: Path):
@@ -657,7 +788,7 @@ class UltimateChronicDiseaseSystem:
         print(f"Data Sources: {len(connectivity['working'])}/{connectivity['total_sources']} working")
         
         # Models status
-        available_models = list(self.predictor.models.keys())
+        available_models = self.predictor.available_diseases()
         print(f"Trained Models: {len(available_models)}")
         if available_models:
             print(f"  Available: {', '.join(available_models)}")
@@ -682,6 +813,13 @@ def main():
     parser.add_argument('--status', action='store_true', help='Show system status')
     parser.add_argument('--source', default='direct_url', choices=['kaggle', 'direct_url', 'cdc', 'who'], 
                        help='Preferred data source')
+    parser.add_argument('--parallel', action='store_true',
+                       help='Train disease models in parallel with checkpoint/resume')
+    parser.add_argument('--max-cores', type=int, help='Total CPU cores parallel training may use')
+    parser.add_argument('--search', default='grid', choices=['grid', 'halving'],
+                       help='Hyperparameter search strategy (halving is much faster on large datasets)')
+    parser.add_argument('--workers', type=int, default=0,
+                       help='Worker processes for report extraction (0: one per CPU core, 1: serial)')
     
     args = parser.parse_args()
     
@@ -690,7 +828,8 @@ def main():
     
     if args.setup:
         print("🚀 Setting up system...")
-        system.setup_system(source_preference=args.source, train_all=True)
+        system.setup_system(source_preference=args.source, train_all=True,
+                            parallel=args.parallel, max_cores=args.max_cores, search=args.search)
     
     elif args.assess:
         # Load existing models first
@@ -699,6 +838,7 @@ def main():
             return
         
         # Assess patient risk
+        system.report_processor.workers = args.workers
         result = system.assess_patient_risk(args.assess, args.patient_id)
         if not result:
             print("❌ Assessment failed")
@@ -710,7 +850,7 @@ def main():
             return
         
         # Batch process
-        system.batch_assess_patients(args.batch)
+        system.batch_assess_patients(args.batch, workers=args.workers)
     
     elif args.status:
         status = system.get_system_status()
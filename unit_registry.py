@@ -0,0 +1,132 @@
+"""
+Lab Unit Registry
+=================
+
+Per-analyte unit conversions, so values reported in different units (glucose
+in mmol/L from one lab and mg/dL from another) are put on one scale before
+they are averaged or fed to the models.
+
+Every field has a canonical unit - the one the models were trained on - and
+a table of ``unit -> (factor, offset)`` with
+``canonical value = value * factor + offset``. ``UnitRegistry.normalize``
+converts a whole batch of ``(field, value, unit)`` triples with NumPy: the
+factor lookup happens once per distinct (field, unit) pair and the values
+are converted in one array operation.
+"""
+
+import re
+import numpy as np
+from typing import Dict, Optional
+
+# field: (canonical unit, {unit: (factor, offset)})
+UNIT_CONVERSIONS = {
+    'glucose': ('mg/dl', {'mg/dl': (1.0, 0.0), 'mmol/l': (18.016, 0.0), 'g/l': (100.0, 0.0)}),
+    # IFCC mmol/mol to NGSP %
+    'hba1c': ('%', {'%': (1.0, 0.0), 'mmol/mol': (0.09148, 2.152)}),
+    'cholesterol': ('mg/dl', {'mg/dl': (1.0, 0.0), 'mmol/l': (38.67, 0.0)}),
+    'hdl': ('mg/dl', {'mg/dl': (1.0, 0.0), 'mmol/l': (38.67, 0.0)}),
+    'ldl': ('mg/dl', {'mg/dl': (1.0, 0.0), 'mmol/l': (38.67, 0.0)}),
+    'triglycerides': ('mg/dl', {'mg/dl': (1.0, 0.0), 'mmol/l': (88.57, 0.0)}),
+    'creatinine': ('mg/dl', {'mg/dl': (1.0, 0.0), 'umol/l': (1 / 88.42, 0.0), 'mmol/l': (1000 / 88.42, 0.0)}),
+    # Urea nitrogen in mg/dL; urea in mmol/L converts to BUN
+    'urea': ('mg/dl', {'mg/dl': (1.0, 0.0), 'mmol/l': (2.801, 0.0)}),
+    # A bare 'g' on a hemoglobin result is g/dL
+    'hemoglobin': ('g/dl', {'g/dl': (1.0, 0.0), 'g': (1.0, 0.0), 'g/l': (0.1, 0.0), 'mmol/l': (1.611, 0.0)}),
+    'heart_rate': ('bpm', {'bpm': (1.0, 0.0)}),
+    'bmi': ('kg/m2', {'kg/m2': (1.0, 0.0)}),
+}
+
+# Spellings of the same unit
+UNIT_ALIASES = {
+    'percentage': '%',
+    'percent': '%',
+    'mg/100ml': 'mg/dl',
+    'mg%': 'mg/dl',
+    'gm/dl': 'g/dl',
+    'gms/dl': 'g/dl',
+    'g/100ml': 'g/dl',
+    'g%': 'g/dl',
+    'gm%': 'g/dl',
+    'gms%': 'g/dl',
+    'mmol/liter': 'mmol/l',
+    'micromol/l': 'umol/l',
+    'kg/sqm': 'kg/m2',
+    'beats/min': 'bpm',
+    'beats': 'bpm',
+    '/min': 'bpm',
+    'b/min': 'bpm',
+}
+
+
+def normalize_unit(unit: Optional[str]) -> str:
+    """Canonical spelling of a unit ('' for no unit): 'mmol/L' -> 'mmol/l', 'µmol/L' -> 'umol/l'"""
+    if not unit:
+        return ''
+    unit = re.sub(r'\s+', '', unit.lower()).rstrip('.')
+    unit = unit.replace('µ', 'u').replace('μ', 'u').replace('²', '2').replace('^', '')
+    return UNIT_ALIASES.get(unit, unit)
+
+
+class UnitRegistry:
+    """Per-field unit conversion tables with a vectorized batch conversion"""
+
+    def __init__(self, conversions: Optional[Dict[str, tuple]] = None):
+        """
+        Args:
+            conversions: ``{field: (canonical unit, {unit: (factor, offset)})}``
+                (default: ``UNIT_CONVERSIONS``)
+        """
+        conversions = UNIT_CONVERSIONS if conversions is None else conversions
+        self.canonical_units = {}
+        self.conversions = {}
+        for field, (canonical, units) in conversions.items():
+            self.canonical_units[field] = canonical
+            self.conversions[field] = {normalize_unit(unit): factors for unit, factors in units.items()}
+
+    def register(self, field: str, unit: str, factor: float, offset: float = 0.0, canonical: Optional[str] = None):
+        """Add a unit for a field (and set its canonical unit if it has none yet)"""
+        if field not in self.canonical_units:
+            self.canonical_units[field] = normalize_unit(canonical or unit)
+            self.conversions[field] = {self.canonical_units[field]: (1.0, 0.0)}
+        self.conversions[field][normalize_unit(unit)] = (float(factor), float(offset))
+
+    def canonical_unit(self, field: str) -> Optional[str]:
+        """The unit a field's values are normalized to"""
+        return self.canonical_units.get(field)
+
+    def conversion(self, field: str, unit: Optional[str]):
+        """
+        ``(factor, offset)`` from ``unit`` to the field's canonical unit
+
+        A value without a unit, or for a field the registry does not know, is
+        taken as already canonical. Returns None for a unit the field has no
+        conversion for.
+        """
+        unit = normalize_unit(unit)
+        if not unit or field not in self.conversions:
+            return 1.0, 0.0
+        return self.conversions[field].get(unit)
+
+    def normalize(self, fields, values, units) -> np.ndarray:
+        """
+        Convert a batch of values to their fields' canonical units
+
+        ``fields``, ``values`` and ``units`` are parallel sequences. Returns a
+        float array of converted values, NaN where the unit has no conversion
+        for the field.
+        """
+        values = np.asarray(values, dtype=float)
+        if values.size == 0:
+            return values
+
+        pairs = np.array([f'{field}|{unit or ""}' for field, unit in zip(fields, units)])
+        unique_pairs, inverse = np.unique(pairs, return_inverse=True)
+
+        factors = np.empty(len(unique_pairs))
+        offsets = np.empty(len(unique_pairs))
+        for position, pair in enumerate(unique_pairs):
+            field, unit = pair.split('|', 1)
+            conversion = self.conversion(field, unit)
+            factors[position], offsets[position] = conversion if conversion else (np.nan, np.nan)
+
+        return values * factors[inverse] + offsets[inverse]